@@ -0,0 +1,116 @@
+from asgiref.sync import sync_to_async
+
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from apps.account.api.renderers import FastJSONRenderer
+from apps.account.api.views import TokenObtainPairAPIView, UserAPIView
+from apps.account.authentication import StatelessJWTAuthentication
+from apps.post.stats import post_stats
+
+
+class AsyncAPIView(View):
+    """
+    Base async view, authenticates and renders responses like the DRF APIViews of the project.
+
+    * The user is authenticated with StatelessJWTAuthentication using the async ORM. The user of
+      the methods that write, not in 'stateless_methods', is loaded from the database so the
+      inactive and deleted users are rejected.
+
+    * 'api_request' is the DRF Request of the view, parsing JSON data.
+
+    * Only authenticated users can perform any action, unless 'authentication_required' is False.
+
+    * 'api_view_class' is the DRF view implemented, its throttles and serializers can be reused.
+    """
+
+    authentication_class = StatelessJWTAuthentication
+    authentication_required = True
+    stateless_methods = ('GET', 'HEAD', 'OPTIONS')
+    parser_classes = [JSONParser]
+    renderer = FastJSONRenderer()
+    api_view_class = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Authenticated with the Authorization header like the DRF views
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.api_request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            if self.authentication_required:
+                await self.aauthenticate()
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    async def aauthenticate(self):
+        authenticator = self.authentication_class()
+        stateless = self.request.method in self.stateless_methods
+        result = await authenticator.aauthenticate(self.request, stateless=stateless)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        self.api_request.user, self.api_request.auth = result
+
+    def get_api_view(self, action=None):
+        return self.api_view_class(
+            request=self.api_request,
+            format_kwarg=None,
+            args=self.args,
+            kwargs=self.kwargs,
+            action=action,
+        )
+
+    async def acheck_throttles(self, view):
+        # Throttle buckets are stored with the sync cache API
+        await sync_to_async(view.check_throttles)(self.api_request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            exc.auth_header = self.authentication_class().authenticate_header(self.request)
+        response = exception_handler(exc, {'view': self, 'request': self.api_request})
+        if response is None:
+            raise exc
+        rendered = self.render(response.data, status=response.status_code)
+        for header in ('WWW-Authenticate', 'Retry-After'):
+            if response.has_header(header):
+                rendered[header] = response[header]
+        return rendered
+
+    def render(self, data, status=status.HTTP_200_OK):
+        content = self.renderer.render(data) if data is not None else b''
+        return HttpResponse(content, status=status, content_type=self.renderer.media_type)
+
+
+class AsyncUserAPIView(AsyncAPIView):
+    """
+    Async implementation of UserAPIView.
+    """
+
+    async def get(self, request):
+        user = self.api_request.user
+        return self.render(UserAPIView.get_user_data(user, await post_stats.aget(user.id)))
+
+
+class AsyncTokenObtainPairAPIView(AsyncAPIView):
+    """
+    Async implementation of TokenObtainPairAPIView, the password is checked in the bounded pool
+    of threads of password_hashing_pool.
+    """
+
+    authentication_required = False
+    api_view_class = TokenObtainPairAPIView
+
+    async def post(self, request):
+        view = self.get_api_view()
+        await self.acheck_throttles(view)
+        serializer = view.get_serializer(data=self.api_request.data)
+        attrs = serializer.to_internal_value(serializer.initial_data)
+        return self.render(await serializer.avalidate(attrs))
@@ -1,26 +1,44 @@
+from asgiref.sync import sync_to_async
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from rest_framework.validators import UniqueValidator
 
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.account.authentication import revoked_tokens
+from apps.account.hashers import password_hashing_pool
+from apps.account.tokens import SessionRefreshToken
+
 UserModel = get_user_model()
 
 
 class RegisterSerializer(serializers.ModelSerializer):
-    username = serializers.CharField(
-        required=True,
-        validators=[UnicodeUsernameValidator, UniqueValidator(queryset=UserModel.objects.all())],
-    )
-    email = serializers.EmailField(
-        required=True, validators=[UniqueValidator(queryset=UserModel.objects.all())]
-    )
+    """
+    Serializer of the registration of a user, in a single query checking that the username and
+    email are not taken and a single INSERT.
+
+    * The unique indexes of the username and email are the source of truth, a user registered
+      concurrently after the check fails the INSERT and is reported as the check would.
+    """
+
+    username = serializers.CharField(required=True, validators=[UnicodeUsernameValidator])
+    email = serializers.EmailField(required=True)
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
     first_name = serializers.CharField(required=True)
     last_name = serializers.CharField(required=True)
 
+    unique_fields = ("username", "email")
+    unique_message = UniqueValidator.message
+
     class Meta:
         model = UserModel
         fields = (
@@ -35,15 +53,118 @@ class RegisterSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         if attrs["password"] != attrs["password2"]:
             raise serializers.ValidationError({"password": "Password fields didn't match."})
+        self.check_unique(attrs)
         return attrs
 
+    def check_unique(self, attrs):
+        """
+        Raise a ValidationError for each field of 'unique_fields' whose value is already taken.
+        """
+
+        query = Q()
+        for field in self.unique_fields:
+            query |= Q(**{field: attrs[field]})
+        taken = UserModel.objects.filter(query).values_list(*self.unique_fields)
+        errors = {}
+        for values in taken:
+            for field, value in zip(self.unique_fields, values):
+                if value == attrs[field]:
+                    errors[field] = [serializers.ErrorDetail(self.unique_message, code="unique")]
+        if errors:
+            raise serializers.ValidationError(errors)
+
     def create(self, validated_data):
-        user = UserModel.objects.create(
+        user = UserModel(
             username=validated_data["username"],
             email=validated_data["email"],
             first_name=validated_data["first_name"],
             last_name=validated_data["last_name"],
         )
         user.set_password(validated_data["password"])
-        user.save()
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError:
+            # Registered by another request since the validation
+            self.check_unique(validated_data)
+            raise
         return user
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """
+    TokenObtainPairSerializer issuing SessionRefreshToken.
+    """
+
+    token_class = SessionRefreshToken
+
+    async def avalidate(self, attrs):
+        """
+        Async validate(), the password is checked by password_hashing_pool.
+
+        * Users are authenticated like ModelBackend, other authentication backends are not used.
+        """
+
+        user = await UserModel._default_manager.filter(
+            **{UserModel.USERNAME_FIELD: attrs[self.username_field]}
+        ).afirst()
+        if user is None:
+            # Hash once like ModelBackend, a nonexistent user takes as long as a wrong password
+            await password_hashing_pool.amake_password(attrs['password'])
+        elif not await password_hashing_pool.acheck_password(user, attrs['password']):
+            user = None
+        self.user = user
+
+        if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+
+        # The refresh token is recorded as outstanding in the database
+        refresh = await sync_to_async(self.get_token)(self.user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, self.user)
+        return {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer issuing SessionRefreshToken.
+
+    The refresh token is rotated before creating the access token, so the access token references
+    the new refresh token instead of the blacklisted one.
+    """
+
+    token_class = SessionRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        data = {}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+                revoked_tokens.add(refresh[api_settings.JTI_CLAIM])
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        data['access'] = str(refresh.access_token)
+        return data
+
+
+class TokenBlacklistSerializer(jwt_serializers.TokenBlacklistSerializer):
+    """
+    TokenBlacklistSerializer revoking the access tokens of this process right away.
+    """
+
+    token_class = SessionRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        refresh.blacklist()
+        revoked_tokens.add(refresh[api_settings.JTI_CLAIM])
+        return {}
@@ -1,14 +1,28 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework_simplejwt import views as jwt_views
-from .views import LogoutAPIView, UserAPIView, RegisterAPIView
+from .async_views import AsyncTokenObtainPairAPIView, AsyncUserAPIView
+from .views import LogoutAPIView, UserAPIView, RegisterAPIView, TokenObtainPairAPIView
 
 urlpatterns = [
     # JWT authentication
-    path('token/', jwt_views.TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path(
+        'token/',
+        (
+            AsyncTokenObtainPairAPIView.as_view()
+            if settings.ASYNC_API_VIEWS
+            else TokenObtainPairAPIView.as_view()
+        ),
+        name='token_obtain_pair',
+    ),
     path('token/refresh/', jwt_views.TokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', LogoutAPIView.as_view(), name='logout_api'),
     # User registration
     path('register/', RegisterAPIView.as_view(), name='register_api'),
     # User information
-    path('user/', UserAPIView.as_view(), name='user_api'),
+    path(
+        'user/',
+        AsyncUserAPIView.as_view() if settings.ASYNC_API_VIEWS else UserAPIView.as_view(),
+        name='user_api',
+    ),
 ]
@@ -8,14 +8,26 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from rest_framework_simplejwt.serializers import TokenBlacklistSerializer
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from apps.account.api.serializers import RegisterSerializer
+from apps.account.api.serializers import RegisterSerializer, TokenBlacklistSerializer
+from apps.account.authentication import get_stateless_authentication_classes
+from apps.account.throttling import PasswordHashingLimitMixin, TokenBucketThrottle
+from apps.post.stats import post_stats
 
 logger = logging.getLogger(__name__)
 UserModel = get_user_model()
 
 
+class TokenObtainPairAPIView(PasswordHashingLimitMixin, TokenObtainPairView):
+    """
+    TokenObtainPairView throttled per client IP, shedding load while passwords are hashed.
+    """
+
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'login'
+
+
 class LogoutAPIView(APIView):
     permission_classes = (IsAuthenticated,)
 
@@ -37,20 +49,28 @@ class LogoutAPIView(APIView):
 
 
 class UserAPIView(APIView):
+    authentication_classes = get_stateless_authentication_classes()
     permission_classes = (IsAuthenticated,)
 
     def get(self, request):
-        user = {
-            'id': request.user.id,
-            'username': request.user.username,
-            'email': request.user.email,
-            'first_name': request.user.first_name,
-            'last_name': request.user.last_name,
+        data = self.get_user_data(request.user, post_stats.get(request.user.id))
+        return Response(data=data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def get_user_data(user, stats):
+        return {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'post_stats': stats,
         }
-        return Response(data=user, status=status.HTTP_200_OK)
 
 
-class RegisterAPIView(CreateAPIView):
+class RegisterAPIView(PasswordHashingLimitMixin, CreateAPIView):
     queryset = UserModel.objects.all()
     permission_classes = (AllowAny,)
     serializer_class = RegisterSerializer
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'register'
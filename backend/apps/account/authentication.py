@@ -0,0 +1,154 @@
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.module_loading import import_string
+from django.utils.timezone import now
+
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from apps.account.tokens import REFRESH_JTI_CLAIM, USER_CLAIMS
+
+UserModel = get_user_model()
+
+
+class RevokedTokens:
+    """
+    In-process set of the blacklisted refresh tokens 'jti'.
+
+    Only refresh tokens blacklisted within the access token lifetime are kept, older access
+    tokens are expired anyway. The set is reloaded from the database every
+    JWT_REVOCATION_RELOAD_SECONDS, tokens blacklisted by this process are added right away.
+    """
+
+    def __init__(self):
+        self.jtis = set()
+        self.loaded_at = None
+        self.lock = Lock()
+
+    def get_queryset(self):
+        since = now() - api_settings.ACCESS_TOKEN_LIFETIME
+        return BlacklistedToken.objects.filter(blacklisted_at__gte=since).values_list(
+            'token__jti', flat=True
+        )
+
+    def reload(self):
+        self.set_jtis(set(self.get_queryset()))
+
+    async def areload(self):
+        self.set_jtis({jti async for jti in self.get_queryset()})
+
+    def set_jtis(self, jtis):
+        with self.lock:
+            self.jtis = jtis
+            self.loaded_at = monotonic()
+
+    def is_stale(self):
+        return (
+            self.loaded_at is None
+            or monotonic() - self.loaded_at >= settings.JWT_REVOCATION_RELOAD_SECONDS
+        )
+
+    def add(self, jti):
+        with self.lock:
+            self.jtis.add(jti)
+
+    def __contains__(self, jti):
+        if self.is_stale():
+            self.reload()
+        return jti in self.jtis
+
+    def clear(self):
+        with self.lock:
+            self.jtis = set()
+            self.loaded_at = None
+
+
+revoked_tokens = RevokedTokens()
+
+
+class RevocationMixin:
+    """
+    Reject the access tokens issued with a blacklisted refresh token.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        refresh_jti = validated_token.get(REFRESH_JTI_CLAIM)
+        if refresh_jti is not None and refresh_jti in revoked_tokens:
+            raise InvalidToken('Token is blacklisted')
+        return validated_token
+
+
+class JWTAuthentication(RevocationMixin, authentication.JWTAuthentication):
+    """
+    JWTAuthentication loading the user from the database.
+    """
+
+
+class StatelessJWTAuthentication(RevocationMixin, authentication.JWTStatelessUserAuthentication):
+    """
+    JWTAuthentication building a TokenUser from the token claims, without querying the database.
+
+    * Tokens issued without the user claims fall back to the database.
+    """
+
+    def get_user(self, validated_token):
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        return authentication.JWTAuthentication.get_user(self, validated_token)
+
+    async def aauthenticate(self, request, stateless=True):
+        """
+        Async counterpart of authenticate(), the database is queried with the async ORM.
+
+        The user is always loaded from the database, and checked active, unless 'stateless'.
+        """
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        if revoked_tokens.is_stale():
+            await revoked_tokens.areload()
+        validated_token = self.get_validated_token(raw_token)
+
+        if stateless and all(claim in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token), validated_token
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
+def get_user_instance(user):
+    """
+    User instance built from the claims of a TokenUser without querying the database, usable as
+    a foreign key value.
+    """
+
+    if not isinstance(user, TokenUser):
+        return user
+    return UserModel(pk=user.pk, **{claim: user.token[claim] for claim in USER_CLAIMS})
+
+
+def get_stateless_authentication_classes():
+    return [import_string(path) for path in settings.STATELESS_AUTHENTICATION_CLASSES]
@@ -0,0 +1,90 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from apps.account.throttling import password_hashing_limiter
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2PasswordHasher with PASSWORD_PBKDF2_ITERATIONS iterations.
+
+    * Passwords hashed with another number of iterations are rehashed on login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+def check_password(password, encoded):
+    """
+    Return whether 'password' matches 'encoded', and its new hash when it was hashed with another
+    hasher or work factor than the preferred hasher, otherwise None.
+    """
+
+    is_correct, must_update = hashers.verify_password(password, encoded)
+    return is_correct, hashers.make_password(password) if is_correct and must_update else None
+
+
+class PasswordHashingPool:
+    """
+    Bounded pool of threads hashing the passwords of the async views, so the event loop keeps
+    serving other requests. hashlib and argon2-cffi release the GIL, up to
+    PASSWORD_HASHING_CONCURRENCY passwords are hashed in parallel.
+
+    * Tasks take a slot of password_hashing_limiter, shared with the sync views. Tasks queued for
+      longer than PASSWORD_HASHING_WAIT_MS are shed with Overloaded without hashing.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.size = None
+        self.lock = Lock()
+
+    def get_executor(self):
+        # Created on first use, a new size applies to the tasks submitted afterwards
+        with self.lock:
+            size = settings.PASSWORD_HASHING_CONCURRENCY
+            if self.executor is None or self.size != size:
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                self.executor = ThreadPoolExecutor(size, thread_name_prefix='password-hashing')
+                self.size = size
+            return self.executor
+
+    async def run(self, function, *args):
+        executor = self.get_executor()
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.call, monotonic(), function, *args
+        )
+
+    def call(self, submitted_at, function, *args):
+        # The time spent in the queue counts as waiting for a slot
+        wait = settings.PASSWORD_HASHING_WAIT_MS / 1000 - (monotonic() - submitted_at)
+        slot = password_hashing_limiter.acquire(timeout=max(wait, 0))
+        try:
+            return function(*args)
+        finally:
+            slot.release()
+
+    async def acheck_password(self, user, password):
+        """
+        Async user.check_password(), rehash the password with the preferred hasher if needed.
+        """
+
+        is_correct, encoded = await self.run(check_password, password, user.password)
+        if encoded is not None:
+            user.password = encoded
+            await user.asave(update_fields=['password'])
+        return is_correct
+
+    async def amake_password(self, password):
+        return await self.run(hashers.make_password, password)
+
+
+password_hashing_pool = PasswordHashingPool()
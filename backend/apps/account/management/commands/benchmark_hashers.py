@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PASSWORD = 'Change_me_123!'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the logins per second per core of every password hasher profile, as the time '
+        'spent checking a password, and the throughput of a pool of threads checking passwords.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Passwords checked per thread.')
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=settings.PASSWORD_HASHING_CONCURRENCY,
+            help='Threads of the pool, PASSWORD_HASHING_CONCURRENCY by default.',
+        )
+
+    def handle(self, *args, **options):
+        cores = min(options['threads'], os.cpu_count() or 1)
+        self.stdout.write(f'{os.cpu_count()} cores, pool of {options["threads"]} threads')
+        for profile, path in settings.PASSWORD_HASHER_PROFILES.items():
+            hasher = import_string(path)()
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as e:
+                # Library of the hasher not installed
+                self.stdout.write(f'{profile}: skipped, {e}')
+                continue
+            parameters = ', '.join(
+                f'{name}={value}'
+                for name, value in hasher.safe_summary(encoded).items()
+                if str(name) not in ('algorithm', 'salt', 'hash')
+            )
+
+            single = self.measure(hasher, encoded, options['repeat'], 1)
+            pool = self.measure(hasher, encoded, options['repeat'], options['threads'])
+            self.stdout.write(
+                f'{profile} ({parameters}): {1000 / single:.1f} ms per login, '
+                f'{single:.1f} logins/s per core | pool: {pool:.1f} logins/s, '
+                f'{pool / cores:.1f} per core'
+            )
+
+    def measure(self, hasher, encoded, repeat, threads):
+        """
+        Return the passwords checked per second by 'threads' threads.
+        """
+
+        with ThreadPoolExecutor(threads) as executor:
+            start = perf_counter()
+            list(executor.map(lambda _: hasher.verify(PASSWORD, encoded), range(repeat * threads)))
+            elapsed = perf_counter() - start
+        return repeat * threads / elapsed
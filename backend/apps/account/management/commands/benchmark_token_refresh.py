@@ -0,0 +1,95 @@
+from statistics import median, quantiles
+from time import perf_counter
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils.timezone import now
+
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.account.authentication import revoked_tokens
+from apps.account.tokens import SessionRefreshToken
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the latency of the token refreshes and of the reloads of the revoked tokens as '
+        'the token history grows: the outstanding and blacklisted tokens of a benchmark user are '
+        'topped up to every size of --history, as rotated refresh tokens blacklisted over the '
+        'refresh token lifetime.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--history',
+            type=int,
+            nargs='+',
+            default=[0, 100_000, 1_000_000],
+            help='Sizes of the token history measured.',
+        )
+        parser.add_argument('--username', default='benchmark', help='Owner of the tokens.')
+        parser.add_argument('--requests', type=int, default=200, help='Refreshes per size.')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Tokens per insert.')
+
+    def handle(self, *args, **options):
+        user, _ = UserModel.objects.get_or_create(username=options['username'])
+        client = Client()
+        url = reverse('token_refresh')
+        for size in sorted(options['history']):
+            self.seed(user, size, options['batch_size'])
+            tokens = [str(SessionRefreshToken.for_user(user)) for _ in range(options['requests'])]
+
+            timings = []
+            for token in tokens:
+                start = perf_counter()
+                response = client.post(url, {'refresh': token}, content_type='application/json')
+                timings.append((perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f'Refresh failed: {response.content.decode()}')
+
+            reloads = []
+            for _ in range(10):
+                start = perf_counter()
+                revoked_tokens.reload()
+                reloads.append((perf_counter() - start) * 1000)
+
+            self.stdout.write(
+                f'{OutstandingToken.objects.count()} outstanding tokens: refresh p50 '
+                f'{median(timings):.2f} ms, p95 {quantiles(timings, n=20)[-1]:.2f} ms | '
+                f'revoked tokens reload p50 {median(reloads):.2f} ms'
+            )
+
+    def seed(self, user, size, batch_size):
+        missing = size - OutstandingToken.objects.count()
+        lifetime = api_settings.REFRESH_TOKEN_LIFETIME
+        while missing > 0:
+            count = min(missing, batch_size)
+            # Tokens of a batch were blacklisted at the same time, spread over the lifetime
+            blacklisted_at = now() - lifetime * (missing / size)
+            with transaction.atomic():
+                tokens = OutstandingToken.objects.bulk_create(
+                    OutstandingToken(
+                        user=user,
+                        jti=uuid4().hex,
+                        token='',
+                        created_at=blacklisted_at,
+                        expires_at=blacklisted_at + lifetime,
+                    )
+                    for _ in range(count)
+                )
+                blacklisted = BlacklistedToken.objects.bulk_create(
+                    BlacklistedToken(token=token) for token in tokens
+                )
+                # blacklisted_at is set on creation
+                BlacklistedToken.objects.filter(pk__in=[token.pk for token in blacklisted]).update(
+                    blacklisted_at=blacklisted_at
+                )
+            missing -= count
+            self.stdout.write(f'{missing} tokens left to create')
@@ -0,0 +1,40 @@
+from time import perf_counter, sleep
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the expired refresh tokens from the outstanding tokens, with their blacklist '
+        'entries, by chunks of --batch-size tokens. Every chunk is deleted in its own short '
+        'transaction and the command pauses --pause-ms between chunks, so refreshes and logouts '
+        'are not blocked while it runs. Meant to be scheduled, daily for instance.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tokens per chunk.')
+        parser.add_argument(
+            '--pause-ms', type=int, default=10, help='Pause between chunks, in milliseconds.'
+        )
+
+    def handle(self, *args, **options):
+        # Tokens expiring while the command runs are left to the next run
+        expired = OutstandingToken.objects.filter(expires_at__lte=now()).order_by('expires_at')
+        start = perf_counter()
+        deleted = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[: options['batch_size']])
+            if pks:
+                with transaction.atomic():
+                    # Only the primary keys are loaded, blacklist entries are deleted by token_id
+                    OutstandingToken.objects.filter(pk__in=pks).only('pk').delete()
+                deleted += len(pks)
+            if len(pks) < options['batch_size']:
+                break
+            sleep(options['pause_ms'] / 1000)
+        elapsed = perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired tokens deleted in {elapsed:.1f}s'))
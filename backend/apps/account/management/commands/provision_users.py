@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Create --count users named <prefix><number> for load tests, with the same password. '
+        'The password is hashed once and the users are inserted by batches, existing users are '
+        'left untouched so the command can be run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000, help='Users to provision.')
+        parser.add_argument('--prefix', default='loadtest', help='Prefix of the usernames.')
+        parser.add_argument('--password', default='Change_me_123!', help='Password of the users.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Users per insert.')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        # Sharing the hash, salt included, saves a password hashing per user
+        password = make_password(options['password'])
+        start = perf_counter()
+        before = UserModel.objects.filter(username__startswith=prefix).count()
+        for first in range(0, options['count'], options['batch_size']):
+            numbers = range(first, min(first + options['batch_size'], options['count']))
+            users = [
+                UserModel(
+                    username=f'{prefix}{number}',
+                    email=f'{prefix}{number}@example.com',
+                    password=password,
+                    first_name=prefix,
+                    last_name=str(number),
+                )
+                for number in numbers
+            ]
+            with transaction.atomic():
+                UserModel.objects.bulk_create(users, ignore_conflicts=True)
+        created = UserModel.objects.filter(username__startswith=prefix).count() - before
+        elapsed = perf_counter() - start
+        self.stdout.write(
+            f'{created} users created in {elapsed:.1f} s ({created / elapsed:.0f} users/s), '
+            f'{options["count"] - created} already existed'
+        )
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    # Registrations rely on the database to reject a taken email, users without email are allowed
+    operations = [
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX account_user_email_uniq ON auth_user (email) WHERE email <> ''",
+            'DROP INDEX account_user_email_uniq',
+        ),
+    ]
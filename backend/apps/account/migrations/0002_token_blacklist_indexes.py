@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_user_email_unique'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    # The jti and token_id lookups of the refresh and blacklist checks use the unique indexes of
+    # simplejwt, these cover compact_tokens and the reloads of the revoked tokens
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX account_outstandingtoken_expires_at '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            'DROP INDEX account_outstandingtoken_expires_at',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX account_blacklistedtoken_blacklisted_at '
+            'ON token_blacklist_blacklistedtoken (blacklisted_at)',
+            'DROP INDEX account_blacklistedtoken_blacklisted_at',
+        ),
+    ]
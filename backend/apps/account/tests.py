@@ -1,11 +1,35 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
 from json import loads as json_loads
+from time import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncRequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.account.api.async_views import AsyncTokenObtainPairAPIView, AsyncUserAPIView
+from apps.account.api.renderers import FastJSONRenderer
+from apps.account.api.serializers import RegisterSerializer
+from apps.account.authentication import revoked_tokens
+from apps.account.throttling import TokenBucketThrottle, password_hashing_limiter
+from apps.post.stats import post_stats
+
 UserModel = get_user_model()
 
 
@@ -142,6 +166,7 @@ class UserAPIViewTestCase(APITestCase):
             'email': email,
             'first_name': first_name,
             'last_name': last_name,
+            'post_stats': {'total': 0, 'public': 0, 'hidden': 0, 'last_posted_at': None},
         }
 
     def test_retrieve_user_successful(self):
@@ -160,3 +185,547 @@ class UserAPIViewTestCase(APITestCase):
 
         # Assertion for a failing retrieve user cause missing authentication
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RegisterAPIViewTestCase(APITestCase):
+    """
+    RegisterAPIView test case.
+
+    supported methods:
+    - POST
+        cases:
+        - register with a single query checking the username and email and a single INSERT
+        - register with a taken username and email
+        - register with a taken email
+        - register with a username taken after the validation
+        - users with the same email rejected by the database
+    """
+
+    register_url = reverse('register_api')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user
+        UserModel.objects.create_user(
+            username='anon', password='Change_me_123!', email='anon@django.org'
+        )
+        self.payload = {
+            'username': 'new',
+            'password': 'Change_me_123!',
+            'password2': 'Change_me_123!',
+            'email': 'new@django.org',
+            'first_name': 'new name',
+            'last_name': 'new surname',
+        }
+
+    def register(self, **payload):
+        return self.client.post(self.register_url, data={**self.payload, **payload}, format='json')
+
+    def test_register_successful(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.register()
+        queries = [
+            query['sql'].split()[0]
+            for query in context.captured_queries
+            if 'SAVEPOINT' not in query['sql']
+        ]
+
+        # Assertion for a successful registration in 2 queries
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(queries, ['SELECT', 'INSERT'])
+        user = UserModel.objects.get(username='new')
+        self.assertTrue(user.check_password('Change_me_123!'))
+        self.assertEqual(user.email, 'new@django.org')
+
+    def test_register_taken(self):
+        response = self.register(username='anon', email='anon@django.org')
+
+        # Assertion for a failing registration cause taken username and email
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            json_loads(response.content),
+            {'username': ['This field must be unique.'], 'email': ['This field must be unique.']},
+        )
+
+    def test_register_taken_email(self):
+        response = self.register(email='anon@django.org')
+
+        # Assertion for a failing registration cause taken email
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json_loads(response.content), {'email': ['This field must be unique.']})
+
+    def test_register_race(self):
+        # Simulate a user registered by another request after the validation
+        with mock.patch.object(RegisterSerializer, 'validate', lambda self, attrs: attrs):
+            response = self.register(username='anon')
+
+        # Assertion for a failing registration cause taken username
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json_loads(response.content), {'username': ['This field must be unique.']})
+        self.assertEqual(UserModel.objects.filter(username='anon').count(), 1)
+
+    def test_email_unique_index(self):
+        # Assertion for users without email allowed
+        UserModel.objects.create_user(username='first')
+        UserModel.objects.create_user(username='second')
+
+        # Assertion for a failing user creation cause taken email
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            UserModel.objects.create_user(username='other', email='anon@django.org')
+
+
+class StatelessAuthenticationTestCase(APITestCase):
+    """
+    StatelessJWTAuthentication test case.
+
+    cases:
+    - retrieve user without querying the users table
+    - retrieve user with a token without user claims
+    - access token revoked by logout in the same process
+    - access token revoked by logout in another process after reload
+    - access token of a rotated refresh token
+    - retrieve user with the async view
+    - retrieve user with the async view with a token without user claims
+    - retrieve user with the async view not authenticated
+    """
+
+    user_url = reverse('user_api')
+    logout_url = reverse('logout_api')
+    refresh_url = reverse('token_refresh')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(
+            username=username, password=password, email='anon@django.org'
+        )
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+
+        # Save JWT tokens for authentication during test
+        self.access_token = response_data['access']
+        self.refresh_token = response_data['refresh']
+        revoked_tokens.reload()
+
+    def get_user(self, access_token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        return self.client.get(self.user_url)
+
+    def test_retrieve_user_without_queries(self):
+        # Only the post counters are read, 2 queries when the user has none yet
+        post_stats.reset([self.user.pk])
+        with self.assertNumQueries(1):
+            response = self.get_user(self.access_token)
+
+        # Assertion for a user built from the token claims
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content)['email'], 'anon@django.org')
+
+    def test_retrieve_user_without_claims(self):
+        access_token = RefreshToken.for_user(self.user).access_token
+        post_stats.reset([self.user.pk])
+        with self.assertNumQueries(2):
+            response = self.get_user(access_token)
+
+        # Assertion for a user loaded from the database
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content)['email'], 'anon@django.org')
+
+    def test_revoked_by_logout(self):
+        self.get_user(self.access_token)
+        self.client.post(self.logout_url, data={'refresh': self.refresh_token}, format='json')
+        response = self.get_user(self.access_token)
+
+        # Assertion for a failing retrieve user cause revoked token
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_by_logout_other_process(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.client.post(self.logout_url, data={'refresh': self.refresh_token}, format='json')
+
+        # Simulate another process which did not handle the logout
+        revoked_tokens.clear()
+        response = self.get_user(self.access_token)
+
+        # Assertion for a failing retrieve user cause revoked token
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated(self):
+        payload = {'refresh': self.refresh_token}
+        response = self.client.post(self.refresh_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+
+        # Assertion for a new access token accepted and the old one revoked
+        self.assertEqual(self.get_user(response_data['access']).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.get_user(self.access_token).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    async def aget_user(self, access_token=None):
+        headers = {'Authorization': f'Bearer {access_token}'} if access_token else None
+        request = AsyncRequestFactory().get(self.user_url, headers=headers)
+        return await AsyncUserAPIView.as_view()(request)
+
+    async def test_async_retrieve_user(self):
+        response = await self.aget_user(self.access_token)
+
+        # Assertion for a user built from the token claims
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content)['email'], 'anon@django.org')
+
+    async def test_async_retrieve_user_without_claims(self):
+        refresh_token = await sync_to_async(RefreshToken.for_user)(self.user)
+        response = await self.aget_user(refresh_token.access_token)
+
+        # Assertion for a user loaded from the database
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content)['email'], 'anon@django.org')
+
+    async def test_async_retrieve_user_not_authenticated(self):
+        response = await self.aget_user()
+
+        # Assertion for a failing retrieve user cause missing authentication
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(THROTTLE_RATES={'login': '2/m', 'register': '1/h', 'post_write': ''})
+class ThrottlingTestCase(APITestCase):
+    """
+    TokenBucketThrottle and password hashing limiter test case.
+
+    cases:
+    - logins throttled per client IP once the bucket is empty, refilled over time
+    - logins with a spoofed X-Forwarded-For throttled in the bucket of the client IP
+    - registrations throttled
+    - buckets kept in the process when the shared cache fails
+    - logins shed while the password hashing slots are taken
+    - password hashing slot released when the view raises an unhandled exception
+    """
+
+    login_url = reverse('token_obtain_pair')
+    register_url = reverse('register_api')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+        TokenBucketThrottle.local_cache.clear()
+
+        # Create a new user
+        self.payload = {'username': 'anon', 'password': 'Change_me_123!'}
+        UserModel.objects.create_user(**self.payload)
+
+    def login(self):
+        return self.client.post(self.login_url, data=self.payload, format='json')
+
+    def test_login(self):
+        now = time()
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: now):
+            responses = [self.login() for _ in range(3)]
+
+        # Assertion for a burst of the bucket size allowed, then throttled
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [status.HTTP_200_OK, status.HTTP_200_OK, status.HTTP_429_TOO_MANY_REQUESTS],
+        )
+        self.assertEqual(responses[-1]['Retry-After'], '30')
+
+        # Assertion for a token refilled after 30 seconds
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: now + 30):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_login_forwarded_for(self):
+        now = time()
+        with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: now):
+            responses = [
+                self.client.post(
+                    self.login_url,
+                    data=self.payload,
+                    format='json',
+                    HTTP_X_FORWARDED_FOR=f'10.0.0.{number}',
+                )
+                for number in range(3)
+            ]
+
+        # Assertion for the bucket of the client IP, not of the X-Forwarded-For header
+        self.assertEqual(responses[-1].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_register(self):
+        payload = {
+            'username': 'new',
+            'password': 'Change_me_123!',
+            'password2': 'Change_me_123!',
+            'email': 'new@django.org',
+            'first_name': 'new name',
+            'last_name': 'new surname',
+        }
+        response = self.client.post(self.register_url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        payload.update(username='other', email='other@django.org')
+        response = self.client.post(self.register_url, data=payload, format='json')
+
+        # Assertion for a failing registration cause throttled
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(UserModel.objects.filter(username='other').exists())
+
+    def test_shared_cache_unavailable(self):
+        broken = mock.Mock()
+        broken.get.side_effect = broken.set.side_effect = ConnectionError('cache down')
+        with mock.patch.object(TokenBucketThrottle, 'cache', broken):
+            responses = [self.login() for _ in range(3)]
+
+        # Assertion for the buckets kept in the process
+        self.assertEqual(responses[1].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(PASSWORD_HASHING_CONCURRENCY=1, PASSWORD_HASHING_WAIT_MS=0)
+    def test_password_hashing_limit(self):
+        # Simulate a request hashing a password in another thread
+        slot = password_hashing_limiter.acquire()
+        try:
+            response = self.login()
+        finally:
+            slot.release()
+
+        # Assertion for a login shed right away
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # Assertion for a login served once the slot is released
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHING_CONCURRENCY=1, PASSWORD_HASHING_WAIT_MS=0)
+    def test_password_hashing_slot_released_on_error(self):
+        payload = {
+            'username': 'new',
+            'password': 'Change_me_123!',
+            'password2': 'Change_me_123!',
+            'email': 'new@django.org',
+            'first_name': 'new name',
+            'last_name': 'new surname',
+        }
+        error = IntegrityError('database is locked')
+        with mock.patch.object(RegisterSerializer, 'create', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.register_url, data=payload, format='json')
+
+        # Assertion for a login served, the slot of the failed registration is released
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+
+PBKDF2_HASHERS = [
+    'apps.account.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+SCRYPT_HASHERS = [
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'apps.account.hashers.PBKDF2PasswordHasher',
+]
+
+
+@override_settings(PASSWORD_HASHERS=SCRYPT_HASHERS, PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHasherTestCase(APITestCase):
+    """
+    Password hasher profiles test case.
+
+    cases:
+    - password hashed with another profile rehashed on login
+    - password hashed with other PBKDF2 iterations rehashed on login
+    - login with the async view, rehashing the password
+    - login with the async view with wrong credentials
+    - login with the async view shed while the password hashing slots are taken
+    """
+
+    login_url = reverse('token_obtain_pair')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user, with a password hashed by the PBKDF2 profile
+        self.payload = {'username': 'anon', 'password': 'Change_me_123!'}
+        with self.settings(PASSWORD_HASHERS=PBKDF2_HASHERS):
+            self.user = UserModel.objects.create_user(**self.payload)
+
+    def get_algorithm(self):
+        self.user.refresh_from_db()
+        return identify_hasher(self.user.password).algorithm
+
+    def test_rehash_profile(self):
+        self.assertEqual(self.get_algorithm(), 'pbkdf2_sha256')
+        response = self.client.post(self.login_url, data=self.payload, format='json')
+
+        # Assertion for a password rehashed with the scrypt profile
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_algorithm(), 'scrypt')
+        response = self.client.post(self.login_url, data=self.payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHERS=PBKDF2_HASHERS, PASSWORD_PBKDF2_ITERATIONS=2000)
+    def test_rehash_iterations(self):
+        response = self.client.post(self.login_url, data=self.payload, format='json')
+
+        # Assertion for a password rehashed with the new number of iterations
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    async def alogin(self, payload):
+        request = AsyncRequestFactory().post(
+            self.login_url, data=payload, content_type='application/json'
+        )
+        return await AsyncTokenObtainPairAPIView.as_view()(request)
+
+    async def test_async_login(self):
+        response = await self.alogin(self.payload)
+
+        # Assertion for tokens issued and the password rehashed
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(json_loads(response.content)), {'access', 'refresh'})
+        self.assertEqual(await sync_to_async(self.get_algorithm)(), 'scrypt')
+
+    async def test_async_login_wrong_credentials(self):
+        responses = [
+            await self.alogin({'username': 'anon', 'password': 'wrong'}),
+            await self.alogin({'username': 'nobody', 'password': 'Change_me_123!'}),
+        ]
+
+        # Assertion for failing logins cause wrong credentials, as the sync view
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+        response = await self.alogin({'username': 'anon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(await sync_to_async(self.get_algorithm)(), 'pbkdf2_sha256')
+
+    @override_settings(PASSWORD_HASHING_CONCURRENCY=1, PASSWORD_HASHING_WAIT_MS=0)
+    async def test_async_login_hashing_limit(self):
+        # Simulate a request hashing a password in another thread
+        slot = password_hashing_limiter.acquire()
+        try:
+            response = await self.alogin(self.payload)
+        finally:
+            slot.release()
+
+        # Assertion for a login shed right away
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # Assertion for a login served once the slot is released
+        response = await self.alogin(self.payload)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """
+    FastJSONRenderer test case.
+
+    cases:
+    - same output as JSONRenderer
+    - same output as JSONRenderer without orjson
+    - indented output as JSONRenderer
+    """
+
+    data = {
+        'results': [
+            {
+                'id': 1,
+                'author': 'ànön',
+                'content': 'line\u2028separator ✓ "quoted"',
+                'hidden': False,
+                'created_at': datetime(2024, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            }
+        ],
+        'next': None,
+        'amount': Decimal('1.50'),
+        1: 'integer key',
+    }
+
+    def test_render(self):
+        # Assertion for the same bytes of JSONRenderer
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_render_without_orjson(self):
+        with mock.patch('apps.account.api.renderers.orjson', None):
+            content = FastJSONRenderer().render(self.data)
+
+        # Assertion for the same bytes of JSONRenderer
+        self.assertEqual(content, JSONRenderer().render(self.data))
+
+    def test_render_indent(self):
+        media_type = 'application/json; indent=4'
+
+        # Assertion for the same bytes of JSONRenderer
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+
+class CompactTokensTestCase(APITestCase):
+    """
+    compact_tokens command test case.
+
+    cases:
+    - expired tokens deleted with their blacklist entries, by chunks
+    - tokens not expired kept, blacklisted ones still rejected
+    """
+
+    refresh_url = reverse('token_refresh')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and rotate the refresh token twice
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        self.refresh_tokens = [json_loads(response.content)['refresh']]
+        for _ in range(2):
+            payload = {'refresh': self.refresh_tokens[-1]}
+            response = self.client.post(self.refresh_url, data=payload, format='json')
+            self.refresh_tokens.append(json_loads(response.content)['refresh'])
+
+    def test_compact(self):
+        expired = OutstandingToken.objects.order_by('pk').first()
+        expired.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        expired.save()
+        out = StringIO()
+        call_command('compact_tokens', batch_size=1, pause_ms=0, stdout=out)
+
+        # Assertion for the expired token deleted with its blacklist entry
+        self.assertIn('1 expired tokens deleted', out.getvalue())
+        self.assertFalse(OutstandingToken.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        # Assertion for the blacklisted token still rejected and the last one still valid
+        payload = {'refresh': self.refresh_tokens[1]}
+        response = self.client.post(self.refresh_url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        payload = {'refresh': self.refresh_tokens[2]}
+        response = self.client.post(self.refresh_url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,155 @@
+import logging
+from threading import BoundedSemaphore, Lock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import ScopedRateThrottle
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketThrottle(ScopedRateThrottle):
+    """
+    Token bucket throttle of the views with a 'throttle_scope'.
+
+    Each user, or client IP for anonymous requests, gets a bucket of 'num_requests' tokens for the
+    rate of the scope in THROTTLE_RATES, refilled continuously over the rate duration. Bursts up
+    to the bucket size are allowed, a request is throttled when the bucket is empty.
+
+    * Buckets are stored in the THROTTLE_CACHE_ALIAS cache shared by the processes, in a cache of
+      the process while the shared cache is unavailable.
+
+    * Buckets are read and written without locking, concurrent requests of the same client may
+      consume a single token.
+    """
+
+    local_cache = LocMemCache('throttle', {'OPTIONS': {'MAX_ENTRIES': 10000}})
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_rate(self):
+        # Read at every request, THROTTLE_RATES can be overridden
+        return settings.THROTTLE_RATES.get(self.scope) or None
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        refill = self.num_requests / self.duration
+        tokens, updated_at = self.get_bucket(self.key) or (self.num_requests, self.now)
+        tokens = min(self.num_requests, tokens + (self.now - updated_at) * refill)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / refill
+            return False
+        # A bucket left untouched for the rate duration is full again
+        self.set_bucket(self.key, (tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+    def get_bucket(self, key):
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f'{self.__class__.__name__} - shared cache unavailable - {e}')
+            return self.local_cache.get(key)
+
+    def set_bucket(self, key, bucket, timeout):
+        try:
+            self.cache.set(key, bucket, timeout)
+        except Exception as e:
+            logger.warning(f'{self.__class__.__name__} - shared cache unavailable - {e}')
+            self.local_cache.set(key, bucket, timeout)
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The server is overloaded, try again later.'
+    default_code = 'overloaded'
+    # Seconds sent in Retry-After
+    wait = 1
+
+
+class ConcurrencyLimiter:
+    """
+    Bound the number of requests of this process running a CPU-heavy task at the same time.
+
+    The number of slots is the 'limit_setting', requests wait up to 'wait_setting' milliseconds
+    for a slot, then are shed with Overloaded, so the workers stay available for other requests.
+    """
+
+    def __init__(self, limit_setting, wait_setting):
+        self.limit_setting = limit_setting
+        self.wait_setting = wait_setting
+        self.semaphore = None
+        self.limit = None
+        self.lock = Lock()
+
+    def get_semaphore(self):
+        # Created on first use, a new limit applies once the slots in use are released
+        with self.lock:
+            limit = getattr(settings, self.limit_setting)
+            if self.semaphore is None or self.limit != limit:
+                self.semaphore = BoundedSemaphore(limit)
+                self.limit = limit
+            return self.semaphore
+
+    def acquire(self, timeout=None):
+        """
+        Take a slot, return the semaphore to release or raise Overloaded.
+
+        'timeout' is the number of seconds waited for a slot, the 'wait_setting' by default.
+        """
+
+        if timeout is None:
+            timeout = getattr(settings, self.wait_setting) / 1000
+        semaphore = self.get_semaphore()
+        if not semaphore.acquire(timeout=timeout):
+            raise Overloaded()
+        return semaphore
+
+
+password_hashing_limiter = ConcurrencyLimiter(
+    'PASSWORD_HASHING_CONCURRENCY', 'PASSWORD_HASHING_WAIT_MS'
+)
+
+
+class PasswordHashingLimitMixin:
+    """
+    Limit the concurrent requests of an APIView that hashes passwords, see ConcurrencyLimiter.
+
+    * The slot is taken after authentication and throttling, so throttled requests never wait.
+
+    * The slot is released when dispatch() returns or raises, DRF does not finalize the response
+      of an exception it does not handle.
+    """
+
+    hashing_slot = None
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.hashing_slot is not None:
+                self.hashing_slot.release()
+                self.hashing_slot = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.hashing_slot = password_hashing_limiter.acquire()
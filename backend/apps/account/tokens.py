@@ -0,0 +1,28 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Claim of the access tokens holding the 'jti' of the refresh token they were issued with
+REFRESH_JTI_CLAIM = 'rjti'
+
+# User fields copied into the tokens, used to build the user without querying the database
+USER_CLAIMS = ('username', 'email', 'first_name', 'last_name')
+
+
+class SessionRefreshToken(RefreshToken):
+    """
+    RefreshToken whose access tokens reference it through the 'rjti' claim, so blacklisting the
+    refresh token revokes its access tokens as well.
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access[REFRESH_JTI_CLAIM] = self[api_settings.JTI_CLAIM]
+        return access
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
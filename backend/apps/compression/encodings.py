@@ -0,0 +1,200 @@
+import gzip
+import zlib
+from functools import lru_cache, partial
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Encoding:
+    """
+    Content coding of the responses.
+
+    * 'level' is used for the responses compressed on the fly, 'cache_level' for the pages
+      compressed once and cached, where a better ratio is worth the time.
+    """
+
+    name = None
+    level = None
+    cache_level = None
+
+    @property
+    def available(self):
+        return True
+
+    def compress(self, data, level):
+        raise NotImplementedError
+
+    def get_compressor(self, level):
+        """
+        Return the compress(chunk), flush() and finish() functions of a stream, flush() returns
+        the data compressed so far so the client can decode it right away.
+        """
+
+        raise NotImplementedError
+
+    def compress_stream(self, chunks, flush=False):
+        """
+        Compress the 'chunks' of a streamed response, flushing every chunk when 'flush' is set,
+        otherwise the compressor buffers them.
+        """
+
+        compress, flush_data, finish = self.get_compressor(self.level)
+        for chunk in chunks:
+            data = compress(chunk)
+            if flush:
+                data += flush_data()
+            if data:
+                yield data
+        yield finish()
+
+    async def acompress_stream(self, chunks, flush=False):
+        compress, flush_data, finish = self.get_compressor(self.level)
+        async for chunk in chunks:
+            data = compress(chunk)
+            if flush:
+                data += flush_data()
+            if data:
+                yield data
+        yield finish()
+
+
+class GzipEncoding(Encoding):
+    name = 'gzip'
+    level = 6
+    cache_level = 9
+
+    def compress(self, data, level):
+        # No modification time, the same page is always compressed to the same bytes
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    def get_compressor(self, level):
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, partial(compressor.flush, zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class BrotliEncoding(Encoding):
+    """
+    Brotli, requires brotli (pip install brotli).
+    """
+
+    name = 'br'
+    level = 4
+    cache_level = 9
+
+    @property
+    def available(self):
+        return brotli is not None
+
+    def compress(self, data, level):
+        return brotli.compress(data, quality=level)
+
+    def get_compressor(self, level):
+        compressor = brotli.Compressor(quality=level)
+        return compressor.process, compressor.flush, compressor.finish
+
+
+class ZstdEncoding(Encoding):
+    """
+    Zstandard, requires zstandard (pip install zstandard).
+    """
+
+    name = 'zstd'
+    level = 3
+    cache_level = 15
+
+    @property
+    def available(self):
+        return zstandard is not None
+
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def get_compressor(self, level):
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        flush = partial(compressor.flush, zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return compressor.compress, flush, compressor.flush
+
+
+@lru_cache(maxsize=256)
+def parse_accept_encoding(header):
+    """
+    Return the quality values of the codings of an Accept-Encoding header, by lowercase name.
+    """
+
+    qualities = {}
+    for item in header.split(','):
+        name, *params = item.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+class ResponseCompression:
+    """
+    Compression of the responses with the codings of COMPRESSION_ENCODINGS, in order of
+    preference, whose library is installed.
+
+    The coding negotiated is the one of highest quality in the Accept-Encoding header of the
+    request, the preferred one among equal qualities. Responses smaller than
+    COMPRESSION_MIN_SIZE bytes are not compressed.
+    """
+
+    encodings = {
+        encoding.name: encoding for encoding in (GzipEncoding(), BrotliEncoding(), ZstdEncoding())
+    }
+
+    def get_encodings(self):
+        return [
+            self.encodings[name]
+            for name in settings.COMPRESSION_ENCODINGS
+            if name in self.encodings and self.encodings[name].available
+        ]
+
+    def negotiate(self, request):
+        """
+        Return the Encoding of the responses to 'request', None for uncompressed responses.
+        """
+
+        header = request.META.get('HTTP_ACCEPT_ENCODING')
+        if not header:
+            return None
+        qualities = parse_accept_encoding(header)
+        best, best_quality = None, 0
+        for encoding in self.get_encodings():
+            quality = qualities.get(encoding.name, qualities.get('*', 0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, content, encoding, level=None):
+        """
+        Return 'content' compressed with 'encoding', None if it is too small to be worth it.
+        """
+
+        if encoding is None or len(content) < settings.COMPRESSION_MIN_SIZE:
+            return None
+        compressed = encoding.compress(content, encoding.level if level is None else level)
+        return compressed if len(compressed) < len(content) else None
+
+
+response_compression = ResponseCompression()
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from random import Random
+from time import process_time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from apps.account.api.renderers import FastJSONRenderer
+from apps.compression.encodings import response_compression
+from apps.post.api.serializers import PublicPostSerializer
+from apps.post.models import Post
+
+UserModel = get_user_model()
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'do', 'gu']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the bytes saved and the CPU time spent per request by every content coding '
+        'installed, on pages of public posts built in memory, at the level of the responses '
+        'compressed on the fly and at the level of the cached pages, compressed once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[10, 100], help='Posts per page.'
+        )
+        parser.add_argument('--repeat', type=int, default=50, help='Pages compressed per measure.')
+
+    def handle(self, *args, **options):
+        random = Random(0)
+        words = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+        weights = [1 / rank for rank in range(1, len(words) + 1)]
+        authors = [UserModel(pk=i, username=f'seed{i}') for i in range(50)]
+        created_at = now()
+
+        for rows in options['rows']:
+            posts = [
+                Post(
+                    pk=i,
+                    author=random.choice(authors),
+                    content=' '.join(random.choices(words, weights, k=random.randint(5, 30))),
+                    created_at=created_at - timedelta(hours=i),
+                )
+                for i in range(rows)
+            ]
+            data = {
+                'next': 'http://localhost/api/post/public/?cursor=MjAyNC0wMS0wMVQwMDowMDowMHwx',
+                'results': PublicPostSerializer(posts, many=True).data,
+            }
+            content = FastJSONRenderer().render(data)
+            self.stdout.write(f'{rows} posts per page, {len(content):,} bytes')
+
+            for encoding in response_compression.encodings.values():
+                if not encoding.available:
+                    self.stdout.write(f'  {encoding.name}: skipped, library not installed')
+                    continue
+                levels = {'on the fly': encoding.level, 'cached': encoding.cache_level}
+                for name, level in levels.items():
+                    start = process_time()
+                    for _ in range(options['repeat']):
+                        compressed = encoding.compress(content, level)
+                    cpu_ms = (process_time() - start) * 1000 / options['repeat']
+                    self.stdout.write(
+                        f'  {encoding.name} level {level} ({name}): {len(compressed):,} bytes '
+                        f'({len(compressed) / len(content):.0%}), '
+                        f'{len(content) - len(compressed):,} bytes saved per request, '
+                        f'{cpu_ms:.3f} ms CPU per page'
+                    )
+        self.stdout.write(
+            'Cached pages are compressed once per content coding, until a post is written.'
+        )
@@ -0,0 +1,79 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.utils.cache import patch_vary_headers
+
+from apps.compression.encodings import response_compression
+
+
+class CompressionMiddleware:
+    """
+    Compress the text and JSON responses with the coding negotiated by response_compression, see
+    ResponseCompression.
+
+    * Streamed responses are compressed as one stream. Chunks of the 'flushed_content_types',
+      live streams such as the Server-Sent Events, are flushed one by one so they are not
+      delayed, the compressor buffers the others, such as the NDJSON export.
+
+    * Responses already encoded, such as the cached pages of the posts lists compressed once, are
+      left as they are.
+
+    * Strong ETags are made weak, they are derived from the uncompressed content.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    content_types = ('application/json', 'application/x-ndjson', 'text/')
+    flushed_content_types = ('text/event-stream',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not response.get('Content-Type', '').startswith(self.content_types):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding'):
+            if response['Content-Encoding'] in response_compression.encodings:
+                self.set_weak_etag(response)
+            return response
+
+        encoding = response_compression.negotiate(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            flush = response['Content-Type'].startswith(self.flushed_content_types)
+            if response.is_async:
+                response.streaming_content = encoding.acompress_stream(
+                    response.streaming_content, flush
+                )
+            else:
+                response.streaming_content = encoding.compress_stream(
+                    response.streaming_content, flush
+                )
+            del response['Content-Length']
+        else:
+            compressed = response_compression.compress(response.content, encoding)
+            if compressed is None:
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding.name
+        self.set_weak_etag(response)
+        return response
+
+    def set_weak_etag(self, response):
+        etag = response.get('ETag')
+        if etag is not None and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
@@ -0,0 +1,239 @@
+import gzip
+import zlib
+from json import loads as json_loads
+from os import path
+from tempfile import gettempdir
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.account.authentication import revoked_tokens
+from apps.compression.encodings import (
+    BrotliEncoding,
+    GzipEncoding,
+    ZstdEncoding,
+    brotli,
+    response_compression,
+    zstandard,
+)
+from apps.compression.middleware import CompressionMiddleware
+from apps.post.api.async_views import AsyncPublicPostsView
+from apps.post.cache import public_posts_cache
+from apps.post.models import Post
+
+UserModel = get_user_model()
+
+# The weak ETag of the compressed lists needs a shared cache, see ConditionalListModelMixin
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': path.join(gettempdir(), 'compression-tests-cache'),
+    }
+}
+
+
+class CompressionTestCase(APITestCase):
+    """
+    Compression of the API responses test case.
+
+    supported methods:
+    - GET
+        cases:
+        - list public posts with gzip, same content decompressed
+        - cached public page compressed once and served as it is
+        - list public posts with the async view, compressed page from the cache
+        - list with gzip not accepted
+        - response smaller than COMPRESSION_MIN_SIZE not compressed
+        - export user's posts streamed with gzip
+    """
+
+    public_url = reverse('public-posts-list')
+    export_url = reverse('user-posts-export')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        self.access_token = json_loads(response.content)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        revoked_tokens.reload()
+
+        Post.objects.bulk_create(
+            [Post(author=self.user, content=f'post number {i}', hidden=False) for i in range(100)]
+        )
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_gzip(self):
+        identity = self.client.get(self.public_url)
+        response = self.client.get(self.public_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        # Assertion for the page compressed with gzip
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        self.assertLess(len(response.content), len(identity.content) / 4)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['ETag'], f'W/{identity["ETag"]}')
+
+    def test_precompressed_page(self):
+        first = self.client.get(self.public_url, HTTP_ACCEPT_ENCODING='gzip')
+        public_posts_cache.reset_stats()
+        with mock.patch.object(GzipEncoding, 'compress') as compress:
+            response = self.client.get(self.public_url, HTTP_ACCEPT_ENCODING='gzip')
+
+        # Assertion for the compressed page served from the cache without compressing it again
+        self.assertEqual(public_posts_cache.hits, 1)
+        compress.assert_not_called()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content, first.content)
+
+        # Assertion for the uncompressed page cached apart
+        response = self.client.get(self.public_url)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json_loads(response.content), json_loads(gzip.decompress(first.content)))
+
+    async def test_async_list(self):
+        headers = {'Authorization': f'Bearer {self.access_token}', 'Accept-Encoding': 'gzip'}
+        request = AsyncRequestFactory().get(self.public_url, headers=headers)
+        response = await AsyncPublicPostsView.as_view()(request)
+
+        # Assertion for the page compressed with gzip
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json_loads(gzip.decompress(response.content))['results']), 100)
+
+    def test_not_accepted(self):
+        response = self.client.get(self.public_url, HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+
+        # Assertion for an uncompressed page
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(json_loads(response.content)['results']), 100)
+
+    @override_settings(COMPRESSION_MIN_SIZE=1_000_000)
+    def test_small_response(self):
+        response = self.client.get(self.public_url, HTTP_ACCEPT_ENCODING='gzip')
+
+        # Assertion for an uncompressed page
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_streaming(self):
+        identity = b''.join(self.client.get(self.export_url).streaming_content)
+        response = self.client.get(self.export_url, HTTP_ACCEPT_ENCODING='gzip')
+
+        # Assertion for the export compressed with gzip
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), identity)
+
+
+class CompressionMiddlewareTestCase(SimpleTestCase):
+    """
+    CompressionMiddleware and ResponseCompression test case.
+
+    cases:
+    - coding of highest quality negotiated, the preferred one among equal qualities
+    - async event stream compressed chunk by chunk, every chunk decodable right away
+    - NDJSON stream buffered by the compressor
+    - responses not compressible left as they are
+    - brotli and zstd round trips, when installed
+    """
+
+    def negotiate(self, header):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+        encoding = response_compression.negotiate(request)
+        return encoding and encoding.name
+
+    @mock.patch.object(BrotliEncoding, 'available', True)
+    @mock.patch.object(ZstdEncoding, 'available', False)
+    @override_settings(COMPRESSION_ENCODINGS=['zstd', 'br', 'gzip'])
+    def test_negotiate(self):
+        # Assertion for the codings negotiated
+        self.assertEqual(self.negotiate('gzip, br'), 'br')
+        self.assertEqual(self.negotiate('gzip, br;q=0.5'), 'gzip')
+        self.assertEqual(self.negotiate('zstd, GZIP'), 'gzip')
+        self.assertEqual(self.negotiate('*;q=0.1, gzip;q=0'), 'br')
+        self.assertEqual(self.negotiate('identity, br;q=invalid'), None)
+        with self.settings(COMPRESSION_ENCODINGS=[]):
+            self.assertEqual(self.negotiate('gzip'), None)
+
+    async def test_async_stream(self):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = [b'{"id": %d}\n' % i * 100 for i in range(3)]
+
+        async def content():
+            for chunk in chunks:
+                yield chunk
+
+        async def get_response(request):
+            return StreamingHttpResponse(content(), content_type='text/event-stream')
+
+        request = AsyncRequestFactory().get('/', headers={'Accept-Encoding': 'gzip'})
+        response = await CompressionMiddleware(get_response)(request)
+
+        # Assertion for every chunk decoded as soon as it is received
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        received = [decompressor.decompress(data) async for data in response.streaming_content]
+        self.assertEqual(received[: len(chunks)], chunks)
+
+    def test_buffered_stream(self):
+        chunks = [b'{"id": %d, "content": "post"}\n' % i for i in range(1000)]
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse(chunks, content_type='application/x-ndjson')
+        CompressionMiddleware(lambda request: response)(request)
+        received = list(response.streaming_content)
+
+        # Assertion for the chunks compressed as one stream, not flushed one by one
+        self.assertLess(len(received), 10)
+        self.assertEqual(gzip.decompress(b''.join(received)), b''.join(chunks))
+
+    def test_not_compressible(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        image = HttpResponse(b'\x00' * 2000, content_type='image/png')
+        encoded = HttpResponse(b'{}' * 1000, content_type='application/json')
+        encoded['Content-Encoding'] = 'br'
+        for response in (image, encoded):
+            content = response.content
+            CompressionMiddleware(lambda request, response=response: response)(request)
+
+            # Assertion for the response left as it is
+            self.assertEqual(response.content, content)
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli(self):
+        encoding = BrotliEncoding()
+        data = b'{"content": "post"}' * 1000
+        stream = b''.join(encoding.compress_stream([data[:500], data[500:]]))
+
+        # Assertion for the content decompressed
+        self.assertEqual(brotli.decompress(encoding.compress(data, encoding.cache_level)), data)
+        self.assertEqual(brotli.decompress(stream), data)
+
+    @skipUnless(zstandard, 'zstandard is not installed')
+    def test_zstd(self):
+        encoding = ZstdEncoding()
+        data = b'{"content": "post"}' * 1000
+        stream = b''.join(encoding.compress_stream([data[:500], data[500:]]))
+        decompressor = zstandard.ZstdDecompressor()
+
+        # Assertion for the content decompressed
+        compressed = encoding.compress(data, encoding.cache_level)
+        self.assertEqual(decompressor.decompress(compressed), data)
+        self.assertEqual(decompressor.decompressobj().decompress(stream), data)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.monitoring"
+
+    def ready(self):
+        from apps.monitoring.metrics import install_execute_wrapper
+
+        # Queries of every database are timed, including the read replicas
+        connection_created.connect(install_execute_wrapper)
@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from math import inf
+from threading import Lock
+from time import perf_counter
+
+# RequestStats of the request being handled, the context is copied into sync_to_async threads
+current_request = ContextVar('current_request', default=None)
+
+
+class RequestStats:
+    """
+    SQL queries of a request, with their duration.
+    """
+
+    __slots__ = ('queries', 'sql_seconds', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.sql = []
+
+    def record_query(self, sql, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        self.sql.append((seconds, sql))
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, perf_counter() - start)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    # connection_created is sent again when the connection of a DatabaseWrapper is reopened
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+class Histogram:
+    """
+    Prometheus histogram, 'counts' are the observations of each bucket, not cumulative.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        total = 0
+        for bound, count in zip((*self.buckets, inf), self.counts):
+            total += count
+            yield bound, total
+
+
+class RouteMetrics:
+    """
+    Histograms of the requests by view name and method, exported in the Prometheus text format:
+    - http_request_duration_seconds: wall time
+    - http_request_db_duration_seconds: time spent in SQL queries
+    - http_request_db_queries: number of SQL queries
+    - http_response_size_bytes: size of the body
+    And the http_responses_total counter by view name, method and status code.
+
+    * Metrics are kept in memory by every process, Prometheus scrapes each process.
+    """
+
+    histograms = {
+        'http_request_duration_seconds': (
+            'Wall time of the requests',
+            (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+        ),
+        'http_request_db_duration_seconds': (
+            'Time spent in SQL queries per request',
+            (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+        ),
+        'http_request_db_queries': (
+            'Number of SQL queries per request',
+            (0, 1, 2, 3, 5, 10, 20, 50, 100),
+        ),
+        'http_response_size_bytes': (
+            'Size of the response bodies',
+            (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000),
+        ),
+    }
+
+    def __init__(self):
+        self.series = {}
+        self.responses = {}
+        self.lock = Lock()
+
+    def record(self, view, method, status, duration, stats, size):
+        values = {
+            'http_request_duration_seconds': duration,
+            'http_request_db_duration_seconds': stats.sql_seconds,
+            'http_request_db_queries': stats.queries,
+            'http_response_size_bytes': size,
+        }
+        with self.lock:
+            series = self.series.get((view, method))
+            if series is None:
+                series = self.series[(view, method)] = {
+                    name: Histogram(buckets) for name, (_, buckets) in self.histograms.items()
+                }
+            for name, value in values.items():
+                if value is not None:
+                    series[name].observe(value)
+            key = (view, method, status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, (description, _) in self.histograms.items():
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+                for (view, method), series in sorted(self.series.items()):
+                    histogram = series[name]
+                    labels = self.format_labels(view=view, method=method)
+                    for bound, count in histogram.cumulative_counts():
+                        le = '+Inf' if bound == inf else bound
+                        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines += [
+                '# HELP http_responses_total Number of responses by status code',
+                '# TYPE http_responses_total counter',
+            ]
+            for (view, method, status), count in sorted(self.responses.items()):
+                labels = self.format_labels(view=view, method=method, status=status)
+                lines.append(f'http_responses_total{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def format_labels(self, **labels):
+        return ','.join(f'{name}="{self.escape(value)}"' for name, value in labels.items())
+
+    def escape(self, value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    def clear(self):
+        with self.lock:
+            self.series = {}
+            self.responses = {}
+
+
+route_metrics = RouteMetrics()
@@ -0,0 +1,131 @@
+import logging
+from heapq import nlargest
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+
+from apps.monitoring.metrics import RequestStats, current_request, route_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    Record the wall time, SQL time, number of queries and response size of the requests of the
+    account and post APIs in route_metrics, by view name and method.
+
+    The requests slower than METRICS_SLOW_REQUEST_MS are logged with their slowest queries, the
+    parameters of the queries are not logged.
+
+    * Meant to be the first middleware, so the wall time includes the other middlewares.
+
+    * Streamed responses are recorded once their content is consumed, with the queries run and
+      the time spent while streaming it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    route_prefixes = ('api/account/', 'api/post/')
+    slow_queries_logged = 5
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.process_response(request, response, start, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.process_response(request, response, start, stats)
+
+    def process_response(self, request, response, start, stats):
+        match = request.resolver_match
+        if match is None or not match.route.startswith(self.route_prefixes):
+            return response
+        if not response.streaming:
+            duration = perf_counter() - start
+            self.record(request, response, duration, stats, len(response.content))
+        else:
+            stream = self.astream if response.is_async else self.stream
+            response.streaming_content = stream(
+                request, response, response.streaming_content, start, stats
+            )
+        return response
+
+    def stream(self, request, response, content, start, stats):
+        content = iter(content)
+        size = 0
+        try:
+            while True:
+                # The queries run by the content are recorded to the request
+                token = current_request.set(stats)
+                try:
+                    chunk = next(content)
+                except StopIteration:
+                    break
+                finally:
+                    current_request.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.record(request, response, perf_counter() - start, stats, size)
+
+    async def astream(self, request, response, content, start, stats):
+        content = aiter(content)
+        size = 0
+        try:
+            while True:
+                token = current_request.set(stats)
+                try:
+                    chunk = await anext(content)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    current_request.reset(token)
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.record(request, response, perf_counter() - start, stats, size)
+
+    def record(self, request, response, duration, stats, size):
+        route_metrics.record(
+            request.resolver_match.view_name,
+            request.method,
+            response.status_code,
+            duration,
+            stats,
+            size,
+        )
+        slow_request_ms = settings.METRICS_SLOW_REQUEST_MS
+        if slow_request_ms and duration * 1000 >= slow_request_ms:
+            self.log_slow_request(request, duration, stats)
+
+    def log_slow_request(self, request, duration, stats):
+        queries = nlargest(self.slow_queries_logged, stats.sql, key=lambda query: query[0])
+        sql = ''.join(f'\n{seconds * 1000:.1f} ms - {sql}' for seconds, sql in queries)
+        logger.warning(
+            f'{self.__class__.__name__} - slow request - {request.method} {request.path} in '
+            f'{duration * 1000:.1f} ms, {stats.queries} queries in '
+            f'{stats.sql_seconds * 1000:.1f} ms{sql}'
+        )
@@ -0,0 +1,165 @@
+from json import loads as json_loads
+from math import inf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.monitoring.metrics import Histogram, route_metrics
+from apps.monitoring.middleware import MetricsMiddleware
+
+UserModel = get_user_model()
+
+
+class MetricsTestCase(APITestCase):
+    """
+    MetricsMiddleware and MetricsView test case.
+
+    cases:
+    - request of the API recorded with its queries and response size
+    - requests outside of the account and post APIs not recorded
+    - metrics not served to other clients than METRICS_ALLOWED_IPS
+    - slow request logged with its SQL
+    - streamed response recorded once consumed, with the queries run while streaming
+    - request of an async view recorded with the queries run in threads
+    - async streamed response recorded once consumed
+    """
+
+    metrics_url = reverse('metrics')
+    public_url = reverse('public-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        access_token = json_loads(response.content)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        route_metrics.clear()
+
+    def get_metrics(self):
+        response = self.client.get(self.metrics_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content.decode()
+
+    def test_record_request(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.public_url)
+        # Captured queries are read from the log, reset by the next request
+        num_queries = len(context)
+        metrics = self.get_metrics()
+        labels = 'view="public-posts-list",method="GET"'
+
+        # Assertion for the request recorded with its queries and size
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 1', metrics)
+        self.assertIn(f'http_request_db_queries_sum{{{labels}}} {num_queries}', metrics)
+        self.assertIn(f'http_response_size_bytes_sum{{{labels}}} {len(response.content)}', metrics)
+        self.assertIn(f'http_responses_total{{{labels},status="200"}} 1', metrics)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', metrics)
+
+    def test_not_recorded(self):
+        self.get_metrics()
+        self.client.get('/admin/login/')
+
+        # Assertion for no request recorded
+        self.assertNotIn('http_responses_total{', self.get_metrics())
+
+    def test_metrics_forbidden(self):
+        response = self.client.get(self.metrics_url, REMOTE_ADDR='10.0.0.1')
+
+        # Assertion for a failing metrics request cause client not allowed
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=0.001)
+    def test_slow_request_logged(self):
+        with self.assertLogs('apps.monitoring.middleware', 'WARNING') as logs:
+            self.client.get(self.public_url)
+
+        # Assertion for the request logged with its SQL
+        self.assertIn('slow request - GET /api/post/public/', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_streamed_request(self):
+        response = self.client.get(reverse('user-posts-export'))
+        labels = 'view="user-posts-export",method="GET"'
+
+        # Assertion for the request not recorded before the content is consumed
+        self.assertNotIn(labels, route_metrics.render())
+
+        with CaptureQueriesContext(connection) as context:
+            content = b''.join(response.streaming_content)
+
+        # Assertion for the queries of the content and its size recorded
+        metrics = route_metrics.render()
+        self.assertGreater(len(context.captured_queries), 0)
+        self.assertIn(f'http_request_db_queries_count{{{labels}}} 1', metrics)
+        self.assertIn(f'http_response_size_bytes_sum{{{labels}}} {len(content)}', metrics)
+        queries = int(metrics.split(f'http_request_db_queries_sum{{{labels}}} ')[1].split()[0])
+        self.assertGreaterEqual(queries, len(context.captured_queries))
+
+    async def test_async_request(self):
+        async def get_response(request):
+            request.resolver_match = resolve(request.path)
+            return HttpResponse(str(await UserModel.objects.acount()))
+
+        request = AsyncRequestFactory().get(self.public_url)
+        await MetricsMiddleware(get_response)(request)
+
+        # Assertion for the query run in a thread recorded
+        metrics = route_metrics.render()
+        labels = 'view="public-posts-list",method="GET"'
+        self.assertIn(f'http_request_db_queries_sum{{{labels}}} 1', metrics)
+
+    async def test_async_streamed_request(self):
+        async def content():
+            yield str(await UserModel.objects.acount()).encode()
+
+        async def get_response(request):
+            request.resolver_match = resolve(request.path)
+            return StreamingHttpResponse(content())
+
+        request = AsyncRequestFactory().get(self.public_url)
+        response = await MetricsMiddleware(get_response)(request)
+        [chunk async for chunk in response.streaming_content]
+
+        # Assertion for the query run while streaming recorded
+        metrics = route_metrics.render()
+        labels = 'view="public-posts-list",method="GET"'
+        self.assertIn(f'http_request_db_queries_sum{{{labels}}} 1', metrics)
+        self.assertIn(f'http_response_size_bytes_sum{{{labels}}} 1', metrics)
+
+
+class HistogramTestCase(SimpleTestCase):
+    """
+    Histogram test case.
+
+    cases:
+    - observations counted in the buckets of their upper bound, cumulatively
+    """
+
+    def test_cumulative_counts(self):
+        histogram = Histogram((1, 5))
+        for value in (0, 1, 2, 5, 6):
+            histogram.observe(value)
+
+        # Assertion for the cumulative counts of the buckets
+        self.assertEqual(list(histogram.cumulative_counts()), [(1, 2), (5, 4), (inf, 5)])
+        self.assertEqual((histogram.sum, histogram.count), (14, 5))
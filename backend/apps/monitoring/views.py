@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from apps.monitoring.metrics import route_metrics
+
+
+class MetricsView(View):
+    """
+    Metrics of route_metrics in the Prometheus text format.
+
+    * Only served to the clients of METRICS_ALLOWED_IPS, others get a 404.
+    """
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def get(self, request):
+        if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+            raise Http404()
+        return HttpResponse(route_metrics.render(), content_type=self.content_type)
@@ -0,0 +1,162 @@
+from json import dumps as json_dumps
+
+from asgiref.sync import sync_to_async
+
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.account.api.async_views import AsyncAPIView
+from apps.account.authentication import get_user_instance
+from apps.compression.encodings import response_compression
+from apps.post.api.views import PublicPostsAPIView, UserPostsAPIView
+from apps.post.events import post_events
+from apps.post.routers import replica_reads
+
+
+class AsyncPostsView(AsyncAPIView):
+    """
+    Base async view for posts, reuses querysets, serializers and write hooks of 'api_view_class'
+    and reads the database with the async ORM.
+
+    * Writes run in a thread since transactions are not available in async code.
+    """
+
+    async def alist(self):
+        view = self.get_api_view('list')
+        database = await replica_reads.aget_database(self.api_request.user)
+        with replica_reads.use(database):
+            scope = view.list_cache.get_scope(self.api_request)
+            version = await view.list_cache.aget_version(scope)
+            etag, last_modified = view.get_list_validators(self.api_request, version)
+            response = get_conditional_response(
+                self.request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view.list_cache.get_response(
+                    await self.alist_page(view), self.renderer.media_type
+                )
+        return view.set_list_validators(response, etag, last_modified)
+
+    async def alist_page(self, view):
+        """
+        Return the rendered page and its content coding, from the 'list_cache' of the view.
+        """
+
+        # The key is computed before reading the database, see CachedListModelMixin
+        encoding = response_compression.negotiate(self.request)
+        key = view.list_cache.get_key(
+            self.api_request, self.renderer.media_type, encoding, view.list_cache_version
+        )
+        page = await view.list_cache.aget(key)
+        if page is None:
+            content = self.renderer.render(await self.alist_data(view))
+            page = view.list_cache.encode(content, encoding)
+            await view.list_cache.aset(key, page)
+        return page
+
+    async def alist_data(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(queryset, self.api_request, view=view)
+        serializer = view.get_serializer(page, many=True)
+        return view.paginator.get_paginated_response(serializer.data).data
+
+    async def aget_object(self, view):
+        queryset = view.filter_queryset(view.get_queryset())
+        try:
+            return await queryset.aget(pk=self.kwargs['pk'])
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+class AsyncPublicPostsView(AsyncPostsView):
+    """
+    Async implementation of the list of PublicPostsAPIView.
+    """
+
+    api_view_class = PublicPostsAPIView
+
+    async def get(self, request):
+        return await self.alist()
+
+
+class AsyncPublicPostsEventsView(AsyncAPIView):
+    """
+    Live public timeline streamed as Server-Sent Events, see PostEvents for the event types.
+
+    * Clients reconnecting with the 'Last-Event-ID' header receive only the events they missed.
+
+    * A comment is sent as heartbeat when there are no events.
+    """
+
+    async def get(self, request):
+        events = post_events.subscribe(request.headers.get('Last-Event-ID'))
+        response = StreamingHttpResponse(self.stream(events), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Disable the response buffering of reverse proxies
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, events):
+        async for event in events:
+            if event is None:
+                yield ': heartbeat\n\n'
+            else:
+                data = json_dumps(event.data, cls=JSONEncoder, ensure_ascii=False)
+                yield f'id: {event.id}\nevent: {event.type}\ndata: {data}\n\n'
+
+
+class AsyncUserPostsView(AsyncPostsView):
+    """
+    Async implementation of the list and create of UserPostsAPIView.
+    """
+
+    api_view_class = UserPostsAPIView
+
+    async def aauthenticate(self):
+        await super().aauthenticate()
+        # Posts are filtered and written with a User instance
+        self.api_request.user = get_user_instance(self.api_request.user)
+
+    async def get(self, request):
+        return await self.alist()
+
+    async def post(self, request):
+        view = self.get_api_view('create')
+        await self.acheck_throttles(view)
+        serializer = view.get_serializer(data=self.api_request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(view.perform_create)(serializer)
+        return self.render(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AsyncUserPostDetailView(AsyncUserPostsView):
+    """
+    Async implementation of the update and delete of UserPostsAPIView.
+    """
+
+    http_method_names = ['put', 'patch', 'delete', 'options']
+
+    async def put(self, request, pk):
+        return await self.aupdate('update', partial=False)
+
+    async def patch(self, request, pk):
+        return await self.aupdate('partial_update', partial=True)
+
+    async def delete(self, request, pk):
+        view = self.get_api_view('destroy')
+        await self.acheck_throttles(view)
+        post = await self.aget_object(view)
+        await sync_to_async(view.perform_destroy)(post)
+        return self.render(None, status=status.HTTP_204_NO_CONTENT)
+
+    async def aupdate(self, action, partial):
+        view = self.get_api_view(action)
+        await self.acheck_throttles(view)
+        post = await self.aget_object(view)
+        serializer = view.get_serializer(post, data=self.api_request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(view.perform_update)(serializer)
+        return self.render(serializer.data)
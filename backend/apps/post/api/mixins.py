@@ -0,0 +1,153 @@
+from hashlib import sha256
+from time import time
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework import status
+from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import JSONRenderer
+
+from apps.compression.encodings import response_compression
+from apps.post.api.serializers import PostFieldsQuerySerializer
+from apps.post.routers import replica_reads
+
+
+class ConditionalListModelMixin(ListModelMixin):
+    """
+    List a queryset answering conditional requests.
+
+    ETag and Last-Modified are derived from the version of the scope in 'list_cache', bumped to
+    the time of every write on its posts, see PostsCache, so the database is not read. Requests
+    with a matching 'If-None-Match' or 'If-Modified-Since' get a 304 without serializing anything.
+
+    * Pages read from a replica less than DATABASE_REPLICA_LAG_SECONDS after the last write may
+      miss it, they are sent without validators.
+
+    * Validators need a cache shared by the processes, with LocMemCache a write only bumps the
+      version of its own process and lists are sent without validators.
+    """
+
+    list_cache = None
+
+    def get_list_validators(self, request, version=None):
+        if version is None:
+            version = self.list_cache.get_version(self.list_cache.get_scope(request))
+        # The page cache key is built with the same version, see CachedListModelMixin
+        self.list_cache_version = version
+        if not self.list_cache.shared:
+            return None, None
+        last_modified = self.list_cache.get_modified(version)
+        lag = settings.DATABASE_REPLICA_LAG_SECONDS
+        if replica_reads.current() is not None and time() - last_modified < lag:
+            return None, None
+        etag = f'{request.user.pk}:{request.get_full_path()}:{version}'
+        etag = quote_etag(sha256(etag.encode()).hexdigest())
+        return etag, int(last_modified)
+
+    def set_list_validators(self, response, etag, last_modified):
+        if etag is not None:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return self.set_list_validators(response, etag, last_modified)
+
+
+class CachedListModelMixin(ListModelMixin):
+    """
+    List a queryset storing the rendered JSON pages in 'list_cache'.
+
+    Cached pages are returned as they are, without serializing and encoding them again. Pages are
+    stored compressed with the content coding negotiated, compressed once.
+    """
+
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        if not isinstance(renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+        # The key is computed before reading the database, so a page built while a post is
+        # being written is stored under the old version and never served
+        encoding = response_compression.negotiate(request)
+        version = getattr(self, 'list_cache_version', None)
+        key = self.list_cache.get_key(request, request.accepted_media_type, encoding, version)
+        page = self.list_cache.get(key)
+        if page is not None:
+            return self.list_cache.get_response(page, renderer.media_type)
+        self.list_cache_key = key
+        self.list_cache_encoding = encoding
+        self.list_cache_timeout = self.list_cache.get_timeout()
+        return super().list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # The page is rendered once the renderer is set on the response
+        key = getattr(self, 'list_cache_key', None)
+        if key is not None and response.status_code == status.HTTP_200_OK:
+            page = self.list_cache.encode(response.render().content, self.list_cache_encoding)
+            self.list_cache.set(key, page, self.list_cache_timeout)
+            content, content_encoding = page
+            if content_encoding is not None:
+                response.content = content
+                response['Content-Encoding'] = content_encoding
+        return response
+
+
+class ReplicaListModelMixin(ListModelMixin):
+    """
+    List a queryset reading from a replica, unless the user has just written, see ReplicaReads.
+    """
+
+    def list(self, request, *args, **kwargs):
+        with replica_reads.use(replica_reads.get_database(request.user)):
+            return super().list(request, *args, **kwargs)
+
+
+class SparseFieldsMixin:
+    """
+    Return the posts of the 'sparse_actions' with the fields of the 'fields' query parameter
+    only, in the compact format with the 'compact' query parameter, see
+    PostFieldsQuerySerializer and SparsePostSerializerMixin.
+
+    Querysets of these actions fetch the columns of the fields returned only, with those of the
+    pagination.
+    """
+
+    sparse_actions = ['list']
+
+    def get_sparse_options(self):
+        if self.action not in self.sparse_actions:
+            return {}
+        options = getattr(self, 'sparse_options', None)
+        if options is None:
+            query = PostFieldsQuerySerializer(
+                data=self.request.GET,
+                context={'fields': list(self.get_serializer_class().field_attributes)},
+            )
+            query.is_valid(raise_exception=True)
+            options = self.sparse_options = query.validated_data
+        return options
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), **self.get_sparse_options()}
+
+    def get_sparse_queryset(self, queryset):
+        fields = self.get_sparse_options().get('fields')
+        if fields is None:
+            return queryset
+        attributes = self.get_serializer_class().field_attributes
+        paths = [attributes[field].replace('.', '__') for field in fields]
+        related = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        # A deferred foreign key cannot be followed by select_related()
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*paths, 'created_at')
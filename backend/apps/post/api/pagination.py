@@ -0,0 +1,194 @@
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from math import isfinite
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.timezone import is_aware
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from apps.post.search import post_search
+
+
+class PostKeysetPagination(BasePagination):
+    """
+    Keyset pagination for posts ordered by '-created_at', '-pk'.
+
+    The opaque cursor encodes the (created_at, pk) pair of the last post returned, the next
+    page is selected with a range filter on that pair, so no COUNT and no OFFSET are performed.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering = ('-created_at', '-pk')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def filter_queryset(self, queryset, request):
+        """
+        Order the queryset and keep only the rows after the cursor of the request, if any.
+        """
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+            )
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        queryset = self.filter_queryset(queryset, request)
+
+        # Fetch one extra row to know if there is a next page without counting
+        return self.set_page(list(queryset[: self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        queryset = self.filter_queryset(queryset, request)
+        return self.set_page([obj async for obj in queryset[: self.page_size + 1].aiterator()])
+
+    def set_page(self, results):
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(*self.get_position(last))
+        )
+
+    def get_position(self, obj):
+        return obj.created_at, obj.pk
+
+    def format_value(self, created_at):
+        return created_at.isoformat()
+
+    def parse_value(self, value):
+        created_at = datetime.fromisoformat(value)
+        if not is_aware(created_at):
+            raise ValueError(value)
+        return created_at
+
+    def encode_cursor(self, value, pk):
+        return b64encode(f'{self.format_value(value)}|{pk}'.encode('ascii'), altchars=b'-_').decode(
+            'ascii'
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            decoded = b64decode(encoded.encode('ascii'), altchars=b'-_').decode('ascii')
+            value, pk = decoded.split('|')
+            value = self.parse_value(value)
+            pk = int(pk)
+        except (BinasciiError, UnicodeError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+
+class PostSearchPagination(PostKeysetPagination):
+    """
+    Keyset pagination for posts search results ordered by '-score', '-pk'.
+
+    The queryset paginated is the text searched, the cursor encodes the (score, pk) pair of the
+    last post returned.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        after = self.decode_cursor(request)
+        return self.set_page(post_search.search(queryset, after=after, limit=self.page_size + 1))
+
+    def get_position(self, obj):
+        return obj.score, obj.pk
+
+    def format_value(self, score):
+        # repr() of a float reads back to the same float
+        return repr(score)
+
+    def parse_value(self, value):
+        score = float(value)
+        if not isfinite(score):
+            raise ValueError(value)
+        return score
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination that can count and fetch the page with the async ORM.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached property, set it to skip the sync COUNT
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        bottom = (number - 1) * page_size
+        object_list = [obj async for obj in queryset[bottom : bottom + page_size].aiterator()]
+        self.page = paginator._get_page(object_list, number, paginator)
+        return list(self.page)
+
+
+class PostPagination(BasePagination):
+    """
+    Posts pagination:
+    - Keyset (cursor) pagination by default.
+    - Legacy page-number pagination when the 'page' query parameter is provided.
+    """
+
+    page_query_param = 'page'
+
+    def get_paginator(self, request):
+        if self.page_query_param in request.query_params:
+            return AsyncPageNumberPagination()
+        return PostKeysetPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return await self.paginator.apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PostKeysetPagination().get_paginated_response_schema(schema)
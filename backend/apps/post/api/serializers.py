@@ -1,9 +1,76 @@
+from functools import cached_property, lru_cache
+from operator import attrgetter
+
+from django.conf import settings
+from django.utils.timezone import now
+
 from rest_framework import serializers
 
-from apps.post.models import Post
+from apps.post.models import Post, PublicTimelineEntry
+
+
+@lru_cache(maxsize=1024)
+def format_date(day):
+    """
+    Format a date as '1 January 2021', posts of the same day share the formatted string.
+    """
+
+    return day.strftime('%d %B %Y')
+
+
+class SparsePostSerializerMixin:
+    """
+    Post serializer returning only the 'fields' of the serializer context, in the compact format
+    when 'compact' is set in the context:
+    - content: Truncated to POST_COMPACT_CONTENT_LENGTH characters.
+    - created_at: Unix timestamp.
+
+    * 'field_attributes' maps the fields to the attributes they read, only the attributes of the
+      fields returned are read so the columns of the others can be deferred.
+    """
+
+    field_attributes = {}
+
+    @cached_property
+    def sparse(self):
+        return 'fields' in self.context or self.context.get('compact', False)
+
+    @cached_property
+    def sparse_getters(self):
+        """
+        Return the (field, getter) pairs of the fields returned, getters format the values.
+        """
+
+        compact = self.context.get('compact', False)
+        getters = []
+        for field in self.context.get('fields', self.field_attributes):
+            getter = attrgetter(self.field_attributes[field])
+            if field == 'created_at' and compact:
+                getter = self.get_timestamp_getter(getter)
+            elif field == 'created_at':
+                getter = self.get_date_getter(getter)
+            elif field == 'content' and compact:
+                getter = self.get_preview_getter(getter, settings.POST_COMPACT_CONTENT_LENGTH)
+            getters.append((field, getter))
+        return getters
+
+    @staticmethod
+    def get_timestamp_getter(getter):
+        return lambda instance: int(getter(instance).timestamp())
+
+    @staticmethod
+    def get_date_getter(getter):
+        return lambda instance: format_date(getter(instance).date())
+
+    @staticmethod
+    def get_preview_getter(getter, length):
+        return lambda instance: getter(instance)[:length]
+
+    def to_sparse_representation(self, instance):
+        return {field: getter(instance) for field, getter in self.sparse_getters}
 
 
-class PublicPostSerializer(serializers.ModelSerializer):
+class PublicPostSerializer(SparsePostSerializerMixin, serializers.ModelSerializer):
     """
     ModelSerializer for Post.
 
@@ -19,15 +86,87 @@ class PublicPostSerializer(serializers.ModelSerializer):
     content = serializers.StringRelatedField(read_only=True)
     created_at = serializers.SerializerMethodField(read_only=True)
 
+    field_attributes = {
+        'id': 'pk',
+        'author': 'author.username',
+        'content': 'content',
+        'created_at': 'created_at',
+    }
+
     class Meta:
         model = Post
         exclude = ['hidden', 'updated_at']
 
     def get_created_at(self, instance):
-        return instance.created_at.strftime('%d %B %Y')
+        return format_date(instance.created_at.date())
+
+    def to_representation(self, instance):
+        if self.sparse:
+            return self.to_sparse_representation(instance)
+        # Same output of the declared fields, without the per-field machinery
+        return {
+            'id': instance.pk,
+            'author': str(instance.author),
+            'content': str(instance.content),
+            'created_at': format_date(instance.created_at.date()),
+        }
+
+
+class UserPostListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer for bulk creation and update of posts.
 
+    * Bulk update requires a dict of posts by id as instance and the 'id' of each item, every id
+      at most once.
 
-class UserPostSerializer(serializers.ModelSerializer):
+    * At most POST_BULK_MAX_ITEMS items are validated.
+    """
+
+    update_fields = ['content', 'hidden', 'updated_at']
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', settings.POST_BULK_MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        self.validated_ids = set()
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+        post = self.instance.get(data.get('id')) if isinstance(data, dict) else None
+        if post is None:
+            raise serializers.ValidationError({'id': ['Not found.']})
+        if post.id in self.validated_ids:
+            raise serializers.ValidationError({'id': ['Duplicate.']})
+        self.validated_ids.add(post.id)
+        self.child.instance = post
+        self.child.initial_data = data
+        return {**super().run_child_validation(data), 'id': post.id}
+
+    def create(self, validated_data):
+        return Post.objects.bulk_create(
+            [Post(**attrs) for attrs in validated_data], batch_size=settings.POST_BULK_BATCH_SIZE
+        )
+
+    def update(self, instance, validated_data):
+        # bulk_update skips auto_now fields
+        updated_at = now()
+        posts = []
+        for attrs in validated_data:
+            post = instance[attrs.pop('id')]
+            for attr, value in attrs.items():
+                setattr(post, attr, value)
+            post.updated_at = updated_at
+            posts.append(post)
+        Post.objects.bulk_update(
+            posts, self.update_fields, batch_size=settings.POST_BULK_BATCH_SIZE
+        )
+        return posts
+
+
+class UserPostSerializer(SparsePostSerializerMixin, serializers.ModelSerializer):
     """
     ModelSerializer for Post.
 
@@ -43,9 +182,122 @@ class UserPostSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     created_at = serializers.SerializerMethodField(read_only=True)
 
+    field_attributes = {
+        'id': 'pk',
+        'author': 'author.username',
+        'created_at': 'created_at',
+        'content': 'content',
+        'hidden': 'hidden',
+    }
+
     class Meta:
         model = Post
         exclude = ['updated_at']
+        list_serializer_class = UserPostListSerializer
 
     def get_created_at(self, instance):
-        return instance.created_at.strftime('%d %B %Y')
+        return format_date(instance.created_at.date())
+
+    def to_representation(self, instance):
+        if self.sparse:
+            return self.to_sparse_representation(instance)
+        # Same output of the declared and model fields, without the per-field machinery
+        return {
+            'id': instance.pk,
+            'author': str(instance.author),
+            'created_at': format_date(instance.created_at.date()),
+            'content': instance.content,
+            'hidden': instance.hidden,
+        }
+
+
+class PostBulkDestroySerializer(serializers.Serializer):
+    """
+    Serializer for bulk deletion of posts.
+
+    fields:
+    - ids: List of post ids.
+    """
+
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.POST_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(
+                f'Ensure this field has no more than {settings.POST_BULK_MAX_ITEMS} elements.'
+            )
+        return value
+
+
+class PostSearchQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters of the posts search.
+
+    fields:
+    - q: Text searched.
+    """
+
+    q = serializers.CharField(max_length=200)
+
+
+class PostFieldsQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the query parameters selecting the output of the posts lists, the names of
+    the fields available are the 'fields' of the context.
+
+    fields:
+    - fields: Comma separated names of the fields returned, all of them by default.
+    - compact: Flag for the compact format, see SparsePostSerializerMixin.
+    """
+
+    fields = serializers.CharField(required=False)
+    compact = serializers.BooleanField(required=False)
+
+    def validate_fields(self, value):
+        names = set(value.split(','))
+        unknown = names.difference(self.context['fields'])
+        if unknown:
+            raise serializers.ValidationError(f'Unknown fields: {", ".join(sorted(unknown))}.')
+        # Fields are returned in the order of the serializer
+        return [field for field in self.context['fields'] if field in names]
+
+
+class PublicTimelineEntrySerializer(SparsePostSerializerMixin, serializers.ModelSerializer):
+    """
+    ModelSerializer for PublicTimelineEntry, same output as PublicPostSerializer.
+
+    fields:
+    - id
+    - author
+    - content
+    - created_at: Date format '1 January 2021'.
+    """
+
+    id = serializers.IntegerField(source='post_id', read_only=True)
+    author = serializers.CharField(source='author_username', read_only=True)
+    content = serializers.CharField(read_only=True)
+    created_at = serializers.SerializerMethodField(read_only=True)
+
+    field_attributes = {
+        'id': 'post_id',
+        'author': 'author_username',
+        'content': 'content',
+        'created_at': 'created_at',
+    }
+
+    class Meta:
+        model = PublicTimelineEntry
+        fields = ['id', 'author', 'content', 'created_at']
+
+    def get_created_at(self, instance):
+        return format_date(instance.created_at.date())
+
+    def to_representation(self, instance):
+        if self.sparse:
+            return self.to_sparse_representation(instance)
+        return {
+            'id': instance.post_id,
+            'author': instance.author_username,
+            'content': instance.content,
+            'created_at': format_date(instance.created_at.date()),
+        }
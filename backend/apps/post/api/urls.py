@@ -1,11 +1,28 @@
+from django.conf import settings
 from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
-from apps.post.api.views import UserPostsAPIView, PublicPostsAPIView
+from apps.post.api.async_views import (
+    AsyncPublicPostsEventsView,
+    AsyncPublicPostsView,
+    AsyncUserPostDetailView,
+    AsyncUserPostsView,
+)
+from apps.post.api.views import PostSearchAPIView, UserPostsAPIView, PublicPostsAPIView
 
 router = DefaultRouter()
 router.register(r'public', PublicPostsAPIView, basename='public-posts')
 router.register(r'user', UserPostsAPIView, basename='user-posts')
+router.register(r'search', PostSearchAPIView, basename='post-search')
 
 urlpatterns = [path('', include(router.urls))]
+
+if settings.ASYNC_API_VIEWS:
+    # Async implementations take precedence, other actions are served by the router
+    urlpatterns = [
+        path('public/', AsyncPublicPostsView.as_view(), name='public-posts-list'),
+        path('public/events/', AsyncPublicPostsEventsView.as_view(), name='public-posts-events'),
+        path('user/', AsyncUserPostsView.as_view(), name='user-posts-list'),
+        path('user/<int:pk>/', AsyncUserPostDetailView.as_view(), name='user-posts-detail'),
+    ] + urlpatterns
@@ -1,33 +1,139 @@
+from json import dumps as json_dumps
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.mixins import (
     CreateModelMixin,
-    ListModelMixin,
     UpdateModelMixin,
     DestroyModelMixin,
 )
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.viewsets import GenericViewSet
 
-from apps.post.api.serializers import UserPostSerializer, PublicPostSerializer
-from apps.post.models import Post
+from apps.account.authentication import get_stateless_authentication_classes
+from apps.account.throttling import TokenBucketThrottle
+from apps.post.api.mixins import (
+    CachedListModelMixin,
+    ConditionalListModelMixin,
+    ReplicaListModelMixin,
+    SparseFieldsMixin,
+)
+from apps.post.api.pagination import PostKeysetPagination, PostPagination, PostSearchPagination
+from apps.post.api.serializers import (
+    PostBulkDestroySerializer,
+    PostSearchQuerySerializer,
+    UserPostSerializer,
+    PublicPostSerializer,
+    PublicTimelineEntrySerializer,
+)
+from apps.post.cache import public_posts_cache, user_posts_cache
+from apps.post.events import post_events
+from apps.post.models import Post, PublicTimelineEntry
+from apps.post.routers import replica_reads
+from apps.post.stats import post_stats
+from apps.post.timeline import public_timeline
 
 
-class PublicPostsAPIView(ListModelMixin, GenericViewSet):
+class PublicPostsAPIView(
+    SparseFieldsMixin,
+    ReplicaListModelMixin,
+    ConditionalListModelMixin,
+    CachedListModelMixin,
+    GenericViewSet,
+):
     """
     Public posts ViewSet:
     - Lists all posts that are not set as hidden.
 
+    * Keyset pagination by default, page-number pagination with the 'page' query parameter.
+
+    * Conditional requests with ETag and Last-Modified.
+
+    * Rendered pages are cached until a post is created, updated or deleted.
+
+    * Read from a replica, users who have just written read from the primary.
+
+    * Read from the materialized timeline when PUBLIC_TIMELINE_MATERIALIZED is enabled.
+
+    * Fields returned selected with the 'fields' query parameter, compact format with 'compact'.
+
+    * Users are authenticated from the token claims, without querying the database.
+
     * Only authenticated users can perform any action.
     """
 
     serializer_class = PublicPostSerializer
+    authentication_classes = get_stateless_authentication_classes()
     permission_classes = [IsAuthenticated]
+    pagination_class = PostPagination
+    list_cache = public_posts_cache
 
     def get_queryset(self):
-        return Post.objects.exclude(hidden=True).order_by('-created_at')
+        # Only the columns serialized are fetched
+        if public_timeline.enabled:
+            queryset = PublicTimelineEntry.objects.only(
+                'author_username', 'content', 'created_at'
+            ).order_by('-created_at', '-post')
+        else:
+            queryset = (
+                Post.objects.filter(hidden=False)
+                .select_related('author')
+                .only('content', 'created_at', 'author__username')
+                .order_by('-created_at', '-id')
+            )
+        return self.get_sparse_queryset(queryset)
+
+    def get_serializer_class(self):
+        if public_timeline.enabled:
+            return PublicTimelineEntrySerializer
+        return super().get_serializer_class()
+
+
+class PostSearchAPIView(GenericViewSet):
+    """
+    Posts search ViewSet:
+    - Lists the posts that are not set as hidden matching the 'q' query parameter, most relevant
+      first.
+
+    * Keyset pagination, the cursor encodes the score of the last post.
+
+    * Read from a replica, users who have just written read from the primary.
+
+    * Users are authenticated from the token claims, without querying the database.
+
+    * Only authenticated users can perform any action.
+    """
+
+    serializer_class = PublicPostSerializer
+    authentication_classes = get_stateless_authentication_classes()
+    permission_classes = [IsAuthenticated]
+    pagination_class = PostSearchPagination
+
+    def list(self, request, *args, **kwargs):
+        query = PostSearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        with replica_reads.use(replica_reads.get_database(request.user)):
+            page = self.paginate_queryset(query.validated_data['q'])
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class UserPostsAPIView(
-    CreateModelMixin, ListModelMixin, UpdateModelMixin, DestroyModelMixin, GenericViewSet
+    SparseFieldsMixin,
+    CreateModelMixin,
+    ReplicaListModelMixin,
+    ConditionalListModelMixin,
+    CachedListModelMixin,
+    UpdateModelMixin,
+    DestroyModelMixin,
+    GenericViewSet,
 ):
     """
     User's posts ViewSet:
@@ -35,15 +141,151 @@ class UserPostsAPIView(
     - List all user's posts
     - Update a specific user's post.
     - Delete a specific user's post.
+    - Create, update or delete many user's posts in a single request and transaction.
+    - Export all user's posts as NDJSON, resumable from the 'cursor' of the last line.
+
+    * Post counters of the user are updated in the transaction of every write.
+
+    * Writes are throttled per user.
+
+    * Keyset pagination by default, page-number pagination with the 'page' query parameter.
+
+    * Conditional requests on list with ETag and Last-Modified.
+
+    * Rendered pages of the list are cached until a post of the user is written.
+
+    * List read from a replica, the primary is read right after a write of the user.
+
+    * Fields listed and exported selected with the 'fields' query parameter, compact format with
+      'compact'.
 
     * Only authenticated users can perform any action.
     """
 
     serializer_class = UserPostSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PostPagination
+    list_cache = user_posts_cache
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = 'post_write'
+
+    read_only_actions = ['list', 'export']
+    sparse_actions = read_only_actions
 
     def get_queryset(self):
-        return Post.objects.filter(author=self.request.user).order_by('-created_at')
+        queryset = (
+            Post.objects.filter(author=self.request.user)
+            .select_related('author')
+            .order_by('-created_at', '-id')
+        )
+        if self.action in self.read_only_actions:
+            # Only the columns serialized are fetched, saving would skip the deferred 'updated_at'
+            queryset = queryset.only('content', 'hidden', 'created_at', 'author__username')
+            queryset = self.get_sparse_queryset(queryset)
+        return queryset
+
+    def get_throttles(self):
+        if self.action in self.read_only_actions:
+            return []
+        return super().get_throttles()
+
+    def invalidate_caches(self):
+        public_posts_cache.invalidate()
+        user_posts_cache.invalidate(self.request.user.pk)
+        # Replicas may not have the write yet
+        replica_reads.pin_primary(self.request.user)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            public_timeline.sync(post)
+            post_stats.record_created(self.request.user.pk, [post])
+            post_events.publish_created([post])
+        self.invalidate_caches()
+
+    def perform_update(self, serializer):
+        was_hidden = serializer.instance.hidden
+        with transaction.atomic():
+            post = serializer.save()
+            public_timeline.sync(post)
+            post_stats.record_updated(self.request.user.pk, [(was_hidden, post.hidden)])
+            post_events.publish_updated([(was_hidden, post)])
+        self.invalidate_caches()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            post_events.publish_deleted([instance.pk])
+            instance.delete()
+            post_stats.record_deleted(self.request.user.pk, [instance.hidden])
+        self.invalidate_caches()
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            posts = serializer.save(author=self.request.user)
+            public_timeline.sync_many(posts)
+            post_stats.record_created(self.request.user.pk, posts)
+            post_events.publish_created(posts)
+        self.invalidate_caches()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        ids = [item.get('id') for item in request.data if isinstance(item, dict)]
+        posts = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        was_hidden = {pk: post.hidden for pk, post in posts.items()}
+        serializer = self.get_serializer(posts, data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            posts = serializer.save()
+            public_timeline.sync_many(posts)
+            post_stats.record_updated(
+                self.request.user.pk, [(was_hidden[post.pk], post.hidden) for post in posts]
+            )
+            post_events.publish_updated([(was_hidden[post.pk], post) for post in posts])
+        self.invalidate_caches()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        serializer = PostBulkDestroySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        posts = Post.objects.filter(
+            author=self.request.user, id__in=serializer.validated_data['ids']
+        )
+        with transaction.atomic():
+            rows = list(posts.values_list('id', 'hidden'))
+            post_events.publish_deleted([pk for pk, _ in rows])
+            _, deleted = posts.delete()
+            if rows:
+                post_stats.record_deleted(self.request.user.pk, [hidden for _, hidden in rows])
+        self.invalidate_caches()
+        return Response({'deleted': deleted.get(Post._meta.label, 0)}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='export', url_name='export')
+    def export(self, request, *args, **kwargs):
+        paginator = PostKeysetPagination()
+        queryset = paginator.filter_queryset(self.get_queryset(), request)
+        serializer = self.get_serializer()
+
+        def line(post):
+            data = serializer.to_representation(post)
+            data['cursor'] = paginator.encode_cursor(post.created_at, post.pk)
+            return json_dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+        # Rows are fetched in chunks, memory does not depend on the number of posts
+        def lines():
+            for post in queryset.iterator(chunk_size=settings.POST_EXPORT_CHUNK_SIZE):
+                yield line(post)
+
+        async def alines():
+            async for post in queryset.aiterator(chunk_size=settings.POST_EXPORT_CHUNK_SIZE):
+                yield line(post)
+
+        # The ASGI handler would load a sync stream in a list to iterate it from the event loop
+        content = alines() if isinstance(request._request, ASGIRequest) else lines()
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+        response['Content-Disposition'] = 'attachment; filename="posts.ndjson"'
+        return response
@@ -0,0 +1,152 @@
+from hashlib import sha256
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+from apps.compression.encodings import response_compression
+from apps.post.routers import replica_reads
+
+
+class PostsCache:
+    """
+    Cache of the rendered posts pages.
+
+    Pages are stored as (response bytes, content coding) pairs under a key made of the scope, the
+    data version of the scope, the database read, the media type, the content coding negotiated
+    and the request URI. Any write on the posts of a
+    scope bumps its version, so every cached page of the scope becomes unreachable at once and
+    readers never get a post that was deleted or hidden.
+
+    * Versions are the time of the last write of the scope in nanoseconds, see get_modified().
+      They expire with the pages, so writes that skip invalidate(), like the cascade deletion
+      of a user, are seen after POSTS_CACHE_TIMEOUT at most.
+
+    * Pages of 'user_scoped' caches are stored per user, the scope of the others is 'all'.
+
+    * Pages read from a replica may miss the last writes, they are kept for the replication lag.
+
+    * Pages are compressed once, with the 'cache_level' of the coding, and served as they are.
+
+    attributes:
+    - hits: Number of pages served from the cache.
+    - misses: Number of pages that had to be built from the database.
+    """
+
+    def __init__(self, prefix, user_scoped=False):
+        self.prefix = prefix
+        self.user_scoped = user_scoped
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.POSTS_CACHE_ALIAS]
+
+    @property
+    def shared(self):
+        """
+        Whether the versions are shared by the processes, LocMemCache has one per process.
+        """
+
+        return not isinstance(self.cache, LocMemCache)
+
+    def get_scope(self, request):
+        return request.user.pk if self.user_scoped else 'all'
+
+    def get_version_key(self, scope):
+        return f'{self.prefix}:{scope}:version'
+
+    def get_version(self, scope):
+        # A time based initial value avoids reusing old versions if the key gets evicted
+        self.cache.add(self.get_version_key(scope), time_ns(), timeout=self.get_version_timeout())
+        return self.cache.get(self.get_version_key(scope))
+
+    async def aget_version(self, scope):
+        version_key = self.get_version_key(scope)
+        await self.cache.aadd(version_key, time_ns(), timeout=self.get_version_timeout())
+        return await self.cache.aget(version_key)
+
+    def get_key(self, request, media_type, encoding=None, version=None):
+        scope = self.get_scope(request)
+        if version is None:
+            version = self.get_version(scope)
+        database = replica_reads.current() or 'default'
+        name = encoding.name if encoding is not None else 'identity'
+        uri = sha256(f'{media_type}:{name}:{request.build_absolute_uri()}'.encode()).hexdigest()
+        return f'{self.prefix}:{scope}:{version}:{database}:{uri}'
+
+    def encode(self, content, encoding):
+        """
+        Return the page stored for the rendered 'content', compressed with 'encoding' when it is
+        large enough.
+        """
+
+        if encoding is None:
+            return content, None
+        compressed = response_compression.compress(content, encoding, encoding.cache_level)
+        if compressed is None:
+            return content, None
+        return compressed, encoding.name
+
+    def get_response(self, page, content_type):
+        content, content_encoding = page
+        response = HttpResponse(content, content_type=content_type)
+        if content_encoding is not None:
+            response['Content-Encoding'] = content_encoding
+        return response
+
+    def get(self, key):
+        return self.count(self.cache.get(key))
+
+    async def aget(self, key):
+        return self.count(await self.cache.aget(key))
+
+    def count(self, content):
+        if content is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return content
+
+    def get_version_timeout(self):
+        # A timeout of 0 would expire the version at once, the pages are not cached anyway
+        return settings.POSTS_CACHE_TIMEOUT or None
+
+    def get_timeout(self):
+        if replica_reads.current() is None:
+            return settings.POSTS_CACHE_TIMEOUT
+        return min(settings.POSTS_CACHE_TIMEOUT, settings.DATABASE_REPLICA_LAG_SECONDS)
+
+    def set(self, key, content, timeout=None):
+        timeout = self.get_timeout() if timeout is None else timeout
+        self.cache.set(key, content, timeout=timeout)
+
+    async def aset(self, key, content):
+        await self.cache.aset(key, content, timeout=self.get_timeout())
+
+    def get_modified(self, version):
+        """
+        Return the time of the last write of a version, in seconds since the epoch.
+        """
+
+        return version / 1e9
+
+    def invalidate(self, scope='all'):
+        version_key = self.get_version_key(scope)
+        version = self.cache.get(version_key)
+        try:
+            # Incremented atomically up to the time of the write, in nanoseconds
+            self.cache.incr(version_key, max(time_ns() - (version or 0), 1))
+        except ValueError:
+            self.cache.add(version_key, time_ns(), timeout=self.get_version_timeout())
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+
+public_posts_cache = PostsCache('post:public')
+user_posts_cache = PostsCache('post:user', user_scoped=True)
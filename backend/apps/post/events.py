@@ -0,0 +1,157 @@
+import asyncio
+from collections import deque, namedtuple
+from functools import partial
+from itertools import count
+from threading import Lock
+from time import time_ns
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.post.api.serializers import PublicPostSerializer
+
+PostEvent = namedtuple('PostEvent', ['id', 'type', 'data'])
+
+
+class InMemoryPostEventsBackend:
+    """
+    Process local pub/sub of the post events.
+
+    The last POST_EVENTS_BUFFER_SIZE events are kept to be replayed to the clients that reconnect.
+    Event ids are made of the backend epoch and a sequence number, ids of another process or of a
+    previous run are not resumable.
+
+    * Subscribers receive only the events published in the same process.
+    """
+
+    def __init__(self):
+        self.epoch = time_ns()
+        self.sequence = count(1)
+        self.last_number = 0
+        self.buffer = deque(maxlen=settings.POST_EVENTS_BUFFER_SIZE)
+        self.subscribers = set()
+        self.lock = Lock()
+
+    def publish(self, type, data):
+        with self.lock:
+            self.last_number = next(self.sequence)
+            event = PostEvent(f'{self.epoch}-{self.last_number}', type, data)
+            self.buffer.append((self.last_number, event))
+            subscribers = list(self.subscribers)
+        # Events are published by sync views, subscribers run in event loops
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The loop of the subscriber has been closed
+                with self.lock:
+                    self.subscribers.discard((loop, queue))
+        return event
+
+    def get_missed(self, last_event_id):
+        """
+        Return the events after 'last_event_id', None if some of them are no longer available.
+        """
+
+        if last_event_id is None:
+            return []
+        try:
+            epoch, number = (int(part) for part in last_event_id.split('-'))
+        except ValueError:
+            return None
+        if epoch != self.epoch or number > self.last_number:
+            return None
+        missed = [event for event_number, event in self.buffer if event_number > number]
+        if len(missed) < self.last_number - number:
+            return None
+        return missed
+
+    async def subscribe(self, last_event_id=None, timeout=None):
+        """
+        Yield the events missed since 'last_event_id', then the new ones as they are published.
+
+        A 'reset' event is yielded first when the missed events cannot be replayed, None is
+        yielded every 'timeout' seconds without events.
+        """
+
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self.lock:
+            self.subscribers.add(subscriber)
+            missed = self.get_missed(last_event_id)
+            last_id = f'{self.epoch}-{self.last_number}'
+        try:
+            if missed is None:
+                yield PostEvent(last_id, 'reset', {})
+            for event in missed or []:
+                yield event
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout)
+                except TimeoutError:
+                    yield None
+        finally:
+            with self.lock:
+                self.subscribers.discard(subscriber)
+
+
+class PostEvents:
+    """
+    Changes of the public posts pushed to the live timeline:
+    - 'created': A public post has been created or made public, data is the public post.
+    - 'updated': A public post has been edited, data is the public post.
+    - 'removed': A post has been hidden or deleted, data is the post id.
+    - 'reset': Missed events are not available, clients must reload the timeline.
+
+    * Events are published once the transaction of the write is committed.
+
+    * The backend is loaded from the POST_EVENTS_BACKEND setting.
+    """
+
+    def __init__(self):
+        self.backend = None
+
+    def load_backend(self):
+        self.backend = import_string(settings.POST_EVENTS_BACKEND)()
+        return self.backend
+
+    def get_backend(self):
+        return self.backend or self.load_backend()
+
+    def publish(self, events):
+        backend = self.get_backend()
+        for type, data in events:
+            transaction.on_commit(partial(backend.publish, type, data))
+
+    def publish_created(self, posts):
+        self.publish(
+            ('created', PublicPostSerializer(post).data) for post in posts if not post.hidden
+        )
+
+    def publish_updated(self, updates):
+        """
+        Publish the changes of the (was_hidden, post) 'updates', posts made public are new to the
+        live clients and sent as 'created'.
+        """
+
+        self.publish(
+            self.get_update_event(was_hidden, post)
+            for was_hidden, post in updates
+            if not (was_hidden and post.hidden)
+        )
+
+    def get_update_event(self, was_hidden, post):
+        if post.hidden:
+            return 'removed', {'id': post.pk}
+        return 'created' if was_hidden else 'updated', PublicPostSerializer(post).data
+
+    def publish_deleted(self, ids):
+        self.publish(('removed', {'id': pk}) for pk in ids)
+
+    def subscribe(self, last_event_id=None):
+        return self.get_backend().subscribe(
+            last_event_id, timeout=settings.POST_EVENTS_HEARTBEAT_SECONDS
+        )
+
+
+post_events = PostEvents()
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+from statistics import quantiles
+from threading import local
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils.timezone import now
+
+from apps.account.tokens import SessionRefreshToken
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the throughput and latency of API endpoints served in-process by the WSGI '
+        'handler, with a pool of threads, or by the ASGI handler, with concurrent tasks. The '
+        'requests are shared among the users created by seed_dataset, results can be written as '
+        'JSON and compared with a previous run.'
+    )
+
+    endpoints = {
+        'public': 'public-posts-list',
+        'user': 'user-posts-list',
+        'token': 'token_obtain_pair',
+        'refresh': 'token_refresh',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--handler', choices=('wsgi', 'asgi'), default='wsgi')
+        parser.add_argument(
+            '--endpoints',
+            nargs='+',
+            choices=list(self.endpoints),
+            default=list(self.endpoints),
+            help='Endpoints measured one after the other.',
+        )
+        parser.add_argument(
+            '--path', default=None, help='Path requested with GET instead of the endpoints.'
+        )
+        parser.add_argument(
+            '--prefix', default='seed', help='Prefix of the usernames performing the requests.'
+        )
+        parser.add_argument(
+            '--users', type=int, default=100, help='Number of users performing the requests.'
+        )
+        parser.add_argument(
+            '--username', default=None, help='Single user performing the requests instead.'
+        )
+        parser.add_argument(
+            '--password', default='Change_me_123!', help='Password of the users, for logins.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=2000, help='Number of requests per endpoint.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=200, help='Number of requests in flight.'
+        )
+        parser.add_argument('--output', default=None, help='JSON file the results are written to.')
+        parser.add_argument(
+            '--baseline', default=None, help='JSON file of a previous run to compare with.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('At least 2 requests are needed to compute the percentiles')
+        users = self.get_users(options)
+        if options['path']:
+            requests = {'path': self.get_requests(options['path'], users, options)}
+        else:
+            requests = {
+                endpoint: self.get_requests(endpoint, users, options)
+                for endpoint in options['endpoints']
+            }
+
+        benchmark = self.benchmark_wsgi if options['handler'] == 'wsgi' else self.benchmark_asgi
+        self.stdout.write(
+            f'{options["handler"].upper()} (async views: {settings.ASYNC_API_VIEWS}), '
+            f'{len(users)} users, concurrency: {options["concurrency"]}'
+        )
+        report = {
+            'handler': options['handler'],
+            'async_views': settings.ASYNC_API_VIEWS,
+            'concurrency': options['concurrency'],
+            'users': len(users),
+            'created_at': now().isoformat(),
+            'endpoints': {},
+        }
+        for name, endpoint_requests in requests.items():
+            start = perf_counter()
+            results = benchmark(endpoint_requests, options['concurrency'])
+            elapsed = perf_counter() - start
+            report['endpoints'][name] = self.summarize(endpoint_requests[0][1], results, elapsed)
+            self.write_summary(name, report['endpoints'][name])
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                self.compare(json.load(file), report)
+
+    def get_users(self, options):
+        if options['username']:
+            users = UserModel.objects.filter(username=options['username'])
+        else:
+            users = UserModel.objects.filter(username__startswith=options['prefix']).order_by('pk')
+        users = list(users[: options['users']])
+        if not users:
+            raise CommandError('No user performing the requests, run seed_dataset first')
+        return users
+
+    def get_requests(self, endpoint, users, options):
+        """
+        Return the (method, path, data, headers) of the requests of 'endpoint', or of a path.
+
+        * Tokens are issued before the measure, refresh tokens are rotated so each is used once.
+        """
+
+        count = options['requests']
+        if endpoint == 'token':
+            path = reverse(self.endpoints[endpoint])
+            return [
+                ('post', path, {'username': user.username, 'password': options['password']}, {})
+                for user, _ in zip(cycle(users), range(count))
+            ]
+        if endpoint == 'refresh':
+            path = reverse(self.endpoints[endpoint])
+            return [
+                ('post', path, {'refresh': str(SessionRefreshToken.for_user(user))}, {})
+                for user, _ in zip(cycle(users), range(count))
+            ]
+
+        path = reverse(self.endpoints[endpoint]) if endpoint in self.endpoints else endpoint
+        headers = [
+            {'Authorization': f'Bearer {SessionRefreshToken.for_user(user).access_token}'}
+            for user in users
+        ]
+        return [('get', path, None, headers) for headers, _ in zip(cycle(headers), range(count))]
+
+    def send(self, client, request):
+        method, path, data, headers = request
+        if method == 'get':
+            return client.get(path, headers=headers)
+        return client.post(path, data=data, content_type='application/json', headers=headers)
+
+    def benchmark_wsgi(self, requests, concurrency):
+        clients = local()
+
+        def timed_request(request):
+            if not hasattr(clients, 'client'):
+                clients.client = Client()
+            start = perf_counter()
+            response = self.send(clients.client, request)
+            return response.status_code, perf_counter() - start
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                return list(executor.map(timed_request, requests))
+        finally:
+            connections.close_all()
+
+    def benchmark_asgi(self, requests, concurrency):
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def timed_request(request):
+                async with semaphore:
+                    start = perf_counter()
+                    response = await self.send(client, request)
+                    return response.status_code, perf_counter() - start
+
+            return await asyncio.gather(*(timed_request(request) for request in requests))
+
+        return asyncio.run(run())
+
+    def summarize(self, path, results, elapsed):
+        durations = [duration * 1000 for _, duration in results]
+        p50, p95, p99 = (quantiles(durations, n=100)[i] for i in (49, 94, 98))
+        statuses = Counter(status_code for status_code, _ in results)
+        return {
+            'path': path,
+            'requests': len(results),
+            'failures': len(results) - statuses[200],
+            'statuses': {str(status_code): count for status_code, count in statuses.items()},
+            'throughput': round(len(results) / elapsed, 1),
+            'p50_ms': round(p50, 2),
+            'p95_ms': round(p95, 2),
+            'p99_ms': round(p99, 2),
+        }
+
+    def write_summary(self, name, summary):
+        self.stdout.write(
+            f'{name} {summary["path"]}: {summary["requests"]} requests, '
+            f'{summary["failures"]} failures {summary["statuses"]}\n'
+            f'  throughput: {summary["throughput"]} req/s, latency p50: {summary["p50_ms"]} ms, '
+            f'p95: {summary["p95_ms"]} ms, p99: {summary["p99_ms"]} ms'
+        )
+
+    def compare(self, baseline, report):
+        self.stdout.write(f'Compared with the run of {baseline["created_at"]}')
+        for name, summary in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            changes = ', '.join(
+                f'{key} {(summary[key] - before[key]) / before[key] * 100:+.1f}%'
+                for key in ('throughput', 'p50_ms', 'p95_ms', 'p99_ms')
+                if before[key]
+            )
+            self.stdout.write(f'{name}: {changes}')
@@ -0,0 +1,72 @@
+from datetime import timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from rest_framework.renderers import JSONRenderer
+
+from apps.account.api import renderers
+from apps.account.api.renderers import FastJSONRenderer
+from apps.post.api.serializers import PublicPostSerializer
+from apps.post.models import Post
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the time spent per posts page by JSONRenderer, by FastJSONRenderer and by a hit '
+        'of the rendered pages cache, on posts built in memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Posts per page.')
+        parser.add_argument(
+            '--repeat', type=int, default=1000, help='Pages per measure, the average is reported.'
+        )
+        parser.add_argument('--cache', default='default', help='Alias of the cache used.')
+
+    def handle(self, *args, **options):
+        author = UserModel(pk=1, username='author')
+        created_at = now()
+        posts = [
+            Post(
+                pk=i,
+                author=author,
+                content=f'Post number {i} with some text',
+                hidden=False,
+                created_at=created_at - timedelta(hours=i),
+            )
+            for i in range(options['page_size'])
+        ]
+        data = {'next': None, 'results': PublicPostSerializer(posts, many=True).data}
+        content = JSONRenderer().render(data)
+        cache = caches[options['cache']]
+        cache.set('benchmark:renderers:page', content)
+
+        repeat = options['repeat']
+        serialize = self.measure(lambda: PublicPostSerializer(posts, many=True).data, repeat)
+        stdlib = self.measure(lambda: JSONRenderer().render(data), repeat)
+        fast = self.measure(lambda: FastJSONRenderer().render(data), repeat)
+        hit = self.measure(lambda: cache.get('benchmark:renderers:page'), repeat)
+        cache.delete('benchmark:renderers:page')
+
+        encoder = 'orjson' if renderers.orjson else 'json (orjson is not installed)'
+        self.stdout.write(
+            f'Page of {options["page_size"]} posts, {len(content)} bytes\n'
+            f'serialize: {serialize:.1f} us\n'
+            f'encode JSONRenderer: {stdlib:.1f} us\n'
+            f'encode FastJSONRenderer with {encoder}: {fast:.1f} us '
+            f'({stdlib - fast:.1f} us saved)\n'
+            f'cache hit: {hit:.1f} us ({serialize + stdlib - hit:.1f} us saved on a miss '
+            'with JSONRenderer)'
+        )
+
+    def measure(self, function, repeat):
+        start = perf_counter()
+        for _ in range(repeat):
+            function()
+        return (perf_counter() - start) / repeat * 1_000_000
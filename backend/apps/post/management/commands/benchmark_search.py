@@ -0,0 +1,85 @@
+from random import Random
+from statistics import median, quantiles
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.post.models import Post
+from apps.post.search import post_search
+
+UserModel = get_user_model()
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'do', 'gu']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the latency of the posts search against a LIKE scan, on posts of a benchmark '
+        'user created with words drawn from a Zipf distribution until it has --posts posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1_000_000, help='Posts of the benchmark user.'
+        )
+        parser.add_argument('--username', default='benchmark', help='Owner of the posts created.')
+        parser.add_argument('--queries', type=int, default=50, help='Runs of each query.')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Posts per insert.')
+
+    def handle(self, *args, **options):
+        random = Random(0)
+        words = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+        random.shuffle(words)
+        weights = [1 / rank for rank in range(1, len(words) + 1)]
+        self.seed(random, words, weights, options)
+
+        queries = {
+            'frequent word': words[0],
+            'rare word': words[-1],
+            'two words': f'{words[1]} {words[20]}',
+            'medium word': words[100],
+        }
+        for name, text in queries.items():
+            search = self.measure(lambda: post_search.search(text), options['queries'])
+            scan = self.measure(lambda: self.scan(text), max(options['queries'] // 10, 1))
+            self.stdout.write(
+                f'{name} {text!r}: search p50 {search[0]:.2f} ms, p95 {search[1]:.2f} ms | '
+                f'LIKE scan p50 {scan[0]:.2f} ms, p95 {scan[1]:.2f} ms'
+            )
+
+    def seed(self, random, words, weights, options):
+        author, _ = UserModel.objects.get_or_create(username=options['username'])
+        missing = options['posts'] - Post.objects.filter(author=author).count()
+        while missing > 0:
+            size = min(missing, options['batch_size'])
+            posts = [
+                Post(
+                    author=author,
+                    content=' '.join(random.choices(words, weights, k=random.randint(5, 30))),
+                    hidden=random.random() < 0.1,
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+            missing -= size
+            self.stdout.write(f'{missing} posts left to create')
+
+    def scan(self, text):
+        # What a search without an index would do, on the first word only
+        return list(
+            Post.objects.filter(hidden=False, content__icontains=text.split()[0])
+            .select_related('author')
+            .order_by('-created_at', '-id')[:100]
+        )
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function()
+            timings.append((perf_counter() - start) * 1000)
+        p95 = quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        return median(timings), p95
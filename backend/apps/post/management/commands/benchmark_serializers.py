@@ -0,0 +1,85 @@
+from datetime import timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+
+from apps.post.api.serializers import PublicPostSerializer, UserPostSerializer
+from apps.post.models import Post
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the rows per second serialized by the post serializers, with the generic '
+        'ModelSerializer path, with the fast path and in the compact format, on posts built in '
+        'memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[100, 1000, 10000], help='Numbers of rows.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5, help='Runs per measure, the best one is reported.'
+        )
+
+    def handle(self, *args, **options):
+        author = UserModel(pk=1, username='author')
+        created_at = now()
+        for rows in options['rows']:
+            # Posts spread over the last 30 days, as a timeline would be
+            posts = [
+                Post(
+                    pk=i,
+                    author=author,
+                    content=f'Post number {i} ' * 20,
+                    hidden=i % 2 == 0,
+                    created_at=created_at - timedelta(hours=i % 720),
+                )
+                for i in range(rows)
+            ]
+            for serializer_class in (PublicPostSerializer, UserPostSerializer):
+                serializer = serializer_class()
+                generic = self.measure(
+                    lambda: [ModelSerializer.to_representation(serializer, post) for post in posts],
+                    options['repeat'],
+                )
+                fast = self.measure(
+                    lambda: serializer_class(posts, many=True).data, options['repeat']
+                )
+                # Rendered as well, the compact format is meant to cut the bytes to encode
+                renderer = JSONRenderer()
+                compact_context = {'compact': True}
+                rendered = self.measure(
+                    lambda: renderer.render(serializer_class(posts, many=True).data),
+                    options['repeat'],
+                )
+                compact = self.measure(
+                    lambda: renderer.render(
+                        serializer_class(posts, many=True, context=compact_context).data
+                    ),
+                    options['repeat'],
+                )
+                size = len(renderer.render(serializer_class(posts, many=True).data))
+                compact_data = serializer_class(posts, many=True, context=compact_context).data
+                compact_size = len(renderer.render(compact_data))
+                self.stdout.write(
+                    f'{serializer_class.__name__} {rows} rows: '
+                    f'generic {rows / generic:,.0f} rows/s, fast {rows / fast:,.0f} rows/s '
+                    f'({generic / fast:.1f}x) | rendered {rows / rendered:,.0f} rows/s, '
+                    f'compact {rows / compact:,.0f} rows/s, {compact_size / size:.0%} of the bytes'
+                )
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function()
+            timings.append(perf_counter() - start)
+        return min(timings)
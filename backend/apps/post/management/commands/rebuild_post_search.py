@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.post.search import post_search
+
+
+class Command(BaseCommand):
+    help = (
+        'Drop and create the posts search index, then index every post. Run it on SQLite after '
+        'a migration that rebuilds the posts table, which drops the index triggers.'
+    )
+
+    def handle(self, *args, **options):
+        post_search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Posts search index rebuilt'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from apps.post.timeline import public_timeline
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized public posts timeline from the posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, help='Number of posts inserted per query.'
+        )
+
+    def handle(self, *args, **options):
+        count = public_timeline.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Public timeline rebuilt with {count} posts'))
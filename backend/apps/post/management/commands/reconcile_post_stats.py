@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.post.stats import post_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the post counters of every user from the posts, fixing the counters that '
+        'drifted or are missing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, help='Number of users reconciled per query.'
+        )
+
+    def handle(self, *args, **options):
+        fixed = post_stats.reconcile_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Post counters fixed for {fixed} users'))
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from apps.post.cache import public_posts_cache, user_posts_cache
+from apps.post.models import Post
+from apps.post.stats import post_stats
+from apps.post.timeline import public_timeline
+
+UserModel = get_user_model()
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'ti', 'vo', 'ze', 'pa', 'do', 'gu']
+# Share of the posts edited after their creation
+EDITED_RATIO = 0.1
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed the dataset of the API benchmarks: --users users named <prefix><number>, created '
+        'by provision_users, and --posts posts shared among them by bulk inserts. Few users '
+        'write most of the posts, words are drawn from a Zipf distribution. Posts are created '
+        'over the last --days days, in order of primary key, and some are edited later. Only '
+        'the missing users and posts are created, the same --seed gives the same dataset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000, help='Users of the dataset.')
+        parser.add_argument('--posts', type=int, default=5_000_000, help='Posts of the dataset.')
+        parser.add_argument(
+            '--hidden-ratio', type=float, default=0.1, help='Share of the posts hidden.'
+        )
+        parser.add_argument(
+            '--days', type=float, default=365, help='Period over which the posts are created.'
+        )
+        parser.add_argument('--prefix', default='seed', help='Prefix of the usernames.')
+        parser.add_argument('--password', default='Change_me_123!', help='Password of the users.')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='Rows per insert.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+
+    def handle(self, *args, **options):
+        call_command(
+            'provision_users',
+            count=options['users'],
+            prefix=options['prefix'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            stdout=self.stdout,
+        )
+        users = (
+            UserModel.objects.filter(username__startswith=options['prefix'])
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        author_ids = list(users[: options['users']])
+
+        random = self.random = Random(options['seed'])
+        words = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+        random.shuffle(words)
+        word_weights = [1 / rank for rank in range(1, len(words) + 1)]
+        author_weights = [1 / rank for rank in range(1, len(author_ids) + 1)]
+
+        missing = options['posts'] - Post.objects.filter(author__in=users).count()
+        created = max(missing, 0)
+        end = now()
+        period = timedelta(days=options['days'])
+        while missing > 0:
+            size = min(missing, options['batch_size'])
+            posts = [
+                Post(
+                    author_id=author_id,
+                    content=' '.join(random.choices(words, word_weights, k=random.randint(5, 30))),
+                    hidden=random.random() < options['hidden_ratio'],
+                )
+                for author_id in random.choices(author_ids, author_weights, k=size)
+            ]
+            with transaction.atomic():
+                Post.objects.bulk_create(posts)
+                # bulk_create() sets the current time, the posts are spread over the period
+                self.set_dates(posts, options['posts'] - missing, options['posts'], end, period)
+            missing -= size
+            self.stdout.write(f'{missing} posts left to create')
+
+        if created:
+            # Derived data of the posts are rebuilt once, rather than updated by every insert
+            for first in range(0, len(author_ids), 1000):
+                post_stats.reconcile(author_ids[first : first + 1000])
+            if public_timeline.enabled:
+                public_timeline.rebuild(batch_size=options['batch_size'])
+            # Effective with a shared cache only, the servers have their own LocMemCache
+            public_posts_cache.invalidate()
+            for author_id in author_ids:
+                user_posts_cache.invalidate(author_id)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Dataset of {len(author_ids)} users and '
+                f'{Post.objects.filter(author__in=users).count()} posts'
+            )
+        )
+
+    def set_dates(self, posts, first, total, end, period):
+        """
+        Set the creation date of the posts 'first' to 'first' + len(posts) of the 'total', in
+        order over the 'period' ending at 'end', and a later update date to the edited ones.
+        """
+
+        adapt = connection.ops.adapt_datetimefield_value
+        rows = []
+        for number, post in enumerate(posts, start=first):
+            created_at = end - period * (1 - (number + self.random.random()) / total)
+            updated_at = created_at
+            if self.random.random() < EDITED_RATIO:
+                updated_at += (end - created_at) * self.random.random()
+            rows.append((adapt(created_at), adapt(updated_at), post.pk))
+        # A single statement run for every row, bulk_update() builds a CASE of every row
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {connection.ops.quote_name(Post._meta.db_table)} '
+                f'SET created_at = %s, updated_at = %s WHERE id = %s',
+                rows,
+            )
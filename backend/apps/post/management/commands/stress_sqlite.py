@@ -0,0 +1,148 @@
+from collections import Counter
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+
+# SQLite defaults, with the busy timeout used by Django and deferred transactions
+DEFAULT_OPTIONS = {
+    'pragmas': {'busy_timeout': 5000, 'journal_mode': 'delete', 'synchronous': 'full'},
+}
+
+# Database alias of the temporary database, connected with the SQLite backend of the project
+ALIAS = 'stress'
+
+
+class Command(BaseCommand):
+    help = (
+        'Stress a temporary SQLite database shaped like the posts table with concurrent writers '
+        'and readers, with the SQLite defaults and with the PRAGMAs and the transaction mode of '
+        'the settings.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Number of writer threads.')
+        parser.add_argument('--readers', type=int, default=8, help='Number of reader threads.')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each run.')
+        parser.add_argument('--rows', type=int, default=10000, help='Posts created before a run.')
+
+    def handle(self, *args, **options):
+        default_options = settings.DATABASES['default'].get('OPTIONS', {})
+        settings_options = {
+            'pragmas': default_options.get('pragmas', {}),
+            'transaction_mode': default_options.get('transaction_mode'),
+        }
+        runs = (('SQLite defaults', DEFAULT_OPTIONS), ('settings', settings_options))
+        for name, run_options in runs:
+            with TemporaryDirectory() as directory:
+                self.configure(f'{directory}/stress.sqlite3', run_options)
+                try:
+                    self.create_database(options['rows'])
+                    counts, elapsed = self.run(options)
+                finally:
+                    self.unconfigure()
+            self.stdout.write(
+                f'{name} {run_options}\n'
+                f'writes: {counts["writes"] / elapsed:.1f}/s, '
+                f'reads: {counts["reads"] / elapsed:.1f}/s, errors: {counts["errors"]}'
+            )
+
+    def configure(self, path, options):
+        # Connections of every thread go through the backend and transaction.atomic() as the
+        # views do, PRAGMAs are applied in order, 'busy_timeout' is expected first
+        connections.settings[ALIAS] = {
+            **connections.settings['default'],
+            'ENGINE': 'config.backends.sqlite3',
+            'NAME': path,
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': options,
+        }
+
+    def unconfigure(self):
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.settings[ALIAS]
+
+    def create_database(self, rows):
+        with transaction.atomic(using=ALIAS), connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE post (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    author_id INTEGER NOT NULL,
+                    content TEXT NOT NULL,
+                    hidden BOOL NOT NULL,
+                    created_at DATETIME NOT NULL,
+                    updated_at DATETIME NOT NULL
+                )
+                """
+            )
+            cursor.execute('CREATE INDEX post_author_idx ON post (author_id, created_at DESC)')
+            cursor.execute(
+                'CREATE INDEX post_public_created_idx ON post (created_at DESC, id DESC) '
+                'WHERE NOT hidden'
+            )
+            cursor.executemany(
+                'INSERT INTO post (author_id, content, hidden, created_at, updated_at) '
+                "VALUES (%s, %s, %s, datetime('now'), datetime('now'))",
+                [(i % 100, f'post {i}', i % 3 == 0) for i in range(rows)],
+            )
+
+    def run(self, options):
+        stop = Event()
+        # Counters of every thread, summed at the end
+        results = []
+
+        def writer(number):
+            counts = Counter()
+            results.append(counts)
+            while not stop.is_set():
+                try:
+                    # A read then a write per transaction, as the posts update endpoints
+                    with transaction.atomic(using=ALIAS), connections[ALIAS].cursor() as cursor:
+                        cursor.execute(
+                            'SELECT id FROM post WHERE author_id = %s '
+                            'ORDER BY created_at DESC LIMIT 1',
+                            [number],
+                        )
+                        cursor.fetchone()
+                        cursor.execute(
+                            'INSERT INTO post (author_id, content, hidden, created_at, updated_at) '
+                            "VALUES (%s, 'new post', 0, datetime('now'), datetime('now'))",
+                            [number],
+                        )
+                    counts['writes'] += 1
+                except OperationalError:
+                    counts['errors'] += 1
+            connections[ALIAS].close()
+
+        def reader():
+            counts = Counter()
+            results.append(counts)
+            while not stop.is_set():
+                try:
+                    # A page of the public timeline
+                    with connections[ALIAS].cursor() as cursor:
+                        cursor.execute(
+                            'SELECT id, author_id, content, created_at FROM post WHERE NOT hidden '
+                            'ORDER BY created_at DESC, id DESC LIMIT 100'
+                        )
+                        cursor.fetchall()
+                    counts['reads'] += 1
+                except OperationalError:
+                    counts['errors'] += 1
+            connections[ALIAS].close()
+
+        threads = [Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        threads += [Thread(target=reader) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        start = perf_counter()
+        stop.wait(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return sum(results, Counter()), perf_counter() - start
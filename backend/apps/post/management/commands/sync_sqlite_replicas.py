@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the SQLite files of DATABASE_REPLICAS, standing in '
+        'for the replication of a production database when testing locally.'
+    )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The primary database is not a SQLite database')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas in DATABASE_REPLICAS')
+
+        primary = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                name = settings.DATABASES[alias]['NAME']
+                replica = sqlite3.connect(name)
+                try:
+                    primary.backup(replica)
+                finally:
+                    replica.close()
+                self.stdout.write(self.style.SUCCESS(f'Replica {alias} synchronized to {name}'))
+        finally:
+            primary.close()
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-18 07:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0004_post_timeline_freshness_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicTimelineEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='timeline_entry', serialize=False, to='post.post')),
+                ('author_username', models.CharField(max_length=150)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Public timeline entry',
+                'verbose_name_plural': 'Public timeline entries',
+                'ordering': ['-created_at', '-post'],
+                'indexes': [models.Index(fields=['-created_at', '-post'], name='timeline_created_idx'), models.Index(fields=['updated_at'], name='timeline_updated_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# Statements of PostSearch at the time of this migration, copied so later changes of
+# apps.post.search do not change what it does
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE post_search USING fts5(
+        content, content='post_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER post_search_insert AFTER INSERT ON post_post BEGIN
+        INSERT INTO post_search (rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_delete AFTER DELETE ON post_post BEGIN
+        INSERT INTO post_search (post_search, rowid, content)
+            VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER post_search_update AFTER UPDATE OF content ON post_post BEGIN
+        INSERT INTO post_search (post_search, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        INSERT INTO post_search (rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO post_search (post_search) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS post_search_insert',
+    'DROP TRIGGER IF EXISTS post_search_delete',
+    'DROP TRIGGER IF EXISTS post_search_update',
+    'DROP TABLE IF EXISTS post_search',
+]
+POSTGRESQL_INSTALL = [
+    """
+    ALTER TABLE post_post ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED
+    """,
+    'CREATE INDEX post_search_idx ON post_post USING GIN (search_vector) WHERE NOT hidden',
+]
+POSTGRESQL_UNINSTALL = [
+    'DROP INDEX IF EXISTS post_search_idx',
+    'ALTER TABLE post_post DROP COLUMN IF EXISTS search_vector',
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_INSTALL, SQLITE_UNINSTALL),
+    'postgresql': (POSTGRESQL_INSTALL, POSTGRESQL_UNINSTALL),
+}
+
+
+def install_search_index(apps, schema_editor):
+    install, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in install:
+        schema_editor.execute(statement)
+
+
+def uninstall_search_index(apps, schema_editor):
+    _, uninstall = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in uninstall:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0005_publictimelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
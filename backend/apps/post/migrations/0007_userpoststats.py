@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('post', '0006_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPostStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('public', models.IntegerField(default=0)),
+                ('hidden', models.IntegerField(default=0)),
+                ('last_posted_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name': 'User post stats',
+                'verbose_name_plural': 'User post stats',
+            },
+        ),
+    ]
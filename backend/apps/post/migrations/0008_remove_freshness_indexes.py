@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('post', '0007_userpoststats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_author_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_public_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='publictimelineentry',
+            name='timeline_updated_idx',
+        ),
+    ]
@@ -14,8 +14,74 @@ class Post(models.Model):
     class Meta:
         verbose_name = 'Post'
         verbose_name_plural = 'Post'
-        ordering = ['-updated_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            # User's posts timeline
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_idx'),
+            # Public posts timeline
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(hidden=False),
+                name='post_public_created_idx',
+            ),
+        ]
 
     def __str__(self):
         content = self.content[:20] + '...' if len(self.content) > 20 else ''
         return f"{content}"
+
+
+class PublicTimelineEntry(models.Model):
+    """
+    Materialized public timeline.
+
+    Copy of the columns listed by the public posts timeline for every post that is not hidden,
+    so the timeline is read from a compact pre-sorted table without filtering or joins.
+    """
+
+    post = models.OneToOneField(
+        Post, primary_key=True, on_delete=models.CASCADE, related_name='timeline_entry'
+    )
+    author_username = models.CharField(max_length=150)
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Public timeline entry'
+        verbose_name_plural = 'Public timeline entries'
+        ordering = ['-created_at', '-post']
+        indexes = [
+            models.Index(fields=['-created_at', '-post'], name='timeline_created_idx'),
+        ]
+
+    @classmethod
+    def from_post(cls, post):
+        return cls(
+            post=post,
+            author_username=post.author.username,
+            content=post.content,
+            created_at=post.created_at,
+            updated_at=post.updated_at,
+        )
+
+
+class UserPostStats(models.Model):
+    """
+    Counter cache of the posts of a user, kept up to date by apps.post.stats.PostStats.
+
+    * Counters are not constrained to be positive, a drift is fixed by reconciliation instead of
+      failing the write.
+    """
+
+    user = models.OneToOneField(
+        UserModel, primary_key=True, on_delete=models.CASCADE, related_name='post_stats'
+    )
+    total = models.IntegerField(default=0)
+    public = models.IntegerField(default=0)
+    hidden = models.IntegerField(default=0)
+    last_posted_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = 'User post stats'
+        verbose_name_plural = 'User post stats'
@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from random import choice
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ReplicaReads:
+    """
+    Selection of the database read by the posts lists.
+
+    Lists are read from a random replica of DATABASE_REPLICAS, except for the users who wrote in
+    the last DATABASE_REPLICA_LAG_SECONDS: they read from the primary to see their own writes.
+
+    * The database is selected for the current thread or task with use().
+    """
+
+    pin_key_prefix = 'post:replica:pinned'
+
+    def __init__(self):
+        self.database = ContextVar('post_read_database', default=None)
+
+    @property
+    def cache(self):
+        return caches[settings.POSTS_CACHE_ALIAS]
+
+    def get_pin_key(self, user):
+        return f'{self.pin_key_prefix}:{user.pk}'
+
+    def get_database(self, user):
+        """
+        Return the replica read by 'user', None for the primary.
+        """
+
+        if not settings.DATABASE_REPLICAS or self.cache.get(self.get_pin_key(user)):
+            return None
+        return choice(settings.DATABASE_REPLICAS)
+
+    async def aget_database(self, user):
+        if not settings.DATABASE_REPLICAS or await self.cache.aget(self.get_pin_key(user)):
+            return None
+        return choice(settings.DATABASE_REPLICAS)
+
+    def pin_primary(self, user):
+        if settings.DATABASE_REPLICAS:
+            self.cache.set(
+                self.get_pin_key(user), True, timeout=settings.DATABASE_REPLICA_LAG_SECONDS
+            )
+
+    def current(self):
+        return self.database.get()
+
+    @contextmanager
+    def use(self, database):
+        token = self.database.set(database)
+        try:
+            yield
+        finally:
+            self.database.reset(token)
+
+
+replica_reads = ReplicaReads()
+
+
+class ReplicaRouter:
+    """
+    Route the reads to the replica selected with ReplicaReads.use(), the primary otherwise.
+    """
+
+    def db_for_read(self, model, **hints):
+        return replica_reads.current()
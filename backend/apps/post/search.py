@@ -0,0 +1,171 @@
+import re
+
+from django.conf import settings
+from django.db import connection, connections, router, transaction
+
+from apps.post.models import Post
+
+
+class PostSearch:
+    """
+    Full-text search of the public posts content.
+
+    The inverted index is maintained by the database on every write of the posts table, including
+    bulk writes and cascade deletes:
+    - SQLite: FTS5 table 'post_search' with the posts table as external content, kept in sync by
+      triggers. Ranked with bm25().
+    - PostgreSQL: generated 'search_vector' column with a GIN index on the posts that are not
+      hidden. Ranked with ts_rank().
+
+    * Every word of the query must be found, operators of the query languages are ignored.
+
+    * Results are ordered by decreasing 'score', then by decreasing id. Broad queries are ranked
+      among their POST_SEARCH_MAX_RANKED most recent matches, so their cost does not grow with
+      the number of posts.
+    """
+
+    table = 'post_search'
+    max_terms = 16
+    word_re = re.compile(r'\w+')
+
+    sqlite_install = [
+        f"""
+        CREATE VIRTUAL TABLE {table} USING fts5(
+            content, content='post_post', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER {table}_insert AFTER INSERT ON post_post BEGIN
+            INSERT INTO {table} (rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_delete AFTER DELETE ON post_post BEGIN
+            INSERT INTO {table} ({table}, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_update AFTER UPDATE OF content ON post_post BEGIN
+            INSERT INTO {table} ({table}, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO {table} (rowid, content) VALUES (new.id, new.content);
+        END
+        """,
+        f"INSERT INTO {table} ({table}) VALUES ('rebuild')",
+    ]
+    sqlite_uninstall = [
+        f'DROP TRIGGER IF EXISTS {table}_insert',
+        f'DROP TRIGGER IF EXISTS {table}_delete',
+        f'DROP TRIGGER IF EXISTS {table}_update',
+        f'DROP TABLE IF EXISTS {table}',
+    ]
+    postgresql_install = [
+        """
+        ALTER TABLE post_post ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED
+        """,
+        f'CREATE INDEX {table}_idx ON post_post USING GIN (search_vector) WHERE NOT hidden',
+    ]
+    postgresql_uninstall = [
+        f'DROP INDEX IF EXISTS {table}_idx',
+        'ALTER TABLE post_post DROP COLUMN IF EXISTS search_vector',
+    ]
+
+    # Both queries select the ids of the matching public posts with their 'score' in a subquery,
+    # so the cursor can be applied on the score. Only the POST_SEARCH_MAX_RANKED most recent
+    # matches are ranked, the id of the oldest one is found by walking the index backwards.
+    sqlite_query = f"""
+        SELECT id, score FROM (
+            SELECT post_post.id, -bm25({table}) AS score
+            FROM {table} JOIN post_post ON post_post.id = {table}.rowid
+            WHERE {table} MATCH %s AND NOT post_post.hidden AND {table}.rowid >= coalesce((
+                SELECT rowid FROM {table} WHERE {table} MATCH %s
+                ORDER BY rowid DESC LIMIT 1 OFFSET %s
+            ), 0)
+        ) AS matches
+    """
+    postgresql_query = """
+        SELECT id, score FROM (
+            SELECT post_post.id, ts_rank(search_vector, query) AS score
+            FROM post_post, to_tsquery('simple', %s) AS query
+            WHERE search_vector @@ query AND NOT post_post.hidden AND post_post.id >= coalesce((
+                SELECT id FROM post_post WHERE search_vector @@ to_tsquery('simple', %s)
+                AND NOT hidden ORDER BY id DESC LIMIT 1 OFFSET %s
+            ), 0)
+        ) AS matches
+    """
+
+    def get_terms(self, text):
+        return self.word_re.findall(text.lower())[: self.max_terms]
+
+    def get_match_query(self, vendor, terms):
+        # Terms are made of word characters only, they can not contain any operator
+        if vendor == 'postgresql':
+            return ' & '.join(terms)
+        return ' '.join(f'"{term}"' for term in terms)
+
+    def search(self, text, after=None, limit=100):
+        """
+        Return the public posts matching 'text', with their 'score' and author, in 2 queries.
+
+        'after' is the (score, id) pair of the last post of the previous page, if any.
+        """
+
+        terms = self.get_terms(text)
+        if not terms:
+            return []
+        database = router.db_for_read(Post) or 'default'
+        vendor = connections[database].vendor
+        query = self.postgresql_query if vendor == 'postgresql' else self.sqlite_query
+        match_query = self.get_match_query(vendor, terms)
+        params = [match_query, match_query, settings.POST_SEARCH_MAX_RANKED - 1]
+        if after is not None:
+            query += ' WHERE score < %s OR (score = %s AND id < %s)'
+            params += [after[0], after[0], after[1]]
+        query += ' ORDER BY score DESC, id DESC LIMIT %s'
+        params.append(limit)
+        with connections[database].cursor() as cursor:
+            cursor.execute(query, params)
+            scores = cursor.fetchall()
+
+        # Only the columns serialized are fetched
+        posts = (
+            Post.objects.using(database)
+            .select_related('author')
+            .only('content', 'created_at', 'author__username')
+            .in_bulk([pk for pk, _ in scores])
+        )
+        results = []
+        for pk, score in scores:
+            post = posts.get(pk)
+            # Deleted between the queries
+            if post is not None:
+                post.score = score
+                results.append(post)
+        return results
+
+    def install(self, executor, vendor):
+        """
+        Create the index with 'executor', a schema editor or a cursor, and index the posts.
+        """
+
+        for statement in getattr(self, f'{vendor}_install', []):
+            executor.execute(statement)
+
+    def uninstall(self, executor, vendor):
+        for statement in getattr(self, f'{vendor}_uninstall', []):
+            executor.execute(statement)
+
+    def rebuild(self):
+        """
+        Drop and create the index of the default database again.
+
+        * SQLite migrations that rebuild the posts table drop its triggers, run it after them.
+        """
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.uninstall(cursor, connection.vendor)
+            self.install(cursor, connection.vendor)
+
+
+post_search = PostSearch()
@@ -0,0 +1,165 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.post.models import Post, UserPostStats
+
+UserModel = get_user_model()
+
+
+class PostStats:
+    """
+    Counter cache of the posts of every user, stored in UserPostStats.
+
+    Counters are incremented with F() expressions in the transaction of the write, so concurrent
+    writes of a user never overwrite each other. The counters of a user are computed from the posts
+    on the first write counted.
+
+    * Posts written without UserPostsAPIView are not counted, reconcile() fixes the counters from
+      the posts.
+    """
+
+    fields = ['total', 'public', 'hidden', 'last_posted_at']
+
+    def record_created(self, user_id, posts):
+        if not posts:
+            return
+        hidden = sum(post.hidden for post in posts)
+        last_posted_at = Value(max(post.created_at for post in posts))
+        self.update(
+            user_id,
+            total=F('total') + len(posts),
+            public=F('public') + len(posts) - hidden,
+            hidden=F('hidden') + hidden,
+            # Greatest is NULL on SQLite when the user has no post yet
+            last_posted_at=Coalesce(Greatest('last_posted_at', last_posted_at), last_posted_at),
+        )
+
+    def record_updated(self, user_id, changes):
+        """
+        Count the posts hidden or made public, 'changes' are (was_hidden, hidden) pairs.
+        """
+
+        delta = sum(hidden - was_hidden for was_hidden, hidden in changes)
+        if delta:
+            self.update(user_id, public=F('public') - delta, hidden=F('hidden') + delta)
+
+    def record_deleted(self, user_id, hidden):
+        """
+        Count the deleted posts, 'hidden' are their flags.
+        """
+
+        latest = Post.objects.filter(author=OuterRef('user')).order_by('-created_at')
+        self.update(
+            user_id,
+            total=F('total') - len(hidden),
+            public=F('public') - (len(hidden) - sum(hidden)),
+            hidden=F('hidden') - sum(hidden),
+            last_posted_at=Subquery(latest.values('created_at')[:1]),
+        )
+
+    def update(self, user_id, **values):
+        if not UserPostStats.objects.filter(user_id=user_id).update(**values):
+            # First write counted, the posts already include it
+            self.reset([user_id])
+
+    def get(self, user_id):
+        stats = UserPostStats.objects.filter(user_id=user_id).first()
+        return self.to_dict(stats or self.count([user_id])[user_id])
+
+    async def aget(self, user_id):
+        stats = await UserPostStats.objects.filter(user_id=user_id).afirst()
+        if stats is None:
+            stats = (await self.acount([user_id]))[user_id]
+        return self.to_dict(stats)
+
+    def to_dict(self, stats):
+        return {field: getattr(stats, field) for field in self.fields}
+
+    def get_counts(self, user_ids):
+        return (
+            Post.objects.filter(author__in=user_ids)
+            .values('author')
+            .annotate(
+                posts_total=Count('pk'),
+                posts_hidden=Count('pk', filter=Q(hidden=True)),
+                posts_last=Max('created_at'),
+            )
+            .order_by()
+        )
+
+    def from_counts(self, row):
+        return UserPostStats(
+            user_id=row['author'],
+            total=row['posts_total'],
+            public=row['posts_total'] - row['posts_hidden'],
+            hidden=row['posts_hidden'],
+            last_posted_at=row['posts_last'],
+        )
+
+    def count(self, user_ids):
+        """
+        Return the UserPostStats of 'user_ids' computed from their posts, by user id.
+        """
+
+        stats = {user_id: UserPostStats(user_id=user_id) for user_id in user_ids}
+        for row in self.get_counts(user_ids):
+            stats[row['author']] = self.from_counts(row)
+        return stats
+
+    async def acount(self, user_ids):
+        stats = {user_id: UserPostStats(user_id=user_id) for user_id in user_ids}
+        async for row in self.get_counts(user_ids):
+            stats[row['author']] = self.from_counts(row)
+        return stats
+
+    def reset(self, user_ids):
+        UserPostStats.objects.bulk_create(
+            self.count(user_ids).values(),
+            update_conflicts=True,
+            update_fields=self.fields,
+            unique_fields=['user'],
+        )
+
+    def reconcile(self, user_ids):
+        """
+        Set the counters of 'user_ids' from their posts.
+
+        Returns the number of users whose counters were missing or wrong.
+        """
+
+        with transaction.atomic():
+            expected = self.count(user_ids)
+            current = UserPostStats.objects.in_bulk(user_ids)
+            drifted = [
+                stats
+                for user_id, stats in expected.items()
+                if user_id not in current or self.to_dict(current[user_id]) != self.to_dict(stats)
+            ]
+            UserPostStats.objects.bulk_create(
+                drifted, update_conflicts=True, update_fields=self.fields, unique_fields=['user']
+            )
+        return len(drifted)
+
+    def reconcile_all(self, batch_size=1000):
+        """
+        Reconcile the counters of every user, 'batch_size' users at a time.
+
+        Returns the number of users whose counters were missing or wrong.
+        """
+
+        user_ids = UserModel.objects.order_by('pk').values_list('pk', flat=True)
+        fixed = 0
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                fixed += self.reconcile(batch)
+                batch = []
+        if batch:
+            fixed += self.reconcile(batch)
+        return fixed
+
+
+post_stats = PostStats()
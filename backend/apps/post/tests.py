@@ -1,3 +1,2084 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from json import loads as json_loads
+from os import path
+from tempfile import TemporaryDirectory, gettempdir
+from time import time, time_ns
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import F, Q
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ModelSerializer
+from rest_framework.test import APITestCase
+
+from apps.account.authentication import revoked_tokens
+from apps.post.api.async_views import (
+    AsyncPublicPostsEventsView,
+    AsyncPublicPostsView,
+    AsyncUserPostDetailView,
+    AsyncUserPostsView,
+)
+from apps.post.api.serializers import (
+    PublicPostSerializer,
+    PublicTimelineEntrySerializer,
+    UserPostSerializer,
+)
+from apps.post.api.views import PublicPostsAPIView, UserPostsAPIView
+from apps.post.cache import public_posts_cache, user_posts_cache
+from apps.post.events import post_events
+from apps.post.models import Post, PublicTimelineEntry, UserPostStats
+from apps.post.routers import ReplicaRouter, replica_reads
+from apps.post.stats import post_stats
+from apps.post.timeline import public_timeline
+from config.backends.sqlite3.base import DatabaseWrapper
+
+UserModel = get_user_model()
+
+# List validators need a cache shared by the processes, see ConditionalListModelMixin
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': path.join(gettempdir(), 'post-tests-cache'),
+    }
+}
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class PostPaginationTestCase(APITestCase):
+    """
+    PostPagination test case.
+
+    supported methods:
+    - GET
+        cases:
+        - public posts first page with keyset pagination
+        - public posts walked to the end following the cursor
+        - user posts walked to the end following the cursor
+        - invalid cursor
+        - legacy page-number pagination with 'page' parameter
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+        # Create public and hidden posts
+        Post.objects.bulk_create(
+            [Post(author=self.user, content=f'post {i}', hidden=i % 3 == 0) for i in range(250)]
+        )
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response_data = json_loads(response.content)
+            self.assertNotIn('count', response_data)
+            ids.extend(post['id'] for post in response_data['results'])
+            url = response_data['next']
+        return ids
+
+    def test_public_first_page(self):
+        response = self.client.get(self.public_url)
+        response_data = json_loads(response.content)
+
+        # Assertion for a keyset page without count
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response_data), {'next', 'results'})
+        self.assertEqual(len(response_data['results']), 100)
+        self.assertIn('cursor=', response_data['next'])
+
+    def test_public_walk(self):
+        ids = self.walk(self.public_url)
+        expected = list(
+            Post.objects.filter(hidden=False).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+        # Assertion for every public post returned once and in order
+        self.assertEqual(ids, expected)
+
+    def test_user_walk(self):
+        ids = self.walk(self.user_url)
+        expected = list(Post.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        # Assertion for every user's post returned once and in order
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.public_url, {'cursor': 'invalid'})
+
+        # Assertion for a failing list cause invalid cursor
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number(self):
+        response = self.client.get(self.public_url, {'page': 2})
+        response_data = json_loads(response.content)
+
+        # Assertion for a legacy page-number page
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response_data['count'], Post.objects.filter(hidden=False).count())
+        self.assertEqual(len(response_data['results']), 66)
+        self.assertIsNone(response_data['next'])
+
+
+class PostQueryCountTestCase(APITestCase):
+    """
+    Query count regression test case for public and user's posts ViewSets.
+
+    supported methods:
+    - GET
+        cases:
+        - list public posts with keyset pagination, regardless of the page size
+        - list public posts with page-number pagination
+        - list user's posts
+    - POST
+        cases:
+        - create a post
+    - PUT
+        cases:
+        - update a post
+    - DELETE
+        cases:
+        - delete a post
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+        # Post counters of the user exist after its first post
+        post_stats.reset([self.user.pk])
+
+    def create_posts(self, count):
+        authors = UserModel.objects.bulk_create(
+            [UserModel(username=f'author_{count}_{i}') for i in range(count)]
+        )
+        Post.objects.bulk_create(
+            [Post(author=author, content='content', hidden=False) for author in authors]
+        )
+        Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=False) for _ in range(count)]
+        )
+
+    def test_list_public_constant(self):
+        # 1 query for the page, the user is built from the token
+        self.create_posts(5)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.public_url)
+        self.assertEqual(len(json_loads(response.content)['results']), 10)
+
+        self.create_posts(90)
+        public_posts_cache.invalidate()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.public_url)
+        self.assertEqual(len(json_loads(response.content)['results']), 100)
+
+    def test_list_public_page_number(self):
+        # 1 COUNT query + 1 query for the page
+        self.create_posts(60)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.public_url, {'page': 1})
+        self.assertEqual(len(json_loads(response.content)['results']), 100)
+
+    def test_list_user(self):
+        # 1 query for JWT user + 1 query for the page
+        self.create_posts(60)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.user_url)
+        self.assertEqual(len(json_loads(response.content)['results']), 60)
+
+    def test_create(self):
+        # 1 query for JWT user + 1 INSERT and 1 UPDATE of the counters in a transaction
+        payload = {'content': 'content', 'hidden': False}
+        with self.assertNumQueries(5):
+            response = self.client.post(self.user_url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_update(self):
+        # 1 query for JWT user + 1 SELECT of the post + 1 UPDATE and 1 UPDATE of the counters
+        # in a transaction
+        post = Post.objects.create(author=self.user, content='content', hidden=False)
+        url = reverse('user-posts-detail', args=[post.id])
+        payload = {'content': 'new content', 'hidden': True}
+        with self.assertNumQueries(6):
+            response = self.client.put(url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_delete(self):
+        # 1 query for JWT user + 1 SELECT of the post + 1 DELETE of the timeline entry + 1 DELETE
+        # + 1 UPDATE of the counters in a transaction
+        post = Post.objects.create(author=self.user, content='content', hidden=False)
+        url = reverse('user-posts-detail', args=[post.id])
+        with self.assertNumQueries(7):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PublicPostsCacheTestCase(APITestCase):
+    """
+    PublicPostsAPIView and UserPostsAPIView cache test case.
+
+    supported methods:
+    - GET
+        cases:
+        - second request served from the cache without queries on posts
+        - cached page returned with the same bytes and headers
+        - browsable API pages not cached
+        - user's posts page served from the cache
+        - user's posts cache invalidated after updating a post
+        - different query strings cached separately
+        - cache invalidated after creating a post
+        - cache invalidated after hiding a post
+        - cache invalidated after deleting a post
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+        public_posts_cache.reset_stats()
+        user_posts_cache.reset_stats()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+        self.post = Post.objects.create(author=self.user, content='content', hidden=False)
+
+    def get_public_ids(self):
+        response = self.client.get(self.public_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in json_loads(response.content)['results']]
+
+    def test_hit(self):
+        self.get_public_ids()
+
+        # The page is not queried
+        with self.assertNumQueries(0):
+            ids = self.get_public_ids()
+
+        # Assertion for a page served from the cache
+        self.assertEqual(ids, [self.post.id])
+        self.assertEqual(public_posts_cache.misses, 1)
+        self.assertEqual(public_posts_cache.hits, 1)
+
+    def test_hit_content(self):
+        miss = self.client.get(self.public_url)
+        hit = self.client.get(self.public_url)
+
+        # Assertion for the same response of the page built from the database
+        self.assertEqual(public_posts_cache.hits, 1)
+        self.assertEqual(hit.content, miss.content)
+        for header in ('Content-Type', 'ETag', 'Allow', 'Vary'):
+            self.assertEqual(hit[header], miss[header])
+
+    def test_browsable_api(self):
+        response = self.client.get(self.public_url, HTTP_ACCEPT='text/html')
+
+        # Assertion for a page not cached
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(public_posts_cache.hits + public_posts_cache.misses, 0)
+
+    def test_user_hit(self):
+        self.client.get(self.user_url)
+
+        # 1 query for JWT user, the page is not queried
+        with self.assertNumQueries(1):
+            response = self.client.get(self.user_url)
+
+        # Assertion for a page served from the cache
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content)['results'][0]['id'], self.post.id)
+        self.assertEqual(user_posts_cache.hits, 1)
+
+    def test_user_invalidate_update(self):
+        self.client.get(self.user_url)
+        url = reverse('user-posts-detail', args=[self.post.id])
+        self.client.patch(url, data={'content': 'edited'}, format='json')
+        response = self.client.get(self.user_url)
+
+        # Assertion for an updated post right after the update
+        self.assertEqual(json_loads(response.content)['results'][0]['content'], 'edited')
+        self.assertEqual(user_posts_cache.misses, 2)
+
+    def test_query_string(self):
+        self.client.get(self.public_url)
+        self.client.get(self.public_url, {'page': 1})
+
+        # Assertion for pages cached by query string
+        self.assertEqual(public_posts_cache.misses, 2)
+        self.assertEqual(public_posts_cache.hits, 0)
+
+    def test_invalidate_create(self):
+        self.get_public_ids()
+        payload = {'content': 'new content', 'hidden': False}
+        response = self.client.post(self.user_url, data=payload, format='json')
+        ids = self.get_public_ids()
+
+        # Assertion for a new post visible right after the creation
+        self.assertEqual(ids, [json_loads(response.content)['id'], self.post.id])
+        self.assertEqual(public_posts_cache.misses, 2)
+
+    def test_invalidate_hide(self):
+        self.get_public_ids()
+        url = reverse('user-posts-detail', args=[self.post.id])
+        self.client.patch(url, data={'hidden': True}, format='json')
+
+        # Assertion for a hidden post removed right after the update
+        self.assertEqual(self.get_public_ids(), [])
+        self.assertEqual(public_posts_cache.misses, 2)
+
+    def test_invalidate_delete(self):
+        self.get_public_ids()
+        url = reverse('user-posts-detail', args=[self.post.id])
+        self.client.delete(url)
+
+        # Assertion for a deleted post removed right after the deletion
+        self.assertEqual(self.get_public_ids(), [])
+        self.assertEqual(public_posts_cache.misses, 2)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class ConditionalListTestCase(APITestCase):
+    """
+    Conditional requests test case for public and user's posts ViewSets.
+
+    supported methods:
+    - GET
+        cases:
+        - ETag and Last-Modified headers on list
+        - 304 with a matching If-None-Match, without building the page
+        - 304 with a later If-Modified-Since
+        - 200 with If-Modified-Since after a post is deleted
+        - 200 with a matching If-None-Match after a post changes
+        - different ETag for a different page
+        - no validators with a cache local to the process
+        - validators changed once the version expires
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+        self.post = Post.objects.create(author=self.user, content='content', hidden=False)
+
+    def test_headers(self):
+        for url in (self.public_url, self.user_url):
+            response = self.client.get(url)
+
+            # Assertion for validators on list
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.has_header('ETag'))
+            self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_if_none_match(self):
+        # No query, but 1 query for JWT user on user's posts
+        for url, num_queries in ((self.public_url, 0), (self.user_url, 1)):
+            etag = self.client.get(url)['ETag']
+
+            with self.assertNumQueries(num_queries):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            # Assertion for a not modified list
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.public_url)['Last-Modified']
+        response = self.client.get(self.public_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Assertion for a not modified list
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_deleted(self):
+        last_modified = self.client.get(self.public_url)['Last-Modified']
+        url = reverse('user-posts-detail', args=[self.post.id])
+        # The post is deleted 2 seconds later, Last-Modified has a precision of one second
+        with mock.patch('apps.post.cache.time_ns', return_value=time_ns() + 2 * 10**9):
+            self.client.delete(url)
+        response = self.client.get(self.public_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Assertion for a modified list
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+        self.assertEqual(json_loads(response.content)['results'], [])
+
+    def test_if_none_match_changed(self):
+        etag = self.client.get(self.public_url)['ETag']
+        url = reverse('user-posts-detail', args=[self.post.id])
+        self.client.patch(url, data={'hidden': True}, format='json')
+        response = self.client.get(self.public_url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assertion for a modified list
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json_loads(response.content)['results'], [])
+
+    def test_page_etag(self):
+        etag = self.client.get(self.public_url)['ETag']
+        response = self.client.get(self.public_url, {'page': 1}, HTTP_IF_NONE_MATCH=etag)
+
+        # Assertion for an ETag bound to the page
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(CACHES=LOCAL_CACHES)
+    def test_local_cache(self):
+        for url in (self.public_url, self.user_url):
+            response = self.client.get(url)
+
+            # Assertion for a list without validators
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(response.has_header('ETag'))
+            self.assertFalse(response.has_header('Last-Modified'))
+
+    @override_settings(POSTS_CACHE_TIMEOUT=300)
+    def test_version_expired(self):
+        etag = self.client.get(self.public_url)['ETag']
+        # A post deleted without invalidating the cache, like by the cascade of its author
+        Post.objects.filter(pk=self.post.pk).delete()
+        later = mock.Mock(time=mock.Mock(return_value=time() + 301))
+        with mock.patch('django.core.cache.backends.base.time', later), \
+                mock.patch('django.core.cache.backends.filebased.time', later):
+            response = self.client.get(self.public_url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assertion for a modified list once the version expires
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json_loads(response.content)['results'], [])
+
+
+@override_settings(PUBLIC_TIMELINE_MATERIALIZED=True)
+class PublicTimelineTestCase(APITestCase):
+    """
+    Materialized public timeline test case.
+
+    supported methods:
+    - GET
+        cases:
+        - public posts listed from the timeline with the same output of the posts
+        - created post published
+        - edited post updated
+        - hidden post retracted
+        - deleted post retracted
+        - posts published and retracted by bulk actions
+    cases:
+    - timeline rebuilt by the management command
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+        # Create posts through the API
+        self.posts = []
+        for i in range(5):
+            payload = {'content': f'post {i}', 'hidden': i == 0}
+            response = self.client.post(self.user_url, data=payload, format='json')
+            self.posts.append(json_loads(response.content))
+
+    def get_public_results(self):
+        response = self.client.get(self.public_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json_loads(response.content)['results']
+
+    def test_list(self):
+        results = self.get_public_results()
+        with self.settings(PUBLIC_TIMELINE_MATERIALIZED=False):
+            cache.clear()
+            expected = self.get_public_results()
+
+        # Assertion for the same output of the posts
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results, expected)
+
+    def test_update(self):
+        url = reverse('user-posts-detail', args=[self.posts[1]['id']])
+        self.client.patch(url, data={'content': 'edited'}, format='json')
+
+        # Assertion for the edited post in the timeline
+        self.assertIn('edited', [post['content'] for post in self.get_public_results()])
+
+    def test_hide(self):
+        url = reverse('user-posts-detail', args=[self.posts[1]['id']])
+        self.client.patch(url, data={'hidden': True}, format='json')
+
+        # Assertion for the hidden post retracted from the timeline
+        self.assertNotIn(self.posts[1]['id'], [post['id'] for post in self.get_public_results()])
+        self.assertEqual(PublicTimelineEntry.objects.count(), 3)
+
+    def test_unhide(self):
+        url = reverse('user-posts-detail', args=[self.posts[0]['id']])
+        self.client.patch(url, data={'hidden': False}, format='json')
+
+        # Assertion for the post published again in the timeline
+        self.assertIn(self.posts[0]['id'], [post['id'] for post in self.get_public_results()])
+
+    def test_delete(self):
+        url = reverse('user-posts-detail', args=[self.posts[1]['id']])
+        self.client.delete(url)
+
+        # Assertion for the deleted post retracted from the timeline
+        self.assertNotIn(self.posts[1]['id'], [post['id'] for post in self.get_public_results()])
+
+    def test_bulk(self):
+        bulk_url = reverse('user-posts-bulk')
+        payload = [{'content': 'bulk', 'hidden': False} for _ in range(3)]
+        created = json_loads(self.client.post(bulk_url, data=payload, format='json').content)
+        payload = [{'id': created[0]['id'], 'hidden': True}]
+        self.client.patch(bulk_url, data=payload, format='json')
+        payload = {'ids': [created[1]['id']]}
+        self.client.delete(bulk_url, data=payload, format='json')
+
+        # Assertion for the timeline updated by bulk actions
+        ids = [post['id'] for post in self.get_public_results()]
+        self.assertIn(created[2]['id'], ids)
+        self.assertNotIn(created[0]['id'], ids)
+        self.assertNotIn(created[1]['id'], ids)
+
+    def test_rebuild(self):
+        PublicTimelineEntry.objects.all().delete()
+        Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=False) for _ in range(25)]
+        )
+        out = StringIO()
+        call_command('rebuild_public_timeline', batch_size=10, stdout=out)
+
+        # Assertion for a timeline with every public post
+        self.assertIn('29 posts', out.getvalue())
+        self.assertEqual(
+            set(PublicTimelineEntry.objects.values_list('post_id', flat=True)),
+            set(Post.objects.filter(hidden=False).values_list('id', flat=True)),
+        )
+
+
+class BulkPostsTestCase(APITestCase):
+    """
+    UserPostsAPIView bulk actions test case.
+
+    supported methods:
+    - POST
+        cases:
+        - create many posts with a constant number of queries
+        - per-item validation errors, nothing created
+        - not a list
+        - empty list, nothing created
+    - PATCH
+        cases:
+        - update many posts
+        - per-item errors for posts of other users, nothing updated
+        - per-item errors for repeated ids, nothing updated
+    - DELETE
+        cases:
+        - delete many posts, posts of other users are untouched
+        - missing ids
+    - more posts than POST_BULK_MAX_ITEMS
+    """
+
+    bulk_url = reverse('user-posts-bulk')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+        self.other_user = UserModel.objects.create_user(username='other', password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+    def test_create(self):
+        payload = [{'content': f'post {i}', 'hidden': i % 2 == 0} for i in range(50)]
+
+        # 1 query for JWT user + 1 INSERT and 1 UPDATE of the counters in a transaction
+        post_stats.reset([self.user.pk])
+        with self.settings(POST_BULK_BATCH_SIZE=100), self.assertNumQueries(5):
+            response = self.client.post(self.bulk_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+
+        # Assertion for a successful bulk creation
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response_data), 50)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 50)
+        self.assertTrue(all(post['author'] == 'anon' for post in response_data))
+        self.assertEqual(
+            {post['id'] for post in response_data},
+            set(Post.objects.values_list('id', flat=True)),
+        )
+
+    def test_create_invalid(self):
+        payload = [{'content': 'content', 'hidden': False}, {'content': 'content'}]
+        response = self.client.post(self.bulk_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+
+        # Assertion for a failing bulk creation with per-item errors
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_data[0], {})
+        self.assertIn('hidden', response_data[1])
+        self.assertFalse(Post.objects.exists())
+
+    def test_create_not_list(self):
+        payload = {'content': 'content', 'hidden': False}
+        response = self.client.post(self.bulk_url, data=payload, format='json')
+
+        # Assertion for a failing bulk creation cause invalid payload
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_create_empty(self):
+        response = self.client.post(self.bulk_url, data=[], format='json')
+
+        # Assertion for a bulk creation of no posts
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(json_loads(response.content), [])
+        self.assertFalse(Post.objects.exists())
+
+    def test_update(self):
+        posts = Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=False) for _ in range(20)]
+        )
+        payload = [{'id': post.id, 'hidden': True} for post in posts]
+        payload[0]['content'] = 'edited'
+        response = self.client.patch(self.bulk_url, data=payload, format='json')
+
+        # Assertion for a successful bulk update
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Post.objects.filter(hidden=False).exists())
+        self.assertEqual(Post.objects.get(id=posts[0].id).content, 'edited')
+        self.assertEqual(Post.objects.get(id=posts[1].id).content, 'content')
+
+    def test_update_other_user(self):
+        post = Post.objects.create(author=self.user, content='content', hidden=False)
+        other_post = Post.objects.create(author=self.other_user, content='content', hidden=False)
+        payload = [{'id': post.id, 'hidden': True}, {'id': other_post.id, 'hidden': True}]
+        response = self.client.patch(self.bulk_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+
+        # Assertion for a failing bulk update with per-item errors
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response_data[0], {})
+        self.assertIn('id', response_data[1])
+        self.assertFalse(Post.objects.filter(hidden=True).exists())
+
+    def test_update_duplicate(self):
+        post = Post.objects.create(author=self.user, content='content', hidden=False)
+        payload = [{'id': post.id, 'hidden': True}, {'id': post.id, 'hidden': True}]
+        response = self.client.patch(self.bulk_url, data=payload, format='json')
+
+        # Assertion for a failing bulk update with an error on the repeated id
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json_loads(response.content), [{}, {'id': ['Duplicate.']}])
+        self.assertFalse(Post.objects.filter(hidden=True).exists())
+
+    @override_settings(POST_BULK_MAX_ITEMS=2)
+    def test_max_items(self):
+        posts = Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=False) for _ in range(3)]
+        )
+        responses = [
+            self.client.post(
+                self.bulk_url, data=[{'content': 'new', 'hidden': False}] * 3, format='json'
+            ),
+            self.client.patch(
+                self.bulk_url,
+                data=[{'id': post.id, 'hidden': True} for post in posts],
+                format='json',
+            ),
+            self.client.delete(
+                self.bulk_url, data={'ids': [post.id for post in posts]}, format='json'
+            ),
+        ]
+
+        # Assertion for failing bulk requests cause too many posts, nothing written
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.filter(content='content', hidden=False).count(), 3)
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_delete(self):
+        posts = Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=False) for _ in range(20)]
+        )
+        other_post = Post.objects.create(author=self.other_user, content='content', hidden=False)
+        payload = {'ids': [post.id for post in posts[:10]] + [other_post.id]}
+        response = self.client.delete(self.bulk_url, data=payload, format='json')
+
+        # Assertion for a successful bulk deletion limited to the user's posts
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content), {'deleted': 10})
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 10)
+        self.assertTrue(Post.objects.filter(id=other_post.id).exists())
+
+    def test_delete_no_ids(self):
+        response = self.client.delete(self.bulk_url, data={}, format='json')
+
+        # Assertion for a failing bulk deletion cause missing ids
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PostStatsTestCase(APITestCase):
+    """
+    UserPostsAPIView post counters test case.
+
+    supported methods:
+    - POST
+        cases:
+        - counters computed from the posts on the first write
+        - create a post and many posts
+    - PUT
+        cases:
+        - hide a post and make many posts public
+    - DELETE
+        cases:
+        - delete a post and many posts, last post date of the remaining posts
+    - reconcile_post_stats command
+    - counters retrieved by UserAPIView
+    """
+
+    user_url = reverse('user-posts-list')
+    bulk_url = reverse('user-posts-bulk')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+    def get_stats(self):
+        return post_stats.to_dict(UserPostStats.objects.get(user=self.user))
+
+    def create(self, hidden=False):
+        payload = {'content': 'content', 'hidden': hidden}
+        response = self.client.post(self.user_url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Post.objects.get(pk=json_loads(response.content)['id'])
+
+    def assertStats(self, total, public, hidden):
+        stats = self.get_stats()
+        self.assertEqual(
+            (stats['total'], stats['public'], stats['hidden']), (total, public, hidden)
+        )
+
+    def test_first_write(self):
+        Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=i % 2 == 0) for i in range(5)]
+        )
+        post = self.create()
+
+        # Assertion for the counters of the posts written before the first counted write
+        self.assertStats(6, 3, 3)
+        self.assertEqual(self.get_stats()['last_posted_at'], post.created_at)
+
+    def test_create(self):
+        first = self.create()
+        self.assertStats(1, 1, 0)
+        payload = [{'content': f'post {i}', 'hidden': i % 2 == 0} for i in range(5)]
+        response = self.client.post(self.bulk_url, data=payload, format='json')
+        last = Post.objects.get(pk=json_loads(response.content)[-1]['id'])
+
+        # Assertion for the counters incremented
+        self.assertStats(6, 3, 3)
+        self.assertEqual(self.get_stats()['last_posted_at'], last.created_at)
+        self.assertGreater(last.created_at, first.created_at)
+
+    def test_update(self):
+        post = self.create()
+        others = [self.create(hidden=True) for _ in range(2)]
+        url = reverse('user-posts-detail', args=[post.id])
+        self.client.put(url, data={'content': 'content', 'hidden': True}, format='json')
+
+        # Assertion for a hidden post moved to the hidden counter
+        self.assertStats(3, 0, 3)
+
+        # Assertion for unchanged flags not counted twice
+        self.client.patch(url, data={'content': 'new content'}, format='json')
+        self.assertStats(3, 0, 3)
+
+        payload = [{'id': other.pk, 'hidden': False} for other in others]
+        payload.append({'id': post.pk, 'hidden': True})
+        self.client.patch(self.bulk_url, data=payload, format='json')
+
+        # Assertion for many posts made public
+        self.assertStats(3, 2, 1)
+
+    def test_delete(self):
+        posts = [self.create(hidden=i % 2 == 0) for i in range(4)]
+        url = reverse('user-posts-detail', args=[posts[-1].id])
+        self.client.delete(url)
+
+        # Assertion for the counters decremented and the last post date of the remaining posts
+        self.assertStats(3, 1, 2)
+        self.assertEqual(self.get_stats()['last_posted_at'], posts[-2].created_at)
+
+        payload = {'ids': [post.pk for post in posts]}
+        self.client.delete(self.bulk_url, data=payload, format='json')
+
+        # Assertion for no post left
+        self.assertEqual(
+            self.get_stats(), {'total': 0, 'public': 0, 'hidden': 0, 'last_posted_at': None}
+        )
+
+    def test_reconcile(self):
+        other_user = UserModel.objects.create_user(username='other', password='Change_me_123!')
+        self.create()
+        Post.objects.bulk_create(
+            [Post(author=self.user, content='content', hidden=True) for _ in range(3)]
+        )
+        Post.objects.create(author=other_user, content='content', hidden=False)
+        out = StringIO()
+        call_command('reconcile_post_stats', '--batch-size', '1', stdout=out)
+
+        # Assertion for the drifted and missing counters fixed
+        self.assertIn('fixed for 2 users', out.getvalue())
+        self.assertStats(4, 1, 3)
+        self.assertEqual(UserPostStats.objects.get(user=other_user).total, 1)
+
+        # Assertion for nothing to fix on the next run
+        call_command('reconcile_post_stats', stdout=out)
+        self.assertIn('fixed for 0 users', out.getvalue())
+
+    def test_user_api(self):
+        post = self.create(hidden=True)
+        user_api_url = reverse('user_api')
+
+        # 1 query for the counters, the user is built from the token
+        with self.assertNumQueries(1):
+            response = self.client.get(user_api_url)
+
+        # Assertion for the counters of the user
+        self.assertEqual(
+            json_loads(response.content)['post_stats'],
+            {
+                'total': 1,
+                'public': 0,
+                'hidden': 1,
+                'last_posted_at': post.created_at.isoformat().replace('+00:00', 'Z'),
+            },
+        )
+
+
+@override_settings(THROTTLE_RATES={'post_write': '2/m'})
+class PostWriteThrottleTestCase(APITestCase):
+    """
+    UserPostsAPIView throttling test case.
+
+    cases:
+    - writes throttled per user once the bucket is empty
+    - reads not throttled
+    - writes of other users not throttled
+    """
+
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create new users
+        password = 'Change_me_123!'
+        UserModel.objects.create_user(username='anon', password=password)
+        UserModel.objects.create_user(username='other', password=password)
+
+    def login(self, username):
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': 'Change_me_123!'}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+
+    def create(self):
+        payload = {'content': 'content', 'hidden': False}
+        return self.client.post(self.user_url, data=payload, format='json')
+
+    def test_throttle(self):
+        self.login('anon')
+        responses = [self.create() for _ in range(3)]
+
+        # Assertion for the third write throttled
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [status.HTTP_201_CREATED, status.HTTP_201_CREATED, status.HTTP_429_TOO_MANY_REQUESTS],
+        )
+        self.assertEqual(Post.objects.count(), 2)
+
+        # Assertion for reads not throttled
+        self.assertEqual(self.client.get(self.user_url).status_code, status.HTTP_200_OK)
+
+        # Assertion for the bucket of another user
+        self.login('other')
+        self.assertEqual(self.create().status_code, status.HTTP_201_CREATED)
+
+
+class ExportPostsTestCase(APITestCase):
+    """
+    UserPostsAPIView export action test case.
+
+    supported methods:
+    - GET
+        cases:
+        - export all user's posts as NDJSON with a constant number of queries
+        - resume the export from the cursor of a line
+        - invalid cursor
+        - export streamed by an async generator under ASGI
+    """
+
+    export_url = reverse('user-posts-export')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+        other_user = UserModel.objects.create_user(username='other', password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+        Post.objects.bulk_create(
+            [Post(author=self.user, content=f'post {i}', hidden=i % 2 == 0) for i in range(120)]
+        )
+        Post.objects.create(author=other_user, content='content', hidden=False)
+
+    def export(self, data=None):
+        response = self.client.get(self.export_url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join(response.streaming_content).decode()
+        return [json_loads(line) for line in content.splitlines()]
+
+    def test_export(self):
+        # 1 query for JWT user + 1 query for the posts
+        with self.settings(POST_EXPORT_CHUNK_SIZE=25), self.assertNumQueries(2):
+            lines = self.export()
+
+        # Assertion for every user's post exported in order
+        expected = Post.objects.filter(author=self.user).values_list('id', flat=True)
+        self.assertEqual([line['id'] for line in lines], list(expected))
+        self.assertEqual(
+            set(lines[0]), {'id', 'author', 'content', 'hidden', 'created_at', 'cursor'}
+        )
+
+    def test_resume(self):
+        lines = self.export()
+        resumed = self.export({'cursor': lines[49]['cursor']})
+
+        # Assertion for the export resumed after the line
+        self.assertEqual(resumed, lines[50:])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.export_url, {'cursor': 'invalid'})
+
+        # Assertion for a failing export cause invalid cursor
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(POST_EXPORT_CHUNK_SIZE=25)
+    async def test_export_asgi(self):
+        expected = await sync_to_async(self.export)()
+        headers = {'Authorization': self.client._credentials['HTTP_AUTHORIZATION']}
+        request = AsyncRequestFactory().get(self.export_url, headers=headers)
+        view = UserPostsAPIView.as_view({'get': 'export'})
+        response = await sync_to_async(view)(request)
+
+        # Assertion for an async stream, not loaded in a list by the ASGI handler
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json_loads(line) for line in content.splitlines()], expected)
+
+
+class PostSearchTestCase(APITestCase):
+    """
+    PostSearchAPIView test case.
+
+    supported methods:
+    - GET
+        cases:
+        - posts matching every word ranked by relevance, hidden posts excluded
+        - whole words matched, operators ignored
+        - index kept in sync with creates, updates, bulk writes and deletes
+        - walk of the results with the cursor
+        - broad queries ranked among the most recent matches
+        - index rebuilt with the management command
+        - missing query and invalid cursor
+    """
+
+    search_url = reverse('post-search-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+    def search(self, q, **params):
+        response = self.client.get(self.search_url, {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json_loads(response.content)
+
+    def search_ids(self, q):
+        return [post['id'] for post in self.search(q)['results']]
+
+    def test_search(self):
+        once = Post.objects.create(author=self.user, content='A post about coffee', hidden=False)
+        twice = Post.objects.create(
+            author=self.user, content='Coffee, more coffee, café', hidden=False
+        )
+        Post.objects.create(author=self.user, content='coffee in a hidden post', hidden=True)
+        Post.objects.create(author=self.user, content='A post about tea', hidden=False)
+
+        # 1 query for the matching posts + 1 query for the authors
+        with self.assertNumQueries(2):
+            response_data = self.search('COFFEE')
+
+        # Assertion for the most relevant public posts first
+        self.assertEqual([post['id'] for post in response_data['results']], [twice.pk, once.pk])
+        self.assertEqual(response_data['results'][0]['author'], self.user.username)
+        self.assertEqual(
+            set(response_data['results'][0]), {'id', 'author', 'content', 'created_at'}
+        )
+        self.assertIsNone(response_data['next'])
+
+        # Assertion for every word required, diacritics ignored
+        self.assertEqual(self.search_ids('post coffee'), [once.pk])
+        self.assertEqual(self.search_ids('more cafe'), [twice.pk])
+
+    def test_query_syntax(self):
+        post = Post.objects.create(author=self.user, content='Searching the posts', hidden=False)
+
+        # Assertion for whole words matched only
+        self.assertEqual(self.search_ids('the searching'), [post.pk])
+        self.assertEqual(self.search_ids('the search'), [])
+
+        # Assertion for the operators of the query languages ignored
+        self.assertEqual(self.search_ids('"posts" (the* & !'), [post.pk])
+        self.assertEqual(self.search_ids('*** ""'), [])
+
+    def test_index_sync(self):
+        post = Post.objects.create(author=self.user, content='first words', hidden=False)
+        posts = Post.objects.bulk_create(
+            [Post(author=self.user, content=f'bulk words {i}', hidden=False) for i in range(3)]
+        )
+
+        # Assertion for created posts indexed
+        self.assertEqual(len(self.search_ids('words')), 4)
+
+        post.content = 'second text'
+        post.save()
+        Post.objects.filter(pk=posts[0].pk).update(content='updated text')
+        Post.objects.filter(pk=posts[1].pk).update(hidden=True)
+        Post.objects.filter(pk=posts[2].pk).delete()
+
+        # Assertion for updated, hidden and deleted posts out of the results
+        self.assertEqual(self.search_ids('words'), [])
+        self.assertEqual(set(self.search_ids('text')), {post.pk, posts[0].pk})
+
+        # Assertion for posts deleted by cascade removed from the index
+        self.user.delete()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM post_search WHERE post_search MATCH 'text'")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_walk(self):
+        Post.objects.bulk_create(
+            [
+                Post(author=self.user, content='word ' * (i % 5 + 1) + 'filler ' * i, hidden=False)
+                for i in range(250)
+            ]
+        )
+
+        ids = []
+        response_data = self.search('word')
+        while True:
+            ids += [post['id'] for post in response_data['results']]
+            if response_data['next'] is None:
+                break
+            response = self.client.get(response_data['next'])
+            response_data = json_loads(response.content)
+
+        # Assertion for every matching post returned once, in relevance order
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid, -bm25(post_search) AS score FROM post_search "
+                "WHERE post_search MATCH 'word' ORDER BY score DESC, rowid DESC"
+            )
+            self.assertEqual(ids, [row[0] for row in cursor.fetchall()])
+        self.assertEqual(len(ids), 250)
+
+    @override_settings(POST_SEARCH_MAX_RANKED=3)
+    def test_max_ranked(self):
+        posts = Post.objects.bulk_create(
+            [Post(author=self.user, content='word ' * (5 - i), hidden=False) for i in range(5)]
+        )
+
+        # Assertion for the most relevant of the 3 most recent matches only
+        self.assertEqual(self.search_ids('word'), [posts[2].pk, posts[3].pk, posts[4].pk])
+
+    def test_rebuild(self):
+        post = Post.objects.create(author=self.user, content='indexed post', hidden=False)
+        out = StringIO()
+        call_command('rebuild_post_search', stdout=out)
+
+        # Assertion for the existing posts indexed again, once
+        self.assertIn('rebuilt', out.getvalue())
+        self.assertEqual(self.search_ids('indexed'), [post.pk])
+
+    def test_errors(self):
+        # Assertion for the query parameter required
+        response = self.client.get(self.search_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('q', json_loads(response.content))
+
+        # Assertion for an invalid cursor
+        response = self.client.get(self.search_url, {'q': 'post', 'cursor': 'bmFufDE='})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Assertion for unauthenticated users rejected
+        self.client.credentials()
+        response = self.client.get(self.search_url, {'q': 'post'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class AsyncPostViewsTestCase(APITestCase):
+    """
+    Async post views test case.
+
+    supported methods:
+    - GET
+        cases:
+        - list public posts, same output as PublicPostsAPIView
+        - list user's posts, same output as UserPostsAPIView
+        - list public posts with page-number pagination
+        - 304 with a matching If-None-Match
+        - list not authenticated
+    - POST
+        cases:
+        - create a post
+        - create an invalid post
+        - create posts throttled
+        - create a post with an inactive user
+    - PATCH
+        cases:
+        - update a post
+        - update a post of another user
+    - DELETE
+        cases:
+        - delete a post
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+        other_user = UserModel.objects.create_user(username='other', password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        self.access_token = json_loads(response.content)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        revoked_tokens.reload()
+
+        Post.objects.bulk_create(
+            [Post(author=self.user, content=f'post {i}', hidden=i % 3 == 0) for i in range(150)]
+        )
+        self.other_post = Post.objects.create(author=other_user, content='other', hidden=False)
+        self.factory = AsyncRequestFactory()
+
+    async def call(self, view_class, method, path, data=None, **kwargs):
+        view = view_class.as_view()
+        headers = {'Authorization': f'Bearer {self.access_token}', **kwargs.pop('headers', {})}
+        if method == 'get':
+            request = self.factory.get(path, data, headers=headers)
+        else:
+            request = getattr(self.factory, method)(
+                path, data, content_type='application/json', headers=headers
+            )
+        return await view(request, **kwargs)
+
+    async def test_list_public(self):
+        response = await self.call(AsyncPublicPostsView, 'get', self.public_url)
+        expected = await sync_to_async(self.client.get)(self.public_url)
+
+        # Assertion for the output of PublicPostsAPIView
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content), json_loads(expected.content))
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+    async def test_list_user(self):
+        response = await self.call(AsyncUserPostsView, 'get', self.user_url)
+        expected = await sync_to_async(self.client.get)(self.user_url)
+
+        # Assertion for the output of UserPostsAPIView
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content), json_loads(expected.content))
+
+    async def test_list_page_number(self):
+        response = await self.call(AsyncPublicPostsView, 'get', self.public_url, {'page': 2})
+        expected = await sync_to_async(self.client.get)(self.public_url, {'page': 2})
+
+        # Assertion for the output of PublicPostsAPIView
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content), json_loads(expected.content))
+
+    async def test_if_none_match(self):
+        etag = (await self.call(AsyncPublicPostsView, 'get', self.public_url))['ETag']
+        headers = {'If-None-Match': etag}
+        response = await self.call(AsyncPublicPostsView, 'get', self.public_url, headers=headers)
+
+        # Assertion for a not modified list
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_not_authenticated(self):
+        request = AsyncRequestFactory().get(self.public_url)
+        response = await AsyncPublicPostsView.as_view()(request)
+
+        # Assertion for a failing list cause missing authentication
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(response.has_header('WWW-Authenticate'))
+
+    async def test_create(self):
+        payload = {'content': 'new', 'hidden': False}
+        response = await self.call(AsyncUserPostsView, 'post', self.user_url, payload)
+        response_data = json_loads(response.content)
+
+        # Assertion for a successful creation
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response_data['author'], 'anon')
+        post = await Post.objects.aget(id=response_data['id'])
+        self.assertEqual(post.author_id, self.user.id)
+
+    async def test_create_invalid(self):
+        payload = {'content': 'new'}
+        response = await self.call(AsyncUserPostsView, 'post', self.user_url, payload)
+
+        # Assertion for a failing creation cause missing field
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('hidden', json_loads(response.content))
+
+    @override_settings(THROTTLE_RATES={'post_write': '1/m'})
+    async def test_create_throttled(self):
+        payload = {'content': 'new', 'hidden': False}
+        await self.call(AsyncUserPostsView, 'post', self.user_url, payload)
+        response = await self.call(AsyncUserPostsView, 'post', self.user_url, payload)
+
+        # Assertion for a failing creation cause throttled
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(response.has_header('Retry-After'))
+
+    async def test_create_inactive_user(self):
+        await UserModel.objects.filter(pk=self.user.pk).aupdate(is_active=False)
+        payload = {'content': 'new', 'hidden': False}
+        response = await self.call(AsyncUserPostsView, 'post', self.user_url, payload)
+        expected = await sync_to_async(self.client.post)(self.user_url, payload)
+
+        # Assertion for a failing creation cause inactive user, like UserPostsAPIView
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(json_loads(response.content), json_loads(expected.content))
+        self.assertFalse(await Post.objects.filter(content='new').aexists())
+
+    async def test_update(self):
+        post = await Post.objects.filter(author=self.user).afirst()
+        url = reverse('user-posts-detail', args=[post.id])
+        payload = {'content': 'edited'}
+        response = await self.call(AsyncUserPostDetailView, 'patch', url, payload, pk=post.id)
+
+        # Assertion for a successful update
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((await Post.objects.aget(id=post.id)).content, 'edited')
+
+    async def test_update_other_user(self):
+        url = reverse('user-posts-detail', args=[self.other_post.id])
+        payload = {'content': 'edited'}
+        response = await self.call(
+            AsyncUserPostDetailView, 'patch', url, payload, pk=self.other_post.id
+        )
+
+        # Assertion for a failing update cause post of another user
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_delete(self):
+        post = await Post.objects.filter(author=self.user).afirst()
+        url = reverse('user-posts-detail', args=[post.id])
+        response = await self.call(AsyncUserPostDetailView, 'delete', url, pk=post.id)
+
+        # Assertion for a successful deletion
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Post.objects.filter(id=post.id).aexists())
+
+
+class PostEventsTestCase(APITestCase):
+    """
+    Live public timeline test case.
+
+    cases:
+    - events published by the writes of UserPostsAPIView
+    - events published by the bulk writes of UserPostsAPIView
+    - no events for a rolled back write
+    - no events for a failed deletion
+    - stream new events
+    - stream missed events after 'Last-Event-ID'
+    - reset for missed events no longer available
+    - heartbeat without events
+    - stream not authenticated
+    """
+
+    url = '/api/post/public/events/'
+    user_url = reverse('user-posts-list')
+    bulk_url = reverse('user-posts-bulk')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+        self.backend = post_events.load_backend()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        self.access_token = json_loads(response.content)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        revoked_tokens.reload()
+
+    def get_events(self):
+        return [(event.type, event.data) for _, event in self.backend.buffer]
+
+    async def open_stream(self, last_event_id=None):
+        headers = {'Authorization': f'Bearer {self.access_token}'}
+        if last_event_id is not None:
+            headers['Last-Event-ID'] = last_event_id
+        request = AsyncRequestFactory().get(self.url, headers=headers)
+        response = await AsyncPublicPostsEventsView.as_view()(request)
+        return response, response.streaming_content
+
+    async def read(self, stream):
+        return (await asyncio.wait_for(anext(stream), timeout=1)).decode()
+
+    def test_write_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payload = {'content': 'public', 'hidden': False}
+            post = json_loads(self.client.post(self.user_url, data=payload).content)
+            self.client.post(self.user_url, data={'content': 'hidden', 'hidden': True})
+            url = reverse('user-posts-detail', args=[post['id']])
+            self.client.patch(url, data={'content': 'edited'})
+            self.client.patch(url, data={'hidden': True})
+            self.client.patch(url, data={'content': 'edited while hidden'})
+            self.client.patch(url, data={'hidden': False})
+            self.client.delete(url)
+
+        # Assertion for the delta events of the public posts, the post made public sent as new
+        public_post = {key: value for key, value in post.items() if key != 'hidden'}
+        self.assertEqual(
+            self.get_events(),
+            [
+                ('created', public_post),
+                ('updated', {**public_post, 'content': 'edited'}),
+                ('removed', {'id': post['id']}),
+                ('created', {**public_post, 'content': 'edited while hidden'}),
+                ('removed', {'id': post['id']}),
+            ],
+        )
+
+    def test_bulk_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payload = [{'content': f'post {i}', 'hidden': i == 0} for i in range(3)]
+            posts = json_loads(self.client.post(self.bulk_url, data=payload, format='json').content)
+            payload = {'ids': [post['id'] for post in posts]}
+            self.client.delete(self.bulk_url, data=payload, format='json')
+
+        # Assertion for the delta events of the public posts
+        events = self.get_events()
+        event_types = [event_type for event_type, _ in events]
+        self.assertEqual(event_types, ['created', 'created', 'removed', 'removed', 'removed'])
+        self.assertEqual([data['id'] for _, data in events[:2]], [posts[1]['id'], posts[2]['id']])
+
+    def test_rolled_back_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payload = [{'content': 'content', 'hidden': False}, {'content': 'content'}]
+            response = self.client.post(self.bulk_url, data=payload, format='json')
+
+        # Assertion for no events published
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get_events(), [])
+
+    def test_failed_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payload = {'content': 'public', 'hidden': False}
+            post = json_loads(self.client.post(self.user_url, data=payload).content)
+        self.backend.buffer.clear()
+        url = reverse('user-posts-detail', args=[post['id']])
+        with self.captureOnCommitCallbacks(execute=True):
+            with mock.patch.object(Post, 'delete', side_effect=DatabaseError('database is locked')):
+                with self.assertRaises(DatabaseError):
+                    self.client.delete(url)
+
+        # Assertion for no events published for the post kept
+        self.assertEqual(self.get_events(), [])
+        self.assertTrue(Post.objects.filter(pk=post['id']).exists())
+
+    async def test_stream(self):
+        response, stream = await self.open_stream()
+        reading = asyncio.ensure_future(self.read(stream))
+        # Wait for the stream to subscribe
+        while not self.backend.subscribers:
+            await asyncio.sleep(0)
+        event = self.backend.publish('removed', {'id': 1})
+        chunk = await reading
+        await stream.aclose()
+
+        # Assertion for a streamed event
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(chunk, f'id: {event.id}\nevent: removed\ndata: {{"id": 1}}\n\n')
+
+    async def test_stream_missed(self):
+        events = [self.backend.publish('removed', {'id': pk}) for pk in range(3)]
+        _, stream = await self.open_stream(last_event_id=events[0].id)
+        chunks = [await self.read(stream), await self.read(stream)]
+        await stream.aclose()
+
+        # Assertion for the replay of the missed events only
+        self.assertTrue(chunks[0].startswith(f'id: {events[1].id}\n'))
+        self.assertTrue(chunks[1].startswith(f'id: {events[2].id}\n'))
+
+    async def test_stream_reset(self):
+        with self.settings(POST_EVENTS_BUFFER_SIZE=2):
+            self.backend = post_events.load_backend()
+        events = [self.backend.publish('removed', {'id': pk}) for pk in range(4)]
+        for last_event_id in (events[0].id, '0-1', 'invalid'):
+            _, stream = await self.open_stream(last_event_id=last_event_id)
+            chunk = await self.read(stream)
+            await stream.aclose()
+
+            # Assertion for a reset of the timeline
+            self.assertEqual(chunk, f'id: {events[3].id}\nevent: reset\ndata: {{}}\n\n')
+
+    async def test_heartbeat(self):
+        with self.settings(POST_EVENTS_HEARTBEAT_SECONDS=0.01):
+            _, stream = await self.open_stream()
+            chunk = await self.read(stream)
+        await stream.aclose()
+
+        # Assertion for a heartbeat comment
+        self.assertEqual(chunk, ': heartbeat\n\n')
+
+    async def test_stream_not_authenticated(self):
+        request = AsyncRequestFactory().get(self.url)
+        response = await AsyncPublicPostsEventsView.as_view()(request)
+
+        # Assertion for a failing stream cause missing authentication
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PostSerializerTestCase(TestCase):
+    """
+    Post serializers fast path test case.
+
+    cases:
+    - public posts rendered as the generic ModelSerializer path
+    - user's posts rendered as the generic ModelSerializer path
+    - timeline entries rendered as the generic ModelSerializer path
+    """
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        self.user = UserModel.objects.create_user(username='ànön', password='Change_me_123!')
+        posts = Post.objects.bulk_create(
+            [
+                Post(author=self.user, content=content, hidden=hidden)
+                for content, hidden in [('text', False), ('ünïcödé ✓', False), ('', True)]
+            ]
+        )
+        # Posts of different days and times around midnight
+        for i, post in enumerate(posts):
+            post.created_at = post.created_at.replace(hour=23, minute=59) - timedelta(days=i)
+        Post.objects.bulk_update(posts, ['created_at'])
+        self.factory = RequestFactory()
+
+    def get_view_queryset(self, view_class):
+        request = self.factory.get('/')
+        request.user = self.user
+        return view_class(request=request, action='list').get_queryset()
+
+    def assertRenderedAsGeneric(self, serializer_class, instances):
+        serializer = serializer_class()
+        generic = [ModelSerializer.to_representation(serializer, obj) for obj in instances]
+
+        # Assertion for the same bytes of the generic serializer
+        self.assertEqual(
+            JSONRenderer().render(serializer_class(instances, many=True).data),
+            JSONRenderer().render(generic),
+        )
+
+    def test_public_posts(self):
+        self.assertRenderedAsGeneric(
+            PublicPostSerializer, list(self.get_view_queryset(PublicPostsAPIView))
+        )
+
+    def test_user_posts(self):
+        self.assertRenderedAsGeneric(
+            UserPostSerializer, list(self.get_view_queryset(UserPostsAPIView))
+        )
+
+    @override_settings(PUBLIC_TIMELINE_MATERIALIZED=True)
+    def test_timeline_entries(self):
+        public_timeline.rebuild()
+        self.assertRenderedAsGeneric(
+            PublicTimelineEntrySerializer, list(self.get_view_queryset(PublicPostsAPIView))
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_REPLICA_LAG_SECONDS=5)
+class ReplicaReadsTestCase(APITestCase):
+    """
+    Read replicas test case.
+
+    cases:
+    - lists read from a replica
+    - lists read from the primary after a write of the user
+    - lists of other users still read from a replica
+    - no replicas configured
+    - pages read from a replica cached for the replication lag
+    - pages read from a replica without validators during the replication lag
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+        self.other_user = UserModel.objects.create_user(username='other', password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        response_data = json_loads(response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response_data["access"]}')
+        revoked_tokens.reload()
+
+    def get_read_databases(self, url):
+        """
+        Return the databases selected for the reads of the posts by the request.
+        """
+
+        databases = set()
+
+        def db_for_read(router, model, **hints):
+            if model is Post:
+                databases.add(replica_reads.current())
+            # The test database has no replicas
+            return None
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', autospec=True) as patched:
+            patched.side_effect = db_for_read
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return databases
+
+    def test_replica(self):
+        # Assertion for lists read from the replica
+        self.assertEqual(self.get_read_databases(self.public_url), {'replica_1'})
+        self.assertEqual(self.get_read_databases(self.user_url), {'replica_1'})
+
+    def test_read_your_writes(self):
+        self.client.post(self.user_url, data={'content': 'content', 'hidden': False})
+
+        # Assertion for lists read from the primary
+        self.assertEqual(self.get_read_databases(self.public_url), {None})
+        self.assertEqual(self.get_read_databases(self.user_url), {None})
+
+    def test_other_user(self):
+        self.client.post(self.user_url, data={'content': 'content', 'hidden': False})
+
+        # Assertion for the other user reading from the replica
+        self.assertIsNone(replica_reads.get_database(self.user))
+        self.assertEqual(replica_reads.get_database(self.other_user), 'replica_1')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        # Assertion for lists read from the primary
+        self.assertEqual(self.get_read_databases(self.public_url), {None})
+
+    @override_settings(POSTS_CACHE_TIMEOUT=300)
+    def test_cache_timeout(self):
+        request = RequestFactory().get(self.public_url)
+        primary_key = public_posts_cache.get_key(request, 'application/json')
+        with replica_reads.use('replica_1'):
+            replica_key = public_posts_cache.get_key(request, 'application/json')
+            replica_timeout = public_posts_cache.get_timeout()
+
+        # Assertion for replica pages cached separately for the replication lag
+        self.assertNotEqual(primary_key, replica_key)
+        self.assertEqual(public_posts_cache.get_timeout(), 300)
+        self.assertEqual(replica_timeout, 5)
+
+    # The test database has no replicas
+    @override_settings(CACHES=SHARED_CACHES)
+    @mock.patch.object(ReplicaRouter, 'db_for_read', return_value=None)
+    def test_validators_lag(self, db_for_read):
+        public_posts_cache.invalidate()
+        response = self.client.get(self.public_url)
+
+        # Assertion for a page of the replica without validators right after a write
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        # Assertion for validators once the replication lag is over
+        with mock.patch('apps.post.api.mixins.time', return_value=time() + 5):
+            response = self.client.get(self.public_url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+
+class DatabaseConnectionTestCase(TestCase):
+    """
+    Database connection test case.
+
+    cases:
+    - PRAGMAs of the settings applied on SQLite connections
+    - SQLite transactions holding the write lock from their start
+    """
+
+    def test_sqlite_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        with connection.cursor() as cursor:
+            busy_timeout = cursor.execute('PRAGMA busy_timeout').fetchone()[0]
+            synchronous = cursor.execute('PRAGMA synchronous').fetchone()[0]
+
+        # Assertion for the busy timeout and the NORMAL (1) synchronous mode
+        self.assertEqual(busy_timeout, pragmas['busy_timeout'])
+        self.assertEqual(synchronous, 1)
+
+    def test_sqlite_transaction_mode(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        options = {**connection.settings_dict['OPTIONS']}
+        options['pragmas'] = {**options['pragmas'], 'busy_timeout': 0}
+        with TemporaryDirectory() as directory:
+            settings_dict = {
+                **connection.settings_dict, 'NAME': f'{directory}/db.sqlite3', 'OPTIONS': options
+            }
+            reader = DatabaseWrapper(settings_dict, 'reader')
+            writer = DatabaseWrapper(settings_dict, 'writer')
+            reader.cursor().execute('CREATE TABLE counter (value INTEGER)')
+            try:
+                # A transaction that has only read yet, as in transaction.atomic()
+                reader.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+                reader.cursor().execute('SELECT COUNT(*) FROM counter')
+
+                # Assertion for the other writers waiting for the end of the transaction
+                with self.assertRaisesMessage(DatabaseError, 'database is locked'):
+                    writer.cursor().execute('INSERT INTO counter VALUES (1)')
+                reader.cursor().execute('INSERT INTO counter VALUES (1)')
+                reader.commit()
+                writer.cursor().execute('INSERT INTO counter VALUES (2)')
+            finally:
+                reader.close()
+                writer.close()
+
+
+class PostIndexTestCase(TestCase):
+    """
+    Post indexes test case.
+
+    Checks the query plan of the timelines to catch full table scans and sorts.
+
+    cases:
+    - public posts timeline uses the partial index
+    - user's posts timeline uses the author index
+    - keyset page of the public posts timeline uses the partial index
+    """
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        self.user = UserModel.objects.create_user(username='anon', password='Change_me_123!')
+        Post.objects.bulk_create(
+            [Post(author=self.user, content=f'post {i}', hidden=i % 3 == 0) for i in range(50)]
+        )
+        self.factory = RequestFactory()
+
+    def get_view_queryset(self, view_class):
+        request = self.factory.get('/')
+        request.user = self.user
+        return view_class(request=request, action='list').get_queryset()
+
+    def assertIndexScan(self, queryset, index_name):
+        self.assertPlanUsesIndex(queryset.explain(), index_name)
+
+    def assertPlanUsesIndex(self, plan, index_name):
+        if connection.vendor == 'sqlite':
+            self.assertIn(index_name, plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+        elif connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan', plan)
+            self.assertNotIn('Sort', plan)
+
+    def test_public_timeline(self):
+        queryset = self.get_view_queryset(PublicPostsAPIView)[:100]
+        self.assertIndexScan(queryset, 'post_public_created_idx')
+
+    def test_user_timeline(self):
+        queryset = self.get_view_queryset(UserPostsAPIView)[:100]
+        self.assertIndexScan(queryset, 'post_author_created_idx')
+
+    def test_public_timeline_keyset(self):
+        last = Post.objects.filter(hidden=False)[10]
+        queryset = self.get_view_queryset(PublicPostsAPIView).filter(
+            Q(created_at__lt=last.created_at) | Q(created_at=last.created_at, id__lt=last.id)
+        )[:100]
+        self.assertIndexScan(queryset, 'post_public_created_idx')
+
+
+class SeedDatasetTestCase(TestCase):
+    """
+    seed_dataset command test case.
+
+    cases:
+    - users and posts created with the hidden ratio, counters reconciled
+    - posts created over the period, in order of primary key
+    - nothing created by a second run
+    - cached lists of the public posts and of the authors invalidated
+    """
+
+    def test_seed(self):
+        out = StringIO()
+        call_command(
+            'seed_dataset', users=3, posts=40, hidden_ratio=0.5, batch_size=15, stdout=out
+        )
+        posts = Post.objects.filter(author__username__startswith='seed')
+
+        # Assertion for the dataset created with hidden and public posts
+        self.assertIn('Dataset of 3 users and 40 posts', out.getvalue())
+        self.assertEqual(UserModel.objects.filter(username__startswith='seed').count(), 3)
+        self.assertTrue(0 < posts.filter(hidden=True).count() < 40)
+
+        # Assertion for the counters of the users matching their posts
+        stats = UserPostStats.objects.filter(user__username__startswith='seed')
+        self.assertEqual(sum(stats.values_list('total', flat=True)), 40)
+        self.assertEqual(
+            sum(stats.values_list('hidden', flat=True)), posts.filter(hidden=True).count()
+        )
+
+        # Assertion for nothing created on the next run
+        call_command('seed_dataset', users=3, posts=40, stdout=out)
+        self.assertEqual(posts.count(), 40)
+
+    def test_seed_period(self):
+        call_command('seed_dataset', users=3, posts=40, days=30, batch_size=15, stdout=StringIO())
+        posts = Post.objects.filter(author__username__startswith='seed').order_by('pk')
+        created_at = list(posts.values_list('created_at', flat=True))
+
+        # Assertion for the posts spread over the 30 days, the oldest first
+        self.assertEqual(created_at, sorted(created_at))
+        self.assertGreater(created_at[-1] - created_at[0], timedelta(days=25))
+        self.assertLess(timezone.now() - created_at[0], timedelta(days=30))
+        self.assertFalse(posts.filter(updated_at__lt=F('created_at')).exists())
+
+    def test_seed_cache(self):
+        call_command('seed_dataset', users=3, posts=0, stdout=StringIO())
+        author_ids = UserModel.objects.filter(username__startswith='seed').values_list(
+            'pk', flat=True
+        )
+        versions = [public_posts_cache.get_version('all')]
+        versions += [user_posts_cache.get_version(author_id) for author_id in author_ids]
+        call_command('seed_dataset', users=3, posts=10, stdout=StringIO())
+
+        # Assertion for new versions of the public posts and of every author
+        self.assertNotEqual(public_posts_cache.get_version('all'), versions[0])
+        for author_id, version in zip(author_ids, versions[1:]):
+            self.assertNotEqual(user_posts_cache.get_version(author_id), version)
+
+
+class SparseFieldsTestCase(APITestCase):
+    """
+    Sparse fieldsets and compact format of the posts lists test case.
+
+    supported methods:
+    - GET
+        cases:
+        - list public posts with some fields, only their columns fetched
+        - list public posts in the compact format
+        - list public posts from the materialized timeline with some fields
+        - list with an unknown field
+        - list and export user's posts with some fields
+        - list public posts with the async view, same output as PublicPostsAPIView
+    """
+
+    public_url = reverse('public-posts-list')
+    user_url = reverse('user-posts-list')
+    export_url = reverse('user-posts-export')
+
+    def setUp(self):
+        """
+        Initial setup that will be performed before each test
+        """
+
+        cache.clear()
+
+        # Create a new user
+        username = 'anon'
+        password = 'Change_me_123!'
+        self.user = UserModel.objects.create_user(username=username, password=password)
+
+        # Make the request for login with user and retrieve JWT tokens
+        login_url = reverse('token_obtain_pair')
+        payload = {'username': username, 'password': password}
+        response = self.client.post(login_url, data=payload, format='json')
+        self.access_token = json_loads(response.content)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        revoked_tokens.reload()
+
+        Post.objects.bulk_create(
+            [Post(author=self.user, content=f'post number {i}', hidden=i == 0) for i in range(3)]
+        )
+
+    def get_results(self, url, data):
+        response = self.client.get(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return json_loads(response.content)['results']
+
+    def test_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            results = self.get_results(self.public_url, {'fields': 'content,id'})
+        page_sql = context.captured_queries[-1]['sql']
+
+        # Assertion for the fields returned in the order of the serializer
+        self.assertEqual(
+            results, [{'id': 3, 'content': 'post number 2'}, {'id': 2, 'content': 'post number 1'}]
+        )
+
+        # Assertion for the columns of the other fields not fetched
+        self.assertNotIn('auth_user', page_sql)
+        self.assertNotIn('"hidden",', page_sql)
+
+    @override_settings(POST_COMPACT_CONTENT_LENGTH=4)
+    def test_compact(self):
+        results = self.get_results(self.public_url, {'compact': 'true'})
+        post = Post.objects.get(pk=results[0]['id'])
+
+        # Assertion for the truncated content and the timestamp
+        self.assertEqual(results[0]['content'], 'post')
+        self.assertEqual(results[0]['created_at'], int(post.created_at.timestamp()))
+        self.assertEqual(results[0]['author'], 'anon')
+
+    @override_settings(PUBLIC_TIMELINE_MATERIALIZED=True)
+    def test_timeline_fields(self):
+        public_timeline.rebuild()
+        results = self.get_results(self.public_url, {'fields': 'id,author', 'compact': '1'})
+
+        # Assertion for the fields of the timeline entries
+        self.assertEqual(results, [{'id': 3, 'author': 'anon'}, {'id': 2, 'author': 'anon'}])
+
+    def test_unknown_field(self):
+        response = self.client.get(self.public_url, {'fields': 'id,hidden'})
+
+        # Assertion for a failing list cause unknown field
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(json_loads(response.content), {'fields': ['Unknown fields: hidden.']})
+
+    def test_user_posts(self):
+        results = self.get_results(self.user_url, {'fields': 'hidden'})
+        response = self.client.get(self.export_url, {'fields': 'id'})
+        lines = [json_loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        # Assertion for the fields of the user's posts listed and exported
+        self.assertEqual(results, [{'hidden': False}, {'hidden': False}, {'hidden': True}])
+        self.assertEqual([set(line) for line in lines], [{'id', 'cursor'}] * 3)
+
+    async def test_async_list(self):
+        data = {'fields': 'author,created_at', 'compact': 'true'}
+        request = AsyncRequestFactory().get(
+            self.public_url, data, headers={'Authorization': f'Bearer {self.access_token}'}
+        )
+        response = await AsyncPublicPostsView.as_view()(request)
+        expected = await sync_to_async(self.client.get)(self.public_url, data)
+
+        # Assertion for the output of PublicPostsAPIView
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json_loads(response.content), json_loads(expected.content))
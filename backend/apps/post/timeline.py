@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import transaction
+
+from apps.post.models import Post, PublicTimelineEntry
+
+
+class PublicTimeline:
+    """
+    Fan-out on write of the public posts timeline.
+
+    Posts are copied into PublicTimelineEntry when they are written, hidden posts are retracted.
+    Deleted posts are retracted by the cascade on PublicTimelineEntry.post.
+
+    * Enabled with the PUBLIC_TIMELINE_MATERIALIZED setting, after a rebuild.
+    """
+
+    update_fields = ['author_username', 'content', 'created_at', 'updated_at']
+
+    @property
+    def enabled(self):
+        return settings.PUBLIC_TIMELINE_MATERIALIZED
+
+    def sync(self, post):
+        self.sync_many([post])
+
+    def sync_many(self, posts):
+        if not self.enabled:
+            return
+        hidden = [post.pk for post in posts if post.hidden]
+        public = [PublicTimelineEntry.from_post(post) for post in posts if not post.hidden]
+        if hidden:
+            PublicTimelineEntry.objects.filter(post__in=hidden).delete()
+        if public:
+            PublicTimelineEntry.objects.bulk_create(
+                public,
+                batch_size=settings.POST_BULK_BATCH_SIZE,
+                update_conflicts=True,
+                update_fields=self.update_fields,
+                unique_fields=['post'],
+            )
+
+    def rebuild(self, batch_size=1000):
+        """
+        Replace the whole timeline with the public posts.
+
+        Returns the number of entries created.
+        """
+
+        posts = Post.objects.filter(hidden=False).select_related('author').order_by()
+        count = 0
+        with transaction.atomic():
+            PublicTimelineEntry.objects.all().delete()
+            batch = []
+            for post in posts.iterator(chunk_size=batch_size):
+                batch.append(PublicTimelineEntry.from_post(post))
+                if len(batch) >= batch_size:
+                    count += len(PublicTimelineEntry.objects.bulk_create(batch))
+                    batch = []
+            count += len(PublicTimelineEntry.objects.bulk_create(batch))
+        return count
+
+
+public_timeline = PublicTimeline()
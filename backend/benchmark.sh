@@ -0,0 +1,5 @@
+#!/bin/sh
+
+set -e  # Configure shell so that if one command fails, it exits
+python manage.py seed_dataset --users "${BENCHMARK_USERS:-10000}" --posts "${BENCHMARK_POSTS:-5000000}"
+python manage.py benchmark_api --output "benchmark-$(date +%Y%m%d-%H%M%S).json" "$@"
@@ -0,0 +1,29 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend applying the PRAGMAs of OPTIONS['pragmas'] on every new connection.
+
+    * Transactions start with BEGIN OPTIONS['transaction_mode'], e.g. 'IMMEDIATE'. A deferred
+      transaction that reads then writes fails at once with 'database is locked' if another
+      writer committed in between, the busy timeout is not applied to it. An immediate one takes
+      the write lock first and waits for it up to the busy timeout.
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.transaction_mode = kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            return super()._start_transaction_under_autocommit()
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -54,9 +54,13 @@ INSTALLED_APPS = [
     # Custom apps
     'apps.account',
     'apps.post',
+    'apps.monitoring',
+    'apps.compression',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.MetricsMiddleware',
+    'apps.compression.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -87,17 +91,121 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 
+# Serve the post lists and details and the user information with async views, for ASGI servers
+ASYNC_API_VIEWS = True if environ['ASYNC_API_VIEWS'].lower() == "True".lower() else False
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+# Database selected with DATABASE_ENGINE, 'sqlite' or 'postgresql'. Connections are kept open
+# for DATABASE_CONN_MAX_AGE seconds and checked before being reused by a new request.
+DATABASE_ENGINE = environ['DATABASE_ENGINE']
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": environ['POSTGRES_DB'],
+            "USER": environ['POSTGRES_USER'],
+            "PASSWORD": environ['POSTGRES_PASSWORD'],
+            "HOST": environ['POSTGRES_HOST'],
+            "PORT": environ['POSTGRES_PORT'],
+            "CONN_MAX_AGE": int(environ['DATABASE_CONN_MAX_AGE']),
+            "CONN_HEALTH_CHECKS": True,
+            # Server-side cursors are not supported by the transaction pooling of PgBouncer
+            "DISABLE_SERVER_SIDE_CURSORS": (
+                True if environ['POSTGRES_PGBOUNCER'].lower() == "True".lower() else False
+            ),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "config.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": int(environ['DATABASE_CONN_MAX_AGE']),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                # Applied on every connection: readers do not block the writer with the WAL,
+                # writers wait for the lock instead of failing
+                "pragmas": {
+                    "busy_timeout": int(environ['SQLITE_BUSY_TIMEOUT_MS']),
+                    "journal_mode": "wal",
+                    "synchronous": "normal",
+                    "mmap_size": int(environ['SQLITE_MMAP_SIZE']),
+                },
+                # Transactions take the write lock first, so they wait for it with the busy
+                # timeout instead of failing when they write after a read
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+# Read replicas of the posts lists, a JSON array of SQLite files or PostgreSQL hosts. Users read
+# from the primary for DATABASE_REPLICA_LAG_SECONDS after a write, to read their own writes.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(json_loads(environ['DATABASE_REPLICAS']), start=1):
+    alias = f"replica_{number}"
+    if DATABASE_ENGINE == 'postgresql':
+        DATABASES[alias] = {**DATABASES["default"], "HOST": replica}
+    else:
+        DATABASES[alias] = {**DATABASES["default"], "NAME": BASE_DIR / replica}
+    # Tests read the replicas from the primary test database
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_REPLICA_LAG_SECONDS = int(environ['DATABASE_REPLICA_LAG_SECONDS'])
+
+DATABASE_ROUTERS = ['apps.post.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": environ['CACHE_BACKEND'],
+        "LOCATION": environ['CACHE_LOCATION'],
     }
 }
 
+# Cache used for the rendered public and user's posts pages and its timeout in seconds
+POSTS_CACHE_ALIAS = "default"
+POSTS_CACHE_TIMEOUT = int(environ['POSTS_CACHE_TIMEOUT'])
+
+
+# Read the public posts timeline from the materialized table, populated on every post write.
+# Run the 'rebuild_public_timeline' command before enabling it.
+PUBLIC_TIMELINE_MATERIALIZED = (
+    True if environ['PUBLIC_TIMELINE_MATERIALIZED'].lower() == "True".lower() else False
+)
+
+
+# Number of posts written per query by the bulk endpoints
+POST_BULK_BATCH_SIZE = int(environ['POST_BULK_BATCH_SIZE'])
+
+# Maximum number of posts created, updated or deleted per request by the bulk endpoints
+POST_BULK_MAX_ITEMS = int(environ['POST_BULK_MAX_ITEMS'])
+
+# Number of posts fetched per query by the export endpoint
+POST_EXPORT_CHUNK_SIZE = int(environ['POST_EXPORT_CHUNK_SIZE'])
+
+# Number of characters of the post contents returned in the compact format of the posts lists
+POST_COMPACT_CONTENT_LENGTH = int(environ['POST_COMPACT_CONTENT_LENGTH'])
+
+# Number of most recent matches ranked by the posts search
+POST_SEARCH_MAX_RANKED = int(environ['POST_SEARCH_MAX_RANKED'])
+
+# Pub/sub of the public posts changes streamed by the live timeline (served by async views only)
+POST_EVENTS_BACKEND = 'apps.post.events.InMemoryPostEventsBackend'
+
+# Number of events kept to be replayed to the clients that reconnect with 'Last-Event-ID'
+POST_EVENTS_BUFFER_SIZE = int(environ['POST_EVENTS_BUFFER_SIZE'])
+
+# Number of seconds without events before a heartbeat keeps the live timeline stream open
+POST_EVENTS_HEARTBEAT_SECONDS = int(environ['POST_EVENTS_HEARTBEAT_SECONDS'])
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -144,22 +252,87 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.account.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.account.api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'PAGE_SIZE': 100,
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Client IPs of the throttles are read from X-Forwarded-For only behind that many proxies,
+    # otherwise a client could pick its own bucket
+    'NUM_PROXIES': int(environ['NUM_PROXIES']),
 }
+# Authentication classes of the read-only endpoints, the user is built from the token claims
+STATELESS_AUTHENTICATION_CLASSES = [
+    'apps.account.authentication.StatelessJWTAuthentication',
+]
 if environ['ENABLE_SESSION_AUTHENTICATION'].lower() == "True".lower():
     REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].append(
         'rest_framework.authentication.SessionAuthentication'
     )
+    STATELESS_AUTHENTICATION_CLASSES.append('rest_framework.authentication.SessionAuthentication')
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(environ['ACCESS_TOKEN_MINUTES_LIFETIME'])),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=int(environ['REFRESH_TOKEN_DAYS_LIFETIME'])),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.account.api.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.account.api.serializers.TokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'apps.account.api.serializers.TokenBlacklistSerializer',
+}
+
+# Token bucket rates of the throttled endpoints as 'number/period' (s, m, h or d), empty to
+# disable. Buckets are stored in the THROTTLE_CACHE_ALIAS cache, shared by the processes.
+THROTTLE_CACHE_ALIAS = "default"
+THROTTLE_RATES = {
+    'login': environ['THROTTLE_LOGIN_RATE'],
+    'register': environ['THROTTLE_REGISTER_RATE'],
+    'post_write': environ['THROTTLE_POST_WRITE_RATE'],
+}
+
+# Requests hashing passwords at the same time per process, others wait for a slot up to
+# PASSWORD_HASHING_WAIT_MS and then get a 503
+PASSWORD_HASHING_CONCURRENCY = int(environ['PASSWORD_HASHING_CONCURRENCY'])
+PASSWORD_HASHING_WAIT_MS = int(environ['PASSWORD_HASHING_WAIT_MS'])
+
+# Password hasher of each profile, PASSWORD_HASHER_PROFILE hashes the new passwords, the others
+# check the existing ones, which are rehashed with the profile on the next login
+# - pbkdf2: PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations
+# - scrypt: scrypt with the Django parameters, 16 MiB of memory per hash
+# - argon2: Argon2id with the Django parameters, requires argon2-cffi
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'apps.account.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
 }
+PASSWORD_HASHER_PROFILE = environ['PASSWORD_HASHER_PROFILE']
+PASSWORD_PBKDF2_ITERATIONS = int(environ['PASSWORD_PBKDF2_ITERATIONS'])
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *[
+        hasher
+        for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+        if profile != PASSWORD_HASHER_PROFILE
+    ],
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+
+# Client IPs allowed to read the metrics endpoint, and duration of the requests logged as slow
+# with their SQL queries, 0 to disable
+METRICS_ALLOWED_IPS = json_loads(environ['METRICS_ALLOWED_IPS'])
+METRICS_SLOW_REQUEST_MS = int(environ['METRICS_SLOW_REQUEST_MS'])
+
+# Content codings of the responses in order of preference, 'zstd' and 'br' require zstandard and
+# brotli, and minimum size in bytes of the responses compressed
+COMPRESSION_ENCODINGS = json_loads(environ['COMPRESSION_ENCODINGS'])
+COMPRESSION_MIN_SIZE = int(environ['COMPRESSION_MIN_SIZE'])
+
+# Maximum number of seconds before a logout is effective in every process
+JWT_REVOCATION_RELOAD_SECONDS = int(environ['JWT_REVOCATION_RELOAD_SECONDS'])
@@ -18,6 +18,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from apps.monitoring.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     # DRF Browsable API session authentication
@@ -32,4 +34,6 @@ urlpatterns = [
             ]
         ),
     ),
+    # Prometheus metrics of the APIs
+    path('internal/metrics/', MetricsView.as_view(), name='metrics'),
 ]
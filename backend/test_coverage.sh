@@ -2,5 +2,5 @@
 
 set -e  # Configure shell so that if one command fails, it exits
 coverage erase
-coverage run manage.py test apps/account apps/post
+coverage run manage.py test apps/account apps/post apps/monitoring apps/compression
 coverage report
\ No newline at end of file